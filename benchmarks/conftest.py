@@ -0,0 +1,141 @@
+import dataclasses
+import datetime
+import decimal
+import tracemalloc
+import typing
+import uuid
+
+import pytest
+from celery import Celery
+
+import celery_typed_tasks
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1, 12, 30)
+Annotated = getattr(typing, "Annotated", None)
+
+
+class File:
+    def __init__(self, url):
+        self.url = url
+
+
+class FileTask(celery_typed_tasks.TypedTask):
+    def dump_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        if issubclass(annotation, File):
+            return obj.url
+        return super().dump_obj(obj, annotation)
+
+    def load_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        if issubclass(annotation, File):
+            return annotation(obj)
+        return super().load_obj(obj, annotation)
+
+
+@dataclasses.dataclass
+class Walk:
+    dog: Dog
+    started: datetime.datetime
+    route: typing.List[datetime.datetime]
+    distance: decimal.Decimal
+    id: uuid.UUID
+
+
+def dogs(count):
+    return [
+        Dog(name=f"dog-{index}", dob=dob + datetime.timedelta(days=index))
+        for index in range(count)
+    ]
+
+
+def walk():
+    return Walk(
+        dog=Dog(name="Gus", dob=dob),
+        started=dob,
+        route=[dob + datetime.timedelta(minutes=minute) for minute in range(30)],
+        distance=decimal.Decimal("3.14"),
+        id=uuid.uuid4(),
+    )
+
+
+# id, annotation, value factory
+SHAPES = [
+    ("uuid", uuid.UUID, uuid.uuid4),
+    ("decimal", decimal.Decimal, lambda: decimal.Decimal("3.14159")),
+    ("datetime", datetime.datetime, lambda: dob),
+    ("date", datetime.date, lambda: dob.date()),
+    ("time", datetime.time, lambda: dob.time()),
+    ("nested-dataclass", Walk, walk),
+    ("list-dog-10", typing.List[Dog], lambda: dogs(10)),
+    ("list-dog-1k", typing.List[Dog], lambda: dogs(1000)),
+    ("list-dog-100k", typing.List[Dog], lambda: dogs(100000)),
+    (
+        "columnar-dog-1k",
+        Annotated and Annotated[typing.List[Dog], celery_typed_tasks.Columnar()],
+        lambda: dogs(1000),
+    ),
+    (
+        "set-datetime-1k",
+        typing.Set[datetime.datetime],
+        lambda: {dob + datetime.timedelta(seconds=second) for second in range(1000)},
+    ),
+    (
+        "custom-dump-obj",
+        typing.List[File],
+        lambda: [File(f"s3://bucket/{index}") for index in range(1000)],
+    ),
+]
+# the columnar shape requires typing.Annotated
+SHAPES = [shape for shape in SHAPES if shape[1] is not None]
+
+
+@pytest.fixture(params=SHAPES, ids=[shape[0] for shape in SHAPES])
+def shape(request):
+    name, annotation, factory = request.param
+    return annotation, factory()
+
+
+@pytest.fixture
+def task():
+    """
+    A task whose `dump_obj` and `load_obj` convert the `File`s of the custom-dump-obj
+    shape.
+    """
+    return FileTask()
+
+
+@pytest.fixture
+def app():
+    app = Celery("benchmarks", task_cls=FileTask)
+    app.conf.task_always_eager = True
+    return app
+
+
+@pytest.fixture
+def memory_app():
+    return Celery("benchmarks", broker="memory://", task_cls=FileTask)
+
+
+@pytest.fixture
+def walks():
+    return [walk() for _ in range(1000)]
+
+
+@pytest.fixture
+def allocations(benchmark):
+    """
+    Run a function once more under tracemalloc and record its allocations with the
+    benchmark, so they're saved in its history too.
+    """
+
+    def measure(fn, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["allocated_bytes"] = current
+        benchmark.extra_info["peak_allocated_bytes"] = peak
+
+    return measure
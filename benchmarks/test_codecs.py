@@ -0,0 +1,11 @@
+def test_encode(benchmark, allocations, task, shape):
+    annotation, value = shape
+    benchmark(task._dump_obj, value, annotation)
+    allocations(task._dump_obj, value, annotation)
+
+
+def test_decode(benchmark, allocations, task, shape):
+    annotation, value = shape
+    raw = task._dump_obj(value, annotation)
+    benchmark(task._load_obj, raw, annotation)
+    allocations(task._load_obj, raw, annotation)
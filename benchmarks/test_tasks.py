@@ -0,0 +1,73 @@
+import pytest
+
+from celery_typed_tasks.eager import MODES
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_eager_round_trip(benchmark, allocations, app, shape, mode):
+    annotation, value = shape
+
+    @app.task(type_hint_eager=mode)
+    def echo(value):
+        return value
+
+    echo.run.__annotations__.update({"value": annotation, "return": annotation})
+
+    def round_trip():
+        return echo.delay(value).get()
+
+    benchmark(round_trip)
+    allocations(round_trip)
+
+
+def test_memory_transport(benchmark, allocations, memory_app, shape):
+    annotation, value = shape
+
+    @memory_app.task
+    def echo(value):
+        return value
+
+    echo.run.__annotations__["value"] = annotation
+
+    def publish_consume():
+        echo.delay(value)
+        with memory_app.connection_for_read() as connection:
+            queue = connection.SimpleQueue("celery")
+            message = queue.get(timeout=1)
+            message.ack()
+            queue.close()
+        args, kwargs, _ = message.decode()
+        return echo._load_obj(args[0], annotation)
+
+    benchmark(publish_consume)
+    allocations(publish_consume)
+
+
+@pytest.mark.parametrize("method", ["apply_async", "apply_async_many"])
+def test_bulk_enqueue(benchmark, memory_app, walks, method):
+    """
+    Enqueue many calls on the memory transport, one `apply_async` each or with one
+    `apply_async_many`.
+    """
+
+    @memory_app.task
+    def echo(value):
+        return value
+
+    echo.run.__annotations__["value"] = type(walks[0])
+    calls = [((value,), {}) for value in walks]
+
+    def loop():
+        for args, kwargs in calls:
+            echo.apply_async(args, kwargs)
+
+    def many():
+        echo.apply_async_many(calls)
+
+    def purge():
+        with memory_app.connection_for_write() as connection:
+            connection.default_channel.queue_purge("celery")
+
+    benchmark.group = "bulk-enqueue"
+    benchmark.extra_info["calls"] = len(calls)
+    benchmark.pedantic(loop if method == "apply_async" else many, setup=purge, rounds=5)
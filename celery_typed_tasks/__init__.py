@@ -1,3 +1,8 @@
 from ._version import __version__
+from .batches import BatchTypedTask
+from .columnar import Columnar
 from .core import TypedTask
 from .core import get_annotations
+from .lazy import Lazy
+from .registry import register_codec
+from .results import TypedGroupResult
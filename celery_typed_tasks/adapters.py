@@ -0,0 +1,119 @@
+import datetime
+import decimal
+import threading
+import types
+import typing
+import uuid
+
+try:
+    from pydantic import BaseModel
+    from pydantic import TypeAdapter
+except ImportError:  # pragma: no cover
+    # pydantic isn't installed, or it's pydantic v1
+    BaseModel = None  # type: ignore[misc,assignment]
+    TypeAdapter = None  # type: ignore[misc,assignment]
+
+_UnionType = getattr(types, "UnionType", None)
+
+# annotations pydantic converts the same way as the built-in codecs
+_LEAVES = frozenset(
+    [
+        type(None),
+        None,
+        typing.Any,
+        bool,
+        int,
+        float,
+        str,
+        datetime.datetime,
+        datetime.date,
+        datetime.time,
+        uuid.UUID,
+        decimal.Decimal,
+    ]
+)
+_CONTAINERS = frozenset([list, set, frozenset, tuple, dict, typing.Union])
+
+_adapters: typing.Dict[typing.Any, typing.Any] = {}
+_lock = threading.Lock()
+
+Functions = typing.Tuple[
+    typing.Callable[[typing.Any], typing.Any],
+    typing.Callable[[typing.Any], typing.Any],
+    typing.Callable[[typing.Iterable], typing.List],
+    typing.Callable[[typing.Iterable], typing.List],
+]
+
+
+def is_adaptable(annotation: typing.Any) -> bool:
+    """
+    Whether an annotation is a pydantic model, or a container of them, eg.
+    `List[Item]` or `Dict[str, Optional[Item]]`.
+    """
+    if TypeAdapter is None:
+        return False
+    adaptable, has_model = _scan(annotation)
+    return adaptable and has_model
+
+
+def _scan(annotation: typing.Any) -> typing.Tuple[bool, bool]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True, True
+    try:
+        if annotation in _LEAVES:
+            return True, False
+    except TypeError:
+        # unhashable
+        return False, False
+    origin = getattr(annotation, "__origin__", None)
+    if origin in _CONTAINERS or (
+        _UnionType is not None and isinstance(annotation, _UnionType)
+    ):
+        has_model = False
+        for arg in getattr(annotation, "__args__", ()):
+            if arg is Ellipsis:
+                continue
+            adaptable, arg_has_model = _scan(arg)
+            if not adaptable:
+                return False, False
+            has_model = has_model or arg_has_model
+        return True, has_model
+    return False, False
+
+
+def get_adapter(annotation: typing.Any) -> typing.Any:
+    """
+    The TypeAdapter of an annotation, built once per process.
+    """
+    adapter = _adapters.get(annotation)
+    if adapter is None:
+        with _lock:
+            adapter = _adapters.get(annotation)
+            if adapter is None:
+                adapter = _adapters[annotation] = TypeAdapter(annotation)
+    return adapter
+
+
+def adapter_functions(annotation: typing.Any) -> Functions:
+    """
+    Dump, load, dump many and load many functions for an adaptable annotation.
+    Values are dumped in json mode, so they suit every serializer.
+    """
+    adapter = get_adapter(annotation)
+    dump_python = adapter.dump_python
+    validate_python = adapter.validate_python
+
+    def dump(obj: typing.Any) -> typing.Any:
+        return dump_python(obj, mode="json")
+
+    def dump_many(values: typing.Iterable) -> typing.List:
+        return get_adapter(typing.List[annotation]).dump_python(  # type: ignore
+            list(values), mode="json"
+        )
+
+    def load_many(values: typing.Iterable) -> typing.List:
+        return get_adapter(typing.List[annotation]).validate_python(  # type: ignore
+            list(values)
+        )
+
+    return dump, validate_python, dump_many, load_many
@@ -0,0 +1,133 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import typing
+import weakref
+
+Publish = typing.Callable[[typing.Any], typing.Any]
+Outcome = typing.Tuple[typing.Any, typing.Optional[BaseException]]
+
+#: workers of the executor shared by tasks without a `type_hint_async_executor`
+MAX_WORKERS = 4
+
+_executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Batcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    The bounded thread pool that dumps large payloads and publishes messages off the
+    event loop, created on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    MAX_WORKERS, thread_name_prefix="celery-typed-tasks"
+                )
+    return _executor
+
+
+def get_batcher() -> "Batcher":
+    """
+    The batcher of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = Batcher(loop, get_executor())
+    return batcher
+
+
+class Batcher:
+    """
+    Publish the enqueues of one event loop from a worker thread, so the loop never
+    waits on the broker.
+
+    Enqueues started in the same iteration of the loop, or while a batch is being
+    published, are sent together in the next batch over one producer per app.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, executor: concurrent.futures.Executor
+    ) -> None:
+        self.loop = loop
+        self.executor = executor
+        self._pending: typing.List[
+            typing.Tuple[typing.Any, Publish, "asyncio.Future[typing.Any]"]
+        ] = []
+        self._flushing = False
+
+    def publish(
+        self, app: typing.Any, publish: Publish
+    ) -> "asyncio.Future[typing.Any]":
+        """
+        Schedule `publish(producer)` and return a future of its result.
+        """
+        future = self.loop.create_future()
+        self._pending.append((app, publish, future))
+        if not self._flushing:
+            self._flushing = True
+            # let the other enqueues of this iteration join the batch
+            self.loop.call_soon(self._flush)
+        return future
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        published = self.loop.run_in_executor(
+            self.executor,
+            publish_batch,
+            [(app, publish) for app, publish, _ in batch],
+        )
+        published.add_done_callback(functools.partial(self._done, batch))
+
+    def _done(
+        self,
+        batch: typing.List[
+            typing.Tuple[typing.Any, Publish, "asyncio.Future[typing.Any]"]
+        ],
+        published: "asyncio.Future[typing.List[Outcome]]",
+    ) -> None:
+        try:
+            outcomes = published.result()
+        except BaseException as error:
+            # eg. the broker is down
+            outcomes = [(None, error)] * len(batch)
+        for (_, _, future), (result, exc) in zip(batch, outcomes):
+            if future.cancelled():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        if self._pending:
+            self._flush()
+        else:
+            self._flushing = False
+
+
+def publish_batch(
+    batch: typing.List[typing.Tuple[typing.Any, Publish]],
+) -> typing.List[Outcome]:
+    """
+    Run the publish functions of a batch, grouped by app so each app acquires one
+    producer, and return their results or exceptions in order.
+    """
+    outcomes: typing.List[Outcome] = [(None, None)] * len(batch)
+    by_app: typing.Dict[int, typing.List[int]] = {}
+    for index, (app, _) in enumerate(batch):
+        by_app.setdefault(id(app), []).append(index)
+    for indexes in by_app.values():
+        app = batch[indexes[0]][0]
+        with app.producer_or_acquire() as producer:
+            for index in indexes:
+                try:
+                    outcomes[index] = (batch[index][1](producer), None)
+                except Exception as exc:
+                    outcomes[index] = (None, exc)
+    return outcomes
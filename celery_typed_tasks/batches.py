@@ -0,0 +1,330 @@
+import copy
+import inspect
+import typing
+from datetime import datetime
+
+import celery
+from celery.utils.log import get_logger
+from celery.utils.time import maybe_iso8601
+from celery.utils.time import maybe_make_aware
+from celery.worker.state import revoked as revoked_tasks
+from kombu import serialization
+
+from .binding import Binding
+from .codecs import _get_args
+from .codecs import _get_origin
+from .core import TypedTask
+from .serialization import CONTENT_TYPE
+
+logger = get_logger(__name__)
+
+# the raw message of a call: its id, body, content type and content encoding
+Call = typing.Tuple[typing.Optional[str], typing.Any, str, str]
+# a buffered call, its expiry, and the ack and reject of its message
+Pending = typing.Tuple[
+    Call, typing.Optional[datetime], typing.Callable, typing.Callable
+]
+
+
+def item_binding(binding: Binding) -> typing.Tuple[Binding, typing.Any]:
+    """
+    The binding of a single call of a batch task body, and the annotation of the
+    batch. A body takes one `List[T]` parameter and returns `None` or a `List[R]`,
+    each call takes one `T` and returns one `R`.
+    """
+    if len(binding.parameters) != 1 or binding.var_positional[0]:
+        raise TypeError("A batch task takes a single List parameter")
+    ((name, annotation),) = binding.parameters.items()
+    if _get_origin(annotation) is not list:
+        raise TypeError(f"The parameter {name} of a batch task must be a List")
+    item = (_get_args(annotation) or (inspect._empty,))[0]
+
+    returns = binding.returns
+    if _get_origin(returns) is list:
+        returns = (_get_args(returns) or (inspect._empty,))[0]
+    elif returns not in (None, type(None), inspect._empty):
+        raise TypeError("A batch task returns None or a List")
+
+    items = copy.copy(binding)
+    items.parameters = {name: item}
+    items.positional = tuple((name, item) for _ in binding.positional)
+    items.keywords = {name: item for _ in binding.keywords}
+    items.returns = returns
+    return items, annotation
+
+
+class BatchTypedTask(TypedTask):
+    """
+    A task whose body is called with the arguments of many calls at once.
+
+    Calls take one argument, a `T`, and the body takes a `List[T]` and returns
+    `None` or a list with one result per call. Workers buffer the messages of the
+    task up to `type_hint_batch_size` calls or `type_hint_batch_interval` seconds,
+    load their arguments in one pass, and store each result under its own task id.
+
+    >>> @app.task(base=BatchTypedTask, type_hint_batch_size=500)
+    ... def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+    ...     ...
+    """
+
+    Strategy = "celery_typed_tasks.batches:batch_strategy"
+
+    type_hint_batch_size: int
+    type_hint_batch_interval: float
+
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore
+        super().__init__(*args, **kwargs)
+        self._set_option("type_hint_batch_size", 100)
+        self._set_option("type_hint_batch_interval", 1.0)
+        self._batch_annotation: typing.Any = None
+
+    def _get_binding(self) -> Binding:
+        binding = self._binding
+        if binding is None:
+            binding, self._batch_annotation = item_binding(Binding(self.run))
+            self._binding = binding
+        return binding
+
+    def _run(
+        self, args: typing.Sequence, kwargs: typing.Mapping[str, typing.Any]
+    ) -> typing.Any:
+        # a single call, eg. an eager one, is a batch of one
+        results = super()._run(([_get_item(args, kwargs)],), {})
+        if results is None:
+            return None
+        return results[0]
+
+    def _run_batch(self, calls: typing.Sequence[Call]) -> typing.List[bool]:
+        """
+        Load the arguments of `calls`, call the body once and store a result for
+        each call. Returns whether each call succeeded.
+        """
+        self._get_binding()
+        backend = self.backend
+        store = not self.ignore_result
+        accept = serialization.prepare_accept_content(self.app.conf.accept_content)
+        ids: typing.List[typing.Optional[str]] = []
+        errors: typing.Dict[int, Exception] = {}
+        raws: typing.Dict[bool, typing.List[typing.Tuple[int, typing.Any]]] = {}
+        for index, (task_id, body, content_type, content_encoding) in enumerate(calls):
+            try:
+                payload = serialization.loads(
+                    body, content_type, content_encoding, accept=accept
+                )
+                if isinstance(payload, dict):
+                    # protocol 1
+                    task_id = payload["id"]
+                    args, kwargs = payload.get("args"), payload.get("kwargs")
+                else:
+                    args, kwargs = payload[0], payload[1]
+                if task_id is None:
+                    raise ValueError("The message has no task id")
+                raw = _get_item(args, kwargs)
+            except Exception as exc:
+                errors[index] = exc
+                raw = None
+            ids.append(task_id)
+            if index not in errors:
+                raws.setdefault(content_type == CONTENT_TYPE, []).append((index, raw))
+
+        values: typing.Dict[int, typing.Any] = {}
+        for native, pending in raws.items():
+            values.update(self._load_batch(native, pending, errors))
+
+        if values:
+            indexes = sorted(values)
+            try:
+                results = self.run([values[index] for index in indexes])
+                if results is None:
+                    results = [None] * len(indexes)
+                elif len(results) != len(indexes):
+                    raise ValueError(
+                        f"{self.name} returned {len(results)} results for a batch "
+                        f"of {len(indexes)} calls"
+                    )
+            except Exception as exc:
+                logger.exception("Batch of %s failed", self.name)
+                errors.update((index, exc) for index in indexes)
+            else:
+                if store:
+                    for index, result in zip(indexes, results):
+                        task_id = typing.cast(str, ids[index])
+                        backend.mark_as_done(task_id, result)
+
+        for index, error in errors.items():
+            task_id = ids[index]
+            if store and task_id is not None:
+                backend.mark_as_failure(task_id, error)
+        return [index not in errors for index in range(len(calls))]
+
+    def _load_batch(
+        self,
+        native: bool,
+        pending: typing.List[typing.Tuple[int, typing.Any]],
+        errors: typing.Dict[int, Exception],
+    ) -> typing.Dict[int, typing.Any]:
+        """
+        Load the raw arguments of a batch in one pass. If that fails, each is
+        loaded on its own, so a bad argument only fails its own call.
+        """
+        compiler = self._native_compiler if native else self._compiler
+        indexes = [index for index, _ in pending]
+        try:
+            loaded = compiler.get_codec(self._batch_annotation).load(
+                [raw for _, raw in pending]
+            )
+            return dict(zip(indexes, loaded))
+        except Exception:
+            pass
+        (annotation,) = self._get_binding().parameters.values()
+        item = compiler.get_codec(annotation)
+        values = {}
+        for index, raw in pending:
+            try:
+                values[index] = item.load(raw)
+            except Exception as exc:
+                errors[index] = exc
+        return values
+
+
+def _get_item(
+    args: typing.Optional[typing.Sequence],
+    kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+) -> typing.Any:
+    """
+    The single argument of a call of a batch task.
+    """
+    values = list(args or ()) + list((kwargs or {}).values())
+    if len(values) != 1:
+        raise TypeError(f"A batch task takes one argument per call, got {len(values)}")
+    return values[0]
+
+
+def _message_time(value: typing.Any, app: celery.Celery) -> datetime:
+    """
+    The ETA or expiry of a message, an ISO 8601 string, as an aware datetime.
+    """
+    parsed = typing.cast(datetime, maybe_iso8601(value))
+    return maybe_make_aware(parsed, app.timezone)
+
+
+def run_batch(task: BatchTypedTask, calls: typing.Sequence[Call]) -> typing.List[bool]:
+    """
+    Run a batch in the worker pool. Never raises, failures are stored per call.
+    """
+    try:
+        return task._run_batch(calls)
+    except Exception:
+        logger.exception("Batch of %s failed", task.name)
+        return [False] * len(calls)
+
+
+def batch_strategy(
+    task: BatchTypedTask, app: celery.Celery, consumer: typing.Any, **kwargs: typing.Any
+) -> typing.Callable:
+    """
+    The worker strategy of a `BatchTypedTask`. Messages are buffered and sent to the
+    pool together, and each is acked, or rejected, once its call is done.
+
+    Like the default strategy, messages with an ETA wait on the worker's timer, and
+    expired and revoked calls are acked and marked as revoked instead of run, both
+    when they arrive and when their batch is flushed.
+
+    Messages stay unacked while they're buffered, so the prefetch limit of the
+    worker must allow `type_hint_batch_size` messages.
+    """
+    connection_errors = consumer.connection_errors
+    store_errors = not task.ignore_result or task.store_errors_even_if_ignored
+    buffer: typing.List[Pending] = []
+    timer: typing.List[typing.Any] = []
+
+    def settle(pending: typing.List[Pending], outcomes: typing.Sequence[bool]) -> None:
+        for (_, _, ack, reject), succeeded in zip(pending, outcomes):
+            if succeeded or task.acks_on_failure_or_timeout:
+                ack(logger, connection_errors)
+            else:
+                reject(logger, connection_errors, False)
+
+    def discarded(entry: Pending) -> bool:
+        """
+        Ack and mark an expired or revoked call as revoked, like `Request.revoked`.
+        """
+        (task_id, _, _, _), expires, ack, _ = entry
+        if expires is not None and datetime.now(expires.tzinfo) > expires:
+            reason = "expired"
+            if task_id is not None:
+                revoked_tasks.add(task_id)
+        elif task_id is not None and task_id in revoked_tasks:
+            reason = "revoked"
+        else:
+            return False
+        logger.info("Discarding %s task: %s[%s]", reason, task.name, task_id)
+        if task_id is not None:
+            task.backend.mark_as_revoked(task_id, reason, store_result=store_errors)
+        ack(logger, connection_errors)
+        return True
+
+    def flush() -> None:
+        # calls may have been revoked, or expired, while they were buffered
+        pending = [entry for entry in buffer if not discarded(entry)]
+        del buffer[:]
+        if not pending:
+            return
+        consumer.pool.apply_async(
+            run_batch,
+            (task, [call for call, _, _, _ in pending]),
+            callback=lambda outcomes: settle(pending, outcomes),
+            error_callback=lambda exc: settle(pending, [False] * len(pending)),
+        )
+
+    def add(entry: Pending) -> None:
+        if discarded(entry):
+            return
+        buffer.append(entry)
+        if not timer:
+            timer.append(
+                consumer.timer.call_repeatedly(task.type_hint_batch_interval, flush)
+            )
+        if len(buffer) >= task.type_hint_batch_size:
+            flush()
+
+    def add_eta(entry: Pending) -> None:
+        consumer.qos.decrement_eventually()
+        add(entry)
+
+    def task_message_handler(
+        message: typing.Any,
+        body: typing.Any,
+        ack: typing.Callable,
+        reject: typing.Callable,
+        callbacks: typing.Any,
+        **kw: typing.Any,
+    ) -> None:
+        headers = message.headers
+        # protocol 1 keeps the options of a call in the body
+        options = headers if "task" in headers else message.payload
+        call = (
+            options.get("id"),
+            message.body,
+            message.content_type,
+            message.content_encoding,
+        )
+        eta, expires = options.get("eta"), options.get("expires")
+        try:
+            eta = eta and _message_time(eta, app)
+            expires = expires and _message_time(expires, app)
+        except (OverflowError, ValueError) as exc:
+            logger.error(
+                "Couldn't read the ETA or expiry of %s[%s]: %r", task.name, call[0], exc
+            )
+            reject(logger, connection_errors, False)
+            return
+        entry = (call, expires, ack, reject)
+        if not eta:
+            add(entry)
+            return
+        # the message stays unacked until its ETA, don't let it hold up prefetching
+        consumer.qos.increment_eventually()
+        consumer.timer.call_at(eta, add_eta, (entry,), priority=6)
+
+    return task_message_handler
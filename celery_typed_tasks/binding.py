@@ -0,0 +1,95 @@
+import inspect
+import typing
+
+_POSITIONAL = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+_KEYWORD = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+
+
+class Binding:
+    """
+    The parameters of a task's run method, resolved once so calls only need to zip
+    arguments against precomputed annotations.
+
+    String annotations, eg. from `from __future__ import annotations`, are resolved
+    with `typing.get_type_hints`.
+    """
+
+    __slots__ = (
+        "parameters",
+        "positional",
+        "keywords",
+        "var_positional",
+        "var_keyword",
+        "none_defaults",
+        "returns",
+    )
+
+    def __init__(self, fn: typing.Callable) -> None:
+        signature = inspect.signature(fn)
+        hints = _get_type_hints(fn, signature)
+
+        self.parameters: typing.Dict[str, typing.Any] = {}
+        positional = []
+        self.keywords: typing.Dict[str, typing.Any] = {}
+        self.var_positional: typing.Tuple[str, typing.Any] = ("", inspect._empty)
+        self.var_keyword: typing.Any = inspect._empty
+        none_defaults = []
+        for name, parameter in signature.parameters.items():
+            annotation = hints.get(name, parameter.annotation)
+            self.parameters[name] = annotation
+            if parameter.kind in _POSITIONAL:
+                positional.append((name, annotation))
+            if parameter.kind in _KEYWORD:
+                self.keywords[name] = annotation
+            if parameter.kind is inspect.Parameter.VAR_POSITIONAL:
+                self.var_positional = (name, annotation)
+            elif parameter.kind is inspect.Parameter.VAR_KEYWORD:
+                self.var_keyword = annotation
+            if parameter.default is None:
+                none_defaults.append(name)
+        self.positional: typing.Tuple[typing.Tuple[str, typing.Any], ...] = tuple(
+            positional
+        )
+        # a parameter that defaults to None accepts None without running its codec
+        self.none_defaults: typing.FrozenSet[str] = frozenset(none_defaults)
+        self.returns: typing.Any = hints.get("return", signature.return_annotation)
+
+    def positional_for(
+        self, count: int
+    ) -> typing.Tuple[typing.Tuple[str, typing.Any], ...]:
+        """
+        The names and annotations for `count` positional arguments. Arguments past
+        the named parameters take the annotation of `*args`.
+        """
+        positional = self.positional
+        if count <= len(positional):
+            return positional
+        return positional + (self.var_positional,) * (count - len(positional))
+
+    def keyword(self, name: str) -> typing.Any:
+        """
+        The annotation for a keyword argument, or the annotation of `**kwargs`.
+        """
+        return self.keywords.get(name, self.var_keyword)
+
+
+def _get_type_hints(
+    fn: typing.Callable, signature: inspect.Signature
+) -> typing.Dict[str, typing.Any]:
+    """
+    Resolve string annotations. Functions without any are left alone so the
+    implicit `Optional` that older pythons add for `None` defaults isn't introduced.
+    """
+    annotations = [
+        parameter.annotation for parameter in signature.parameters.values()
+    ] + [signature.return_annotation]
+    if not any(isinstance(annotation, str) for annotation in annotations):
+        return {}
+    try:
+        return typing.get_type_hints(fn, include_extras=True)  # type: ignore
+    except TypeError:
+        # include_extras is only available on python 3.9+
+        return typing.get_type_hints(fn)
@@ -0,0 +1,106 @@
+import base64
+import typing
+
+from .serialization import OutOfBand
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore[assignment]
+
+# smaller buffers are packed in the body of typed-msgpack messages
+OUT_OF_BAND_BYTES = 1024
+
+Functions = typing.Tuple[
+    typing.Callable[[typing.Any], typing.Any], typing.Callable[[typing.Any], typing.Any]
+]
+
+
+def _b64dump(obj: typing.Any) -> str:
+    return base64.b64encode(obj).decode("ascii")
+
+
+def _native_dump(obj: typing.Any) -> typing.Any:
+    """
+    Leave a buffer for `typed-msgpack`, large ones as out-of-band frames that are
+    joined into the message without copying them into an intermediate string.
+    """
+    if memoryview(obj).nbytes >= OUT_OF_BAND_BYTES:
+        return OutOfBand(obj)
+    return obj
+
+
+def _raw(obj: typing.Any) -> typing.Any:
+    """
+    The buffer of a dumped value, base64 for json or the buffer typed-msgpack loaded.
+    """
+    if isinstance(obj, str):
+        return base64.b64decode(obj)
+    return obj
+
+
+def buffer_functions(annotation: type, native: bool) -> Functions:
+    """
+    The dump and load functions of `bytes`, `bytearray` and `memoryview`.
+
+    Loaded `memoryview`s are views of the received message, `bytes` and `bytearray`
+    values are copied out of it.
+    """
+    dump = _native_dump if native else _b64dump
+    if issubclass(annotation, memoryview):
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, memoryview):
+                return obj
+            return memoryview(_raw(obj))
+
+    elif issubclass(annotation, bytearray):
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, bytearray):
+                return obj
+            return bytearray(_raw(obj))
+
+    else:
+
+        def load(obj: typing.Any) -> typing.Any:
+            raw = _raw(obj)
+            if type(raw) is bytes:
+                return raw
+            return bytes(raw)
+
+    return dump, load
+
+
+def is_ndarray(annotation: typing.Any) -> bool:
+    """
+    Whether an annotation is `numpy.ndarray`, or eg. `numpy.typing.NDArray[...]`.
+    """
+    if numpy is None:
+        return False
+    cls = getattr(annotation, "__origin__", annotation)
+    return isinstance(cls, type) and issubclass(cls, numpy.ndarray)
+
+
+def ndarray_functions(native: bool) -> Functions:
+    """
+    The dump and load functions of `numpy.ndarray`. Arrays are sent as
+    `[dtype, shape, data]`, and loaded as read only arrays over the received data.
+    """
+    dump_data = _native_dump if native else _b64dump
+
+    def dump(obj: typing.Any) -> typing.Any:
+        # a copy only if the array isn't contiguous
+        array = numpy.asarray(obj, order="C")
+        if array.dtype.fields is not None or array.dtype.hasobject:
+            raise TypeError(f"Arrays of {array.dtype} can't be serialized")
+        data = array.reshape(-1).view(numpy.uint8).data
+        return [array.dtype.str, list(array.shape), dump_data(data)]
+
+    def load(obj: typing.Any) -> typing.Any:
+        if isinstance(obj, numpy.ndarray):
+            return obj
+        dtype, shape, data = obj
+        return numpy.frombuffer(_raw(data), dtype=dtype).reshape(shape)
+
+    return dump, load
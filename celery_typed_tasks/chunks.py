@@ -0,0 +1,97 @@
+import dataclasses
+import itertools
+import typing
+
+from kombu import serialization
+
+from .codecs import Codec
+from .codecs import _identity
+
+
+@dataclasses.dataclass(frozen=True)
+class Chunk:
+    """
+    Split a `List` parameter of a task across several messages.
+
+    `apply_async` publishes one task per chunk of at most `max_items` items and, if
+    set, at most `max_bytes` serialized bytes, and returns a single group result.
+
+    >>> @app.task(type_hint_chunk=Chunk("dogs", max_items=1000))
+    ... def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+    ...     ...
+    """
+
+    parameter: str
+    max_items: typing.Optional[int] = None
+    max_bytes: typing.Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if not self.max_items and not self.max_bytes:
+            raise ValueError("Chunk needs max_items or max_bytes")
+
+    def split(
+        self, values: typing.Iterable, codec: Codec, serializer: str
+    ) -> typing.Iterator[typing.List]:
+        """
+        Dump the items of a list codec chunk by chunk. At least one chunk is yielded,
+        even for an empty iterable.
+        """
+        item = _item_codec(codec)
+        if self.max_bytes:
+            chunks = self._split_bytes(values, item.dump, serializer)
+        else:
+            chunks = self._split_items(values, item.dump_many)
+
+        empty = True
+        for chunk in chunks:
+            empty = False
+            yield chunk
+        if empty:
+            yield []
+
+    def _split_items(
+        self, values: typing.Iterable, dump_many: typing.Callable
+    ) -> typing.Iterator[typing.List]:
+        iterator = iter(values)
+        while True:
+            batch = list(itertools.islice(iterator, self.max_items))
+            if not batch:
+                return
+            yield dump_many(batch)
+
+    def _split_bytes(
+        self, values: typing.Iterable, dump: typing.Callable, serializer: str
+    ) -> typing.Iterator[typing.List]:
+        max_bytes = typing.cast(int, self.max_bytes)
+        max_items = self.max_items
+        chunk: typing.List[typing.Any] = []
+        size = 0
+        for value in values:
+            dumped = dump(value)
+            # the item plus a separator, the list itself is ignored
+            item_size = len(serialization.dumps(dumped, serializer)[2]) + 1
+            if chunk and size + item_size > max_bytes:
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append(dumped)
+            size += item_size
+            if max_items and len(chunk) >= max_items:
+                yield chunk
+                chunk = []
+                size = 0
+        if chunk:
+            yield chunk
+
+
+def _item_codec(codec: Codec) -> Codec:
+    while codec.kind in ("lazy", "columnar"):
+        codec = codec.children[0]
+    if codec.kind != "list":
+        raise TypeError(
+            f"Only List parameters can be chunked, not {codec.annotation!r}"
+        )
+    if codec.children:
+        return codec.children[0]
+    # an untyped list
+    return Codec(typing.Any, _identity, _identity, "passthrough")
@@ -0,0 +1,379 @@
+"""
+The `celery_typed_tasks` command line tool.
+
+    celery_typed_tasks tasks proj.celery:app
+    celery_typed_tasks profile proj.celery:app messages.jsonl
+"""
+
+import argparse
+import base64
+import dataclasses
+import inspect
+import json
+import sys
+import time
+import typing
+
+from celery.app.utils import find_app
+from kombu import serialization
+
+from .codecs import Codec
+from .core import TypedTask
+from .fingerprint import _name
+from .metrics import _count_items
+
+# thresholds of the hints of `profile`
+COLUMNAR_BYTES = 10 * 1024
+OFFLOAD_BYTES = 1024 * 1024
+CHUNK_ITEMS = 10_000
+NATIVE_KINDS = frozenset(["datetime", "date", "time", "uuid", "decimal"])
+
+
+def load_app(name: str) -> typing.Any:
+    """
+    The celery app at `name`, eg. `proj.celery:app` or `proj`, with its tasks
+    imported.
+    """
+    app = find_app(name)
+    app.loader.import_default_modules()
+    return app
+
+
+def typed_tasks(app: typing.Any) -> typing.List[TypedTask]:
+    """
+    The tasks of `app` with type hint serialization, without celery's built in ones.
+    """
+    return sorted(
+        (
+            task
+            for task in app.tasks.values()
+            if isinstance(task, TypedTask)
+            and task.type_hint_serialization
+            and not task.name.startswith("celery.")
+        ),
+        key=lambda task: task.name,
+    )
+
+
+def codec_path(task: TypedTask, codec: Codec) -> str:
+    """
+    The branches an annotation compiled to, eg.
+    `list[dataclass example.Dog{name: passthrough, dob: datetime}]`.
+    """
+    kind = codec.kind
+    if kind == "custom":
+        if type(task).dump_obj is TypedTask.dump_obj:
+            # the default hooks return the value as it is
+            return "passthrough (no dump_obj)"
+        return "custom dump_obj"
+    elif kind == "dataclass":
+        names = [field.name for field in dataclasses.fields(codec.annotation)]
+        fields = ", ".join(
+            f"{name}: {codec_path(task, child)}"
+            for name, child in zip(names, codec.children)
+        )
+        return f"dataclass {_name(codec.annotation)}{{{fields}}}"
+    elif kind in ("registered", "pydantic", "enum"):
+        return f"{kind} {_name(codec.annotation)}"
+    elif codec.children:
+        children = ", ".join(codec_path(task, child) for child in codec.children)
+        return f"{kind}[{children}]"
+    return kind
+
+
+def describe_task(task: TypedTask) -> typing.Dict[str, typing.Any]:
+    binding = task._get_binding()
+    parameters = dict(binding.parameters)
+    parameters["return"] = binding.returns
+    described = {}
+    for name, annotation in parameters.items():
+        try:
+            if name == "return":
+                path = codec_path(task, task._get_return_codec())
+            else:
+                path = codec_path(task, _compiler(task).get_codec(annotation))
+        except Exception as exc:
+            path = f"error: {exc!r}"
+        described[name] = {"annotation": _annotation(annotation), "codec": path}
+    return {
+        "task": task.name,
+        "serializer": task.serializer or task.app.conf.task_serializer,
+        "parameters": described,
+    }
+
+
+def _annotation(annotation: typing.Any) -> str:
+    if annotation is inspect._empty:
+        return "-"
+    elif isinstance(annotation, type) and annotation.__module__ == "builtins":
+        return annotation.__qualname__
+    return _name(annotation)
+
+
+def _compiler(task: TypedTask) -> typing.Any:
+    if task._get_dump(None) == task._dump_native_obj:
+        return task._native_compiler
+    return task._compiler
+
+
+@dataclasses.dataclass
+class ParameterProfile:
+    """
+    The encoded sizes and decode times of one parameter over the replayed calls.
+    """
+
+    task: str
+    parameter: str
+    codec: str
+    calls: int = 0
+    errors: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+    max_items: int = 0
+    seconds: float = 0.0
+    hints: typing.List[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def mean_bytes(self) -> float:
+        return self.total_bytes / self.calls if self.calls else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+def read_messages(
+    lines: typing.Iterable[str],
+) -> typing.Iterator[typing.Tuple[str, typing.Sequence, typing.Dict, str]]:
+    """
+    The task name, args, kwargs and serializer of captured messages, one json
+    object per line. Either a kombu message as transports store it, eg. the lines
+    of `redis-cli --raw LRANGE celery 0 999`, or `{"task", "args", "kwargs"}`.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if "body" not in record:
+            yield (
+                record["task"],
+                record.get("args") or (),
+                record.get("kwargs") or {},
+                record.get("serializer", "json"),
+            )
+            continue
+        body = record["body"]
+        if record.get("properties", {}).get("body_encoding") == "base64":
+            body = base64.b64decode(body)
+        content_type = record["content-type"]
+        payload = serialization.loads(
+            body, content_type, record.get("content-encoding", "utf-8"), accept=None
+        )
+        # the stubs of kombu leave out the registry
+        serializer = serialization.registry.type_to_name[  # type: ignore[attr-defined]
+            content_type
+        ]
+        if isinstance(payload, dict):
+            # protocol 1
+            task_name, args, kwargs = (
+                payload["task"],
+                payload.get("args") or (),
+                payload.get("kwargs") or {},
+            )
+        else:
+            task_name, args, kwargs = record["headers"]["task"], payload[0], payload[1]
+        yield task_name, args, kwargs, serializer
+
+
+def profile(
+    app: typing.Any,
+    messages: typing.Iterable[typing.Tuple[str, typing.Sequence, typing.Dict, str]],
+) -> typing.List[ParameterProfile]:
+    """
+    Replay the arguments of captured messages through the codecs of their tasks.
+    """
+    profiles: typing.Dict[typing.Tuple[str, str], ParameterProfile] = {}
+    for task_name, args, kwargs, serializer in messages:
+        task = app.tasks.get(task_name)
+        if not isinstance(task, TypedTask):
+            continue
+        binding = task._get_binding()
+        arguments = [
+            (name, annotation, raw)
+            for (name, annotation), raw in zip(binding.positional_for(len(args)), args)
+        ]
+        arguments.extend(
+            (name, binding.keyword(name), raw) for name, raw in kwargs.items()
+        )
+        for name, annotation, raw in arguments:
+            key = (task.name, name)
+            report = profiles.get(key)
+            if report is None:
+                try:
+                    path = codec_path(task, _compiler(task).get_codec(annotation))
+                except Exception as exc:
+                    path = f"error: {exc!r}"
+                report = profiles[key] = ParameterProfile(task.name, name, path)
+            size = len(_encode(raw, serializer))
+            report.calls += 1
+            report.total_bytes += size
+            report.max_bytes = max(report.max_bytes, size)
+            report.max_items = max(report.max_items, _count_items([raw]))
+            start = time.perf_counter()
+            try:
+                task._load_obj(raw, annotation)
+            except Exception:
+                report.errors += 1
+            report.seconds += time.perf_counter() - start
+            if report.calls == 1:
+                report.hints = _hints(task, annotation, serializer)
+    for report in profiles.values():
+        report.hints = _size_hints(report) + report.hints
+    return sorted(profiles.values(), key=lambda report: report.seconds, reverse=True)
+
+
+def _encode(raw: typing.Any, serializer: str) -> bytes:
+    _, _, data = serialization.dumps(raw, serializer)
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return data
+
+
+def _hints(
+    task: TypedTask, annotation: typing.Any, serializer: str
+) -> typing.List[str]:
+    """
+    Hints from the codec of a parameter, before looking at the sizes.
+    """
+    try:
+        codec = _compiler(task).get_codec(annotation)
+    except Exception:
+        return []
+    hints = []
+    if serializer == "json" and _reaches(codec, NATIVE_KINDS):
+        hints.append("typed-msgpack: datetimes, UUIDs and Decimals travel as strings")
+    return hints
+
+
+def _size_hints(report: ParameterProfile) -> typing.List[str]:
+    hints = []
+    if report.max_bytes >= OFFLOAD_BYTES:
+        hints.append(f"offload: up to {_bytes(report.max_bytes)} per message")
+    if report.max_items >= CHUNK_ITEMS:
+        hints.append(f"chunk: up to {report.max_items} items per message")
+    if report.mean_bytes >= COLUMNAR_BYTES and report.codec.startswith(
+        "list[dataclass"
+    ):
+        hints.append("columnar: every row repeats the field names")
+    return hints
+
+
+def _reaches(codec: Codec, kinds: typing.AbstractSet[str]) -> bool:
+    if codec.kind in kinds:
+        return True
+    return any(_reaches(child, kinds) for child in codec.children)
+
+
+def _bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+def _print_tasks(tasks: typing.List[typing.Dict[str, typing.Any]]) -> None:
+    for task in tasks:
+        print(f"{task['task']} ({task['serializer']})")
+        for name, parameter in task["parameters"].items():
+            print(f"  {name}: {parameter['annotation']}")
+            print(f"    {parameter['codec']}")
+
+
+def _print_profile(reports: typing.List[ParameterProfile], top: int) -> None:
+    header = ("task", "parameter", "calls", "mean size", "max size", "mean decode")
+    rows = [
+        (
+            report.task,
+            report.parameter,
+            str(report.calls),
+            _bytes(report.mean_bytes),
+            _bytes(report.max_bytes),
+            f"{report.mean_seconds * 1000:.3f}ms",
+        )
+        for report in reports[:top]
+    ]
+    widths = [max(len(row[index]) for row in [header] + rows) for index in range(6)]
+    for row in [header] + rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    for report in reports[:top]:
+        if report.hints or report.errors:
+            print(f"\n{report.task}.{report.parameter}: {report.codec}")
+        if report.errors:
+            print(f"  {report.errors} of {report.calls} calls failed to decode")
+        for hint in report.hints:
+            print(f"  {hint}")
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="celery_typed_tasks",
+        description="Inspect the argument serialization of TypedTasks.",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    tasks = commands.add_parser(
+        "tasks", help="list every TypedTask and the codec of each parameter"
+    )
+    tasks.add_argument("app", help="the celery app, eg. proj.celery:app")
+    tasks.add_argument("--json", action="store_true", help="print json")
+
+    replay = commands.add_parser(
+        "profile",
+        help="replay captured messages and report sizes and decode times",
+    )
+    replay.add_argument("app", help="the celery app, eg. proj.celery:app")
+    replay.add_argument(
+        "messages",
+        nargs="+",
+        help="json lines files of captured messages, - for stdin",
+    )
+    replay.add_argument(
+        "--top", type=int, default=20, help="the slowest parameters to show"
+    )
+    replay.add_argument("--json", action="store_true", help="print json")
+
+    args = parser.parse_args(argv)
+    app = load_app(args.app)
+    if args.command == "tasks":
+        described = [describe_task(task) for task in typed_tasks(app)]
+        if args.json:
+            print(json.dumps(described, indent=2))
+        else:
+            _print_tasks(described)
+        return 0
+
+    reports = profile(app, _read_files(args.messages))
+    if args.json:
+        print(
+            json.dumps(
+                [dataclasses.asdict(report) for report in reports[: args.top]],
+                indent=2,
+            )
+        )
+    else:
+        _print_profile(reports, args.top)
+    return 0
+
+
+def _read_files(
+    paths: typing.Sequence[str],
+) -> typing.Iterator[typing.Tuple[str, typing.Sequence, typing.Dict, str]]:
+    for path in paths:
+        if path == "-":
+            yield from read_messages(sys.stdin)
+            continue
+        with open(path) as lines:
+            yield from read_messages(lines)
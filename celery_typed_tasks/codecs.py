@@ -0,0 +1,904 @@
+import datetime
+import decimal
+import enum
+import inspect
+import itertools
+import operator
+import threading
+import types
+import typing
+import uuid
+from dataclasses import MISSING
+from dataclasses import fields
+from dataclasses import is_dataclass
+
+from .adapters import adapter_functions
+from .adapters import is_adaptable
+from .buffers import buffer_functions
+from .buffers import is_ndarray
+from .buffers import ndarray_functions
+from .memo import memo_dump
+from .memo import memo_load
+from .memo import memo_value_dump
+from .references import reference_dump
+from .references import reference_load
+from .references import scope_dump
+from .references import scope_load
+
+_NoneType = type(None)
+# `int | None` on python 3.10+
+_UnionType = getattr(types, "UnionType", None)
+
+Dump = typing.Callable[[typing.Any], typing.Any]
+Load = typing.Callable[[typing.Any], typing.Any]
+ManyDump = typing.Callable[[typing.Iterable], typing.List]
+ManyLoad = typing.Callable[[typing.Iterable], typing.List]
+
+COLUMNS = "__columns__"
+
+# kinds and passthrough annotations whose values are immutable
+_IMMUTABLE_KINDS = frozenset(["uuid", "decimal", "datetime", "date", "time", "enum"])
+_IMMUTABLE = (_NoneType, None, bool, int, float, complex, str, bytes)
+
+
+class Codec:
+    """
+    A compiled dump and load pair for a single annotation.
+
+    `kind` names the branch the annotation compiled to and `children` holds the
+    codecs of any nested annotations, eg. the item codec of a `List[Dog]`.
+
+    `dump_many` and `load_many` convert a whole iterable of values into a list in
+    one pass. Scalar codecs provide specialized versions of them.
+    """
+
+    __slots__ = (
+        "annotation",
+        "dump",
+        "load",
+        "kind",
+        "children",
+        "dump_many",
+        "load_many",
+    )
+
+    def __init__(
+        self,
+        annotation: typing.Any,
+        dump: Dump,
+        load: Load,
+        kind: str,
+        children: typing.Tuple["Codec", ...] = (),
+        dump_many: typing.Optional[ManyDump] = None,
+        load_many: typing.Optional[ManyLoad] = None,
+    ) -> None:
+        self.annotation = annotation
+        self.dump = dump
+        self.load = load
+        self.kind = kind
+        self.children = children
+        self.dump_many = dump_many or _mapper(dump)
+        self.load_many = load_many or _mapper(load)
+
+    def __repr__(self) -> str:
+        return f"<Codec {self.kind} {self.annotation!r}>"
+
+
+class Marker:
+    """
+    Base class for `typing.Annotated` metadata that changes how an annotation
+    compiles, eg. `typing.Annotated[typing.List[Dog], Lazy()]`.
+    """
+
+    def apply(self, compiler: "Compiler", codec: Codec) -> Codec:
+        """
+        Return the codec to use in place of the compiled codec of the annotation.
+        """
+        raise NotImplementedError
+
+
+_isoformat = operator.methodcaller("isoformat")
+
+
+def _identity(obj: typing.Any) -> typing.Any:
+    return obj
+
+
+def _mapper(convert: Dump) -> ManyDump:
+    if convert is _identity:
+        return list
+
+    def many(values: typing.Iterable) -> typing.List:
+        return list(map(convert, values))
+
+    return many
+
+
+def _homogeneous_mapper(fast: Dump, slow: Dump) -> ManyDump:
+    """
+    Map a C function over the values, eg. `datetime.datetime.isoformat`, falling
+    back to `slow` when a value isn't of the type it expects.
+    """
+
+    def many(values: typing.Iterable) -> typing.List:
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = list(values)
+        try:
+            return list(map(fast, values))
+        except (TypeError, AttributeError):
+            # not homogeneous, eg. a date in a list of datetimes
+            return list(map(slow, values))
+
+    return many
+
+
+def _scalar(
+    annotation: typing.Any,
+    kind: str,
+    cls: type,
+    dump: Dump,
+    load: Load,
+    fast_dump: Dump,
+    native: bool,
+    trusted: bool = False,
+) -> Codec:
+    """
+    A codec for a scalar type with batch functions that skip per value dispatch.
+
+    Native codecs leave the value for a serializer that understands the type, eg.
+    `typed-msgpack`. Loading accepts both the raw and the native representation,
+    unless the codec is trusted to only see the representation it dumps.
+    """
+
+    def tolerant_load(obj: typing.Any) -> typing.Any:
+        if isinstance(obj, cls):
+            return obj
+        return load(obj)
+
+    if native and trusted:
+        return Codec(annotation, _identity, _identity, kind)
+    elif native:
+        return Codec(annotation, _identity, tolerant_load, kind)
+    elif trusted:
+        return Codec(
+            annotation,
+            dump,
+            load,
+            kind,
+            dump_many=_homogeneous_mapper(fast_dump, dump),
+            load_many=_mapper(load),
+        )
+    return Codec(
+        annotation,
+        dump,
+        tolerant_load,
+        kind,
+        dump_many=_homogeneous_mapper(fast_dump, dump),
+        load_many=_homogeneous_mapper(load, tolerant_load),
+    )
+
+
+class Compiler:
+    """
+    Compiles annotations into codecs once and caches them per annotation object.
+
+    Anything the built in branches do not understand compiles to a leaf that calls
+    the task's `dump_obj` and `load_obj` hooks.
+
+    A `native` compiler leaves datetimes, dates, times, UUIDs and Decimals for a
+    serializer that encodes them itself.
+
+    A `trusted` compiler loads payloads from producers with the same argument schema,
+    so its loads skip the checks for values that are already decoded.
+    """
+
+    def __init__(
+        self, task: typing.Any, native: bool = False, trusted: bool = False
+    ) -> None:
+        self.task = task
+        self.native = native
+        self.trusted = trusted
+        self._codecs: typing.Dict[typing.Any, Codec] = {}
+        self._compiling: typing.Set[typing.Any] = set()
+        # held while compiling, so other threads wait for a codec instead of getting
+        # the forward reference that's only meant for recursion in this thread
+        self._lock = threading.RLock()
+
+    def get_codec(self, annotation: typing.Any) -> Codec:
+        try:
+            return self._codecs[annotation]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable annotations still work, they just aren't cached
+            return self._scope(self.compile(annotation))
+
+        with self._lock:
+            codec = self._codecs.get(annotation)
+            if codec is not None:
+                # another thread compiled it while this one waited
+                return codec
+            if annotation in self._compiling:
+                # a recursive type refers to itself, eg. a dataclass with a
+                # `children: List["Node"]` field. Resolve the codec when it's called.
+                return self._forward(annotation)
+
+            self._compiling.add(annotation)
+            try:
+                codec = self._scope(self.compile(annotation))
+            finally:
+                self._compiling.discard(annotation)
+            self._codecs[annotation] = codec
+            return codec
+
+    def _scope(self, codec: Codec) -> Codec:
+        """
+        With `type_hint_references`, the outermost codec that can reach a dataclass
+        keeps the reference table of the value it converts.
+        """
+        if not self.task.type_hint_references or not _reaches_dataclass(codec):
+            return codec
+        return Codec(
+            codec.annotation,
+            scope_dump(codec.dump),
+            scope_load(codec.load),
+            codec.kind,
+            codec.children,
+        )
+
+    def _forward(self, annotation: typing.Any) -> Codec:
+        codecs = self._codecs
+
+        def dump(obj: typing.Any) -> typing.Any:
+            return codecs[annotation].dump(obj)
+
+        def load(obj: typing.Any) -> typing.Any:
+            return codecs[annotation].load(obj)
+
+        return Codec(annotation, dump, load, "forward")
+
+    def compile(self, annotation: typing.Any) -> Codec:
+        """
+        Build the codec for an annotation, compiling nested annotations as needed.
+        """
+        args = _get_args(annotation)
+        origin = _get_origin(annotation)
+        metadata = getattr(annotation, "__metadata__", None)
+        registered = None
+        if isinstance(annotation, type):
+            registered = self.task._get_registered_codec(annotation)
+        if metadata is not None:
+            # typing.Annotated[T, ...], markers in the metadata adjust the codec of T
+            codec = self.get_codec(origin)
+            for marker in metadata:
+                if isinstance(marker, Marker):
+                    codec = marker.apply(self, codec)
+            return codec
+        elif registered is not None:
+            return self._compile_registered(annotation, *registered)
+        elif self.task.type_hint_pydantic and is_adaptable(annotation):
+            # pydantic converts the whole tree in its compiled core
+            dump, load, dump_many, load_many = adapter_functions(annotation)
+            return Codec(annotation, dump, load, "pydantic", (), dump_many, load_many)
+        elif origin is typing.Union or (
+            _UnionType is not None and isinstance(annotation, _UnionType)
+        ):
+            return self._compile_union(annotation, args)
+        elif origin and origin in [list, set]:
+            return self._compile_collection(annotation, origin, args)
+        elif origin is dict:
+            return self._compile_dict(annotation, args)
+        elif origin is tuple:
+            return self._compile_tuple(annotation, args)
+        elif is_ndarray(annotation):
+            return Codec(annotation, *ndarray_functions(self.native), "ndarray")
+        elif annotation is None or annotation is typing.Any:
+            # eg. the return annotation of `def alert(...) -> None`
+            return Codec(annotation, _identity, _identity, "passthrough")
+        elif annotation is tuple:
+            return Codec(annotation, _identity, tuple, "tuple")
+        elif issubclass(annotation, enum.Enum):
+            return _enum(annotation)
+        elif issubclass(annotation, uuid.UUID):
+            return _scalar(
+                annotation,
+                "uuid",
+                uuid.UUID,
+                str,
+                uuid.UUID,
+                uuid.UUID.__str__,
+                self.native,
+                self.trusted,
+            )
+        elif issubclass(annotation, decimal.Decimal):
+            return _scalar(
+                annotation,
+                "decimal",
+                decimal.Decimal,
+                str,
+                decimal.Decimal,
+                decimal.Decimal.__str__,
+                self.native,
+                self.trusted,
+            )
+        elif issubclass(annotation, datetime.datetime):
+            return _scalar(
+                annotation,
+                "datetime",
+                datetime.datetime,
+                _isoformat,
+                datetime.datetime.fromisoformat,
+                datetime.datetime.isoformat,
+                self.native,
+                self.trusted,
+            )
+        elif issubclass(annotation, datetime.date):
+            return _scalar(
+                annotation,
+                "date",
+                datetime.date,
+                _isoformat,
+                datetime.date.fromisoformat,
+                datetime.date.isoformat,
+                self.native,
+                self.trusted,
+            )
+        elif issubclass(annotation, datetime.time):
+            return _scalar(
+                annotation,
+                "time",
+                datetime.time,
+                _isoformat,
+                datetime.time.fromisoformat,
+                datetime.time.isoformat,
+                self.native,
+                self.trusted,
+            )
+        elif issubclass(annotation, (bytes, bytearray, memoryview)):
+            return Codec(
+                annotation, *buffer_functions(annotation, self.native), "bytes"
+            )
+        elif issubclass(annotation, set):
+            return Codec(annotation, list, set, "set")
+        elif is_dataclass(annotation):
+            return self._compile_dataclass(annotation)
+        elif _is_typeddict(annotation):
+            return self._compile_typeddict(annotation)
+        elif issubclass(annotation, (dict, list, int, str, bool, float)):
+            # pass through normally json serializable structures
+            return Codec(annotation, _identity, _identity, "passthrough")
+        elif annotation is inspect._empty:
+            # if type hint serialization is enabled but the type hint is empty,
+            # pass the item through as is
+            return Codec(annotation, _identity, _identity, "passthrough")
+        else:
+            return self._compile_custom(annotation)
+
+    def _compile_collection(
+        self, annotation: typing.Any, origin: typing.Any, args: typing.Tuple
+    ) -> Codec:
+        arg = next(iter(args), None)
+        if not args or isinstance(arg, typing.TypeVar):
+            # The nested object has no type specified
+            # eg. obj: list or obj: typing.List
+            if origin is set:
+                return Codec(annotation, list, set, "set")
+            return Codec(annotation, _identity, list, "list")
+
+        # Each nested object could be a complex type itself that requires
+        # serialization. The item codec converts the whole collection in one pass.
+        item = self.get_codec(arg)
+        load: Load
+        if origin is set:
+            item_load = item.load
+
+            def load(obj: typing.Any) -> typing.Any:
+                return set(map(item_load, obj))
+
+        else:
+            load = item.load_many
+
+        codec = Codec(annotation, item.dump_many, load, origin.__name__, (item,))
+        if origin is list and self.task.type_hint_columnar:
+            return self.make_columnar(codec)
+        return codec
+
+    def make_columnar(self, codec: Codec) -> Codec:
+        """
+        Wrap the codec of a `List` of dataclasses so the list is sent as one list per
+        field, with the field names once. Other codecs are returned as they are.
+
+        Loading accepts both the columnar and the list of dicts representation.
+        """
+        if codec.kind != "list" or not codec.children:
+            return codec
+        item = codec.children[0]
+        table = FieldTable.get(item.annotation) if item.kind == "dataclass" else None
+        if table is None or not table.names:
+            return codec
+        cls = table.cls
+        names = table.names
+        get_values = table.get_values
+        column_dumps = tuple(child.dump_many for child in item.children)
+        column_loads = {
+            name: child.load_many for name, child in zip(names, item.children)
+        }
+        rows_load = codec.load
+        build = table.build if self.task.type_hint_skip_init else table.init
+        # rows in field order go straight to __init__, without a dict per instance
+        positional = not self.task.type_hint_skip_init and all(
+            field.init and not getattr(field, "kw_only", False) for field in fields(cls)
+        )
+
+        def dump(obj: typing.Any) -> typing.Any:
+            rows = obj if isinstance(obj, (list, tuple)) else list(obj)
+            if not rows:
+                return []
+            columns = zip(*map(get_values, rows))
+            return {
+                COLUMNS: {
+                    name: column_dump(column)
+                    for name, column_dump, column in zip(names, column_dumps, columns)
+                }
+            }
+
+        def load(obj: typing.Any) -> typing.Any:
+            if not isinstance(obj, dict):
+                return rows_load(obj)
+            columns = obj[COLUMNS]
+            keys = tuple(columns)
+            loaded = [column_loads[key](columns[key]) for key in keys]
+            if positional and keys == names:
+                return list(itertools.starmap(cls, zip(*loaded)))
+            return [build(dict(zip(keys, row))) for row in zip(*loaded)]
+
+        return Codec(codec.annotation, dump, load, "columnar", (codec,))
+
+    def _compile_union(self, annotation: typing.Any, args: typing.Tuple) -> Codec:
+        members = [arg for arg in args if arg is not _NoneType]
+        optional = len(members) != len(args)
+        codecs = tuple(self.get_codec(member) for member in members)
+        if all(codec.kind == "passthrough" for codec in codecs):
+            # eg. Union[int, str], the serializer handles every member as is
+            return Codec(annotation, _identity, _identity, "passthrough", codecs)
+        elif len(codecs) == 1:
+            # Optional[T]
+            return _optional(annotation, codecs[0])
+
+        # Each value is tagged with the index of its member, so loading doesn't have
+        # to try each member in turn.
+        classes = tuple(_runtime_class(member) for member in members)
+        dumps = tuple(codec.dump for codec in codecs)
+        loads = tuple(codec.load for codec in codecs)
+        indexes: typing.Dict[type, int] = {}
+
+        def index_of(cls: type) -> int:
+            if cls in classes:
+                return classes.index(cls)
+            for index, member_cls in enumerate(classes):
+                if issubclass(cls, member_cls):
+                    return index
+            # the numeric tower of PEP 484, an int is a float and both are complex
+            for tower, member_cls in ((int, float), ((int, float), complex)):
+                if issubclass(cls, tower) and member_cls in classes:
+                    return classes.index(member_cls)
+            raise TypeError(f"{cls!r} is not a member of {annotation!r}")
+
+        def dump(obj: typing.Any) -> typing.Any:
+            if obj is None and optional:
+                return obj
+            # __class__ instead of type() so lazy proxies dispatch on their class
+            cls = obj.__class__
+            index = indexes.get(cls)
+            if index is None:
+                index = indexes[cls] = index_of(cls)
+            return [index, dumps[index](obj)]
+
+        def load(obj: typing.Any) -> typing.Any:
+            if obj is None and optional:
+                return obj
+            index, value = obj
+            return loads[index](value)
+
+        return Codec(annotation, dump, load, "union", codecs)
+
+    def _compile_dict(self, annotation: typing.Any, args: typing.Tuple) -> Codec:
+        if len(args) != 2 or any(isinstance(arg, typing.TypeVar) for arg in args):
+            # eg. obj: typing.Dict
+            return Codec(annotation, _identity, _identity, "passthrough")
+        key, value = (self.get_codec(arg) for arg in args)
+
+        key_dump = key.dump if key.kind != "passthrough" else None
+        key_load = key.load if key.kind != "passthrough" else None
+        if args[0] in (int, float):
+            # json turns numeric keys into strings
+            key_load = _numeric_key(args[0])
+        value_dump = value.dump if value.kind != "passthrough" else None
+        value_load = value.load if value.kind != "passthrough" else None
+
+        if key_load is None and value_load is None and key_dump is None:
+            return Codec(annotation, _identity, _identity, "passthrough", (key, value))
+        return Codec(
+            annotation,
+            _dict_converter(key_dump, value_dump),
+            _dict_converter(key_load, value_load),
+            "dict",
+            (key, value),
+        )
+
+    def _compile_tuple(self, annotation: typing.Any, args: typing.Tuple) -> Codec:
+        if not args or args == ((),) or isinstance(args[0], typing.TypeVar):
+            # eg. obj: typing.Tuple or obj: typing.Tuple[()]
+            return Codec(annotation, _identity, tuple, "tuple")
+        elif len(args) == 2 and args[1] is Ellipsis:
+            # Tuple[T, ...]
+            item = self.get_codec(args[0])
+            item_load_many = item.load_many
+
+            def load_many(obj: typing.Any) -> typing.Any:
+                return tuple(item_load_many(obj))
+
+            return Codec(annotation, item.dump_many, load_many, "tuple", (item,))
+
+        codecs = tuple(self.get_codec(arg) for arg in args)
+        if all(codec.kind == "passthrough" for codec in codecs):
+            return Codec(annotation, _identity, tuple, "tuple", codecs)
+        dumps = tuple(codec.dump for codec in codecs)
+        loads = tuple(codec.load for codec in codecs)
+
+        def dump(obj: typing.Any) -> typing.Any:
+            return [convert(value) for convert, value in zip(dumps, obj)]
+
+        def load(obj: typing.Any) -> typing.Any:
+            return tuple(convert(value) for convert, value in zip(loads, obj))
+
+        memo = self.task._memo
+        if memo is not None and not self.task.type_hint_references:
+            # tuples are rebuilt between calls, they're cached by value. Not with
+            # references, a dump refers to the reference table of its own call.
+            # A loaded tuple is shared by every call with the same payload, so only
+            # tuples of immutable values are loaded once
+            immutable = all(_is_immutable(codec) for codec in codecs)
+            return Codec(
+                annotation,
+                memo_value_dump(memo.encode, (annotation, self.native), dump),
+                memo_load(memo.decode, annotation, load) if immutable else load,
+                "tuple",
+                codecs,
+            )
+        return Codec(annotation, dump, load, "tuple", codecs)
+
+    def _compile_typeddict(self, annotation: typing.Any) -> Codec:
+        hints = typing.get_type_hints(annotation)
+        codecs = {name: self.get_codec(hint) for name, hint in hints.items()}
+        # only the keys that need it are converted
+        dumps = {
+            name: codec.dump
+            for name, codec in codecs.items()
+            if codec.kind != "passthrough"
+        }
+        loads = {
+            name: codec.load
+            for name, codec in codecs.items()
+            if codec.kind != "passthrough"
+        }
+        if not dumps:
+            return Codec(
+                annotation, _identity, _identity, "passthrough", tuple(codecs.values())
+            )
+
+        def dump(obj: typing.Any) -> typing.Any:
+            return {
+                key: dumps[key](value) if key in dumps else value
+                for key, value in obj.items()
+            }
+
+        def load(obj: typing.Any) -> typing.Any:
+            return {
+                key: loads[key](value) if key in loads else value
+                for key, value in obj.items()
+            }
+
+        return Codec(annotation, dump, load, "typeddict", tuple(codecs.values()))
+
+    def _compile_dataclass(self, annotation: typing.Any) -> Codec:
+        # Each field could be a complex type itself that requires serialization
+        table = FieldTable.get(annotation)
+        codecs = tuple(self.get_codec(field_type) for field_type in table.types)
+        names = table.names
+        field_dumps = tuple(codec.dump for codec in codecs)
+        field_loads = {name: codec.load for name, codec in zip(names, codecs)}
+        get_values = table.get_values
+
+        def dump(obj: typing.Any) -> typing.Any:
+            return {
+                name: field_dump(value)
+                for name, field_dump, value in zip(names, field_dumps, get_values(obj))
+            }
+
+        build = table.build if self.task.type_hint_skip_init else table.init
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, annotation):
+                # eg. an eager chain hands over the decoded return value
+                return obj
+            return build({key: field_loads[key](value) for key, value in obj.items()})
+
+        if self.trusted:
+
+            def load(obj: typing.Any) -> typing.Any:
+                return build(
+                    {key: field_loads[key](value) for key, value in obj.items()}
+                )
+
+        memo = self.task._memo
+        if memo is not None and table.frozen and not self.task.type_hint_references:
+            # shared immutable instances are dumped once and loaded once
+            return Codec(
+                annotation,
+                memo_dump(memo.encode, (annotation, self.native), dump),
+                memo_load(memo.decode, annotation, load),
+                "dataclass",
+                codecs,
+            )
+        if self.task.type_hint_references:
+            # repeated instances are dumped once and loaded as the same object
+            return Codec(
+                annotation,
+                reference_dump(dump),
+                reference_load(load),
+                "dataclass",
+                codecs,
+            )
+        return Codec(annotation, dump, load, "dataclass", codecs)
+
+    def _compile_registered(
+        self,
+        annotation: typing.Any,
+        dump: Dump,
+        registered_load: typing.Callable[[typing.Any, typing.Any], typing.Any],
+    ) -> Codec:
+        # the load of a base class, eg. pydantic.BaseModel, builds the annotation
+        def load(obj: typing.Any) -> typing.Any:
+            return registered_load(obj, annotation)
+
+        return Codec(annotation, dump, load, "registered")
+
+    def _compile_custom(self, annotation: typing.Any) -> Codec:
+        # fall back to any custom serialization if defined
+        # or by default `dump_obj` and `load_obj` return the obj passed in
+        dump_obj = self.task.dump_obj
+        load_obj = self.task.load_obj
+
+        def dump(obj: typing.Any) -> typing.Any:
+            if obj is None:
+                return obj
+            return dump_obj(obj, annotation)
+
+        def load(obj: typing.Any) -> typing.Any:
+            if obj is None:
+                return obj
+            return load_obj(obj, annotation)
+
+        return Codec(annotation, dump, load, "custom")
+
+
+class FieldTable:
+    """
+    The fields of a dataclass resolved once per class: names, type hints, which
+    fields `__init__` takes, their defaults and whether instances are frozen.
+    """
+
+    __slots__ = (
+        "cls",
+        "names",
+        "types",
+        "init_names",
+        "defaults",
+        "get_values",
+        "frozen",
+    )
+
+    _tables: typing.Dict[type, "FieldTable"] = {}
+
+    def __init__(self, cls: type) -> None:
+        field_types = typing.get_type_hints(cls)
+        self.cls = cls
+        fields_ = fields(cls)
+        self.names = tuple(field.name for field in fields_)
+        self.types = tuple(field_types[name] for name in self.names)
+        self.init_names = frozenset(field.name for field in fields_ if field.init)
+        params = getattr(cls, "__dataclass_params__", None)
+        self.frozen = bool(params is not None and params.frozen)
+        self.defaults: typing.Dict[str, typing.Callable[[], typing.Any]] = {}
+        for field in fields_:
+            if field.default is not MISSING:
+                self.defaults[field.name] = _constant(field.default)
+            elif field.default_factory is not MISSING:
+                self.defaults[field.name] = field.default_factory
+        # read every field in one call, this works with and without __slots__
+        if len(self.names) == 1:
+            getter = operator.attrgetter(self.names[0])
+            self.get_values: typing.Callable[[typing.Any], typing.Tuple] = lambda obj: (
+                getter(obj),
+            )
+        elif self.names:
+            self.get_values = operator.attrgetter(*self.names)
+        else:
+            self.get_values = lambda obj: ()
+
+    @classmethod
+    def get(cls, dataclass: type) -> "FieldTable":
+        try:
+            return cls._tables[dataclass]
+        except KeyError:
+            table = cls._tables[dataclass] = cls(dataclass)
+            return table
+
+    def init(self, values: typing.Dict[str, typing.Any]) -> typing.Any:
+        """
+        Create an instance from its field values through `__init__`.
+        """
+        if len(self.init_names) != len(self.names):
+            # fields with init=False are set by the dataclass itself
+            init_names = self.init_names
+            values = {key: value for key, value in values.items() if key in init_names}
+        return self.cls(**values)
+
+    def build(self, values: typing.Dict[str, typing.Any]) -> typing.Any:
+        """
+        Create an instance from its field values without calling `__init__` or
+        `__post_init__`.
+        """
+        for name, default in self.defaults.items():
+            if name not in values:
+                values[name] = default()
+        obj: typing.Any = object.__new__(self.cls)
+        try:
+            obj.__dict__.update(values)
+        except AttributeError:
+            # dataclasses with __slots__ have no __dict__
+            for name, value in values.items():
+                object.__setattr__(obj, name, value)
+        return obj
+
+
+def _constant(value: typing.Any) -> typing.Callable[[], typing.Any]:
+    return lambda: value
+
+
+def _optional(annotation: typing.Any, codec: Codec) -> Codec:
+    codec_dump = codec.dump
+    codec_load = codec.load
+
+    def dump(obj: typing.Any) -> typing.Any:
+        if obj is None:
+            return obj
+        return codec_dump(obj)
+
+    def load(obj: typing.Any) -> typing.Any:
+        if obj is None:
+            return obj
+        return codec_load(obj)
+
+    return Codec(annotation, dump, load, "optional", (codec,))
+
+
+def _enum(annotation: typing.Any) -> Codec:
+    def load(obj: typing.Any) -> typing.Any:
+        if isinstance(obj, annotation):
+            return obj
+        return annotation(obj)
+
+    return Codec(annotation, operator.attrgetter("value"), load, "enum")
+
+
+def _numeric_key(cls: type) -> Load:
+    def load(obj: typing.Any) -> typing.Any:
+        if isinstance(obj, str):
+            return cls(obj)
+        return obj
+
+    return load
+
+
+def _dict_converter(
+    convert_key: typing.Optional[Dump], convert_value: typing.Optional[Dump]
+) -> Dump:
+    if convert_key is None and convert_value is None:
+        return _identity
+    elif convert_key is None:
+        value_convert = typing.cast(Dump, convert_value)
+
+        def convert(obj: typing.Any) -> typing.Any:
+            return {key: value_convert(value) for key, value in obj.items()}
+
+    elif convert_value is None:
+        key_convert = convert_key
+
+        def convert(obj: typing.Any) -> typing.Any:
+            return {key_convert(key): value for key, value in obj.items()}
+
+    else:
+        key_convert = convert_key
+        value_convert = convert_value
+
+        def convert(obj: typing.Any) -> typing.Any:
+            return {
+                key_convert(key): value_convert(value) for key, value in obj.items()
+            }
+
+    return convert
+
+
+def _reaches_dataclass(
+    codec: Codec, seen: typing.Optional[typing.Set[int]] = None
+) -> bool:
+    if codec.kind in ("dataclass", "forward"):
+        return True
+    seen = seen if seen is not None else set()
+    if id(codec) in seen:
+        return False
+    seen.add(id(codec))
+    return any(_reaches_dataclass(child, seen) for child in codec.children)
+
+
+def _is_immutable(codec: Codec) -> bool:
+    """
+    Whether the values of a codec are immutable: scalars, enums, frozen dataclasses
+    and tuples or unions of those.
+    """
+    kind = codec.kind
+    if kind in _IMMUTABLE_KINDS:
+        return True
+    elif kind == "passthrough":
+        return not codec.children and codec.annotation in _IMMUTABLE
+    elif kind == "dataclass":
+        return FieldTable.get(codec.annotation).frozen
+    elif kind in ("tuple", "optional", "union"):
+        return all(_is_immutable(child) for child in codec.children)
+    return False
+
+
+def _runtime_class(annotation: typing.Any) -> type:
+    """
+    The class that values of an annotation are instances of, eg. `list` for
+    `List[int]`.
+    """
+    while getattr(annotation, "__metadata__", None) is not None:
+        annotation = annotation.__origin__
+    cls = _get_origin(annotation) or annotation
+    if isinstance(cls, type):
+        if _is_typeddict(cls):
+            # TypedDicts don't support issubclass, their values are dicts
+            return dict
+        return cls
+    return object
+
+
+def _is_typeddict(annotation: typing.Any) -> bool:
+    return issubclass(annotation, dict) and hasattr(annotation, "__total__")
+
+
+def _get_origin(annotation: typing.Any) -> typing.Optional[typing.Any]:
+    """
+    https://docs.python.org/3.9/library/stdtypes.html?highlight=__origin__#genericalias.__origin__
+
+    All parameterized generics implement special read-only attributes.
+
+    >>> list[int].__origin__
+    <class 'list'>
+    """
+    return getattr(annotation, "__origin__", None)
+
+
+def _get_args(annotation: typing.Any) -> typing.Tuple:
+    """
+    https://docs.python.org/3.9/library/stdtypes.html?highlight=__origin__#genericalias.__args__
+
+    This attribute is a tuple (possibly of length 1) of generic types passed to the
+    original __class_getitem__() of the generic class:
+    >>> dict[str, list[int]].__args__
+    (<class 'str'>, list[int])
+    """
+    return getattr(annotation, "__args__", tuple())
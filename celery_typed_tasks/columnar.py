@@ -0,0 +1,19 @@
+import dataclasses
+
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import Marker
+
+
+@dataclasses.dataclass(frozen=True)
+class Columnar(Marker):
+    """
+    Send a `List` of dataclasses as one list per field instead of one dict per item.
+
+    >>> @app.task
+    ... def walk(dogs: typing.Annotated[typing.List[Dog], Columnar()]):
+    ...     ...
+    """
+
+    def apply(self, compiler: Compiler, codec: Codec) -> Codec:
+        return compiler.make_columnar(codec)
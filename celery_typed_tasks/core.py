@@ -1,44 +1,448 @@
-import datetime
-import decimal
+import asyncio
+import concurrent.futures
+import functools
 import inspect
 import typing
-import uuid
-from dataclasses import asdict
-from dataclasses import is_dataclass
 
 import celery
+from celery import signals
+from celery import states
 from celery.result import AsyncResult
+from celery.result import EagerResult
+from celery.result import GroupResult
+from celery.result import denied_join_result
+from celery.utils import uuid
+from celery.utils.log import get_logger
+
+from .aio import get_batcher
+from .aio import get_executor
+from .binding import Binding
+from .chunks import Chunk
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import Dump
+from .codecs import _get_args
+from .codecs import _get_origin
+from .dedupe import SHARED
+from .dedupe import GroupEncoder
+from .dedupe import GroupEncoders
+from .dedupe import shared_cache
+from .eager import COPY
+from .eager import EAGER_HEADER
+from .eager import MODES
+from .eager import ROUNDTRIP
+from .eager import VALIDATE
+from .eager import Copier
+from .eager import Validator
+from .fingerprint import FINGERPRINT_HEADER
+from .fingerprint import fingerprint
+from .fingerprint import get_header
+from .lazy import make_lazy
+from .memo import Memo
+from .metrics import DECODE
+from .metrics import ENCODE
+from .metrics import MetricsSink
+from .metrics import Recorder
+from .metrics import _count_items
+from .metrics import type_hint_schema_skew
+from .offload import BlobStore
+from .offload import collect_keys
+from .registry import CodecRegistry
+from .registry import RegisteredCodec
+from .registry import RegisteredLoad
+from .results import ChunkedGroupResult
+from .results import TypedAsyncResult
+from .results import TypedBackend
+from .results import TypedEagerResult
+from .serialization import TYPED_MSGPACK
+
+logger = get_logger(__name__)
 
 
 class TypedTask(celery.Task):
-    type_hint_serialization: bool
+    type_hint_serialization: typing.Union[bool, str]
+    type_hint_skip_init: bool
+    type_hint_lazy: bool
+    type_hint_columnar: bool
+    type_hint_references: bool
+    type_hint_eager: str
+    type_hint_memoize: typing.Union[bool, Memo]
+    type_hint_pydantic: bool
+    type_hint_chunk: typing.Optional[Chunk] = None
+    type_hint_blob_store: typing.Optional[BlobStore]
+    type_hint_blob_cleanup: bool
+    type_hint_dedupe: bool
+    type_hint_metrics: typing.Union[None, bool, MetricsSink]
+    type_hint_metrics_sample_rate: float
+    type_hint_metrics_size: bool
+    type_hint_fingerprint: bool
+    type_hint_async_executor: typing.Optional[concurrent.futures.Executor]
+    type_hint_async_inline_items: int
 
     def __init__(self, *args, **kwargs) -> None:  # type: ignore
         super().__init__(*args, **kwargs)
-        type_hint_serialization = getattr(self, "type_hint_serialization", None)
-        if type_hint_serialization is None:
-            self.type_hint_serialization = self.app.conf.get(
-                "task_type_hint_serialization", True
+        self._set_option("type_hint_serialization", True)
+        self._set_option("type_hint_skip_init", False)
+        self._set_option("type_hint_lazy", False)
+        self._set_option("type_hint_columnar", False)
+        self._set_option("type_hint_references", False)
+        self._set_option("type_hint_eager", ROUNDTRIP)
+        if self.type_hint_eager not in MODES:
+            raise ValueError(
+                f"type_hint_eager must be one of {MODES}, not {self.type_hint_eager!r}"
             )
+        self._set_option("type_hint_memoize", False)
+        self._set_option("type_hint_pydantic", True)
+        self._set_option("type_hint_blob_store", None)
+        self._set_option("type_hint_blob_cleanup", False)
+        self._set_option("type_hint_dedupe", False)
+        self._set_option("type_hint_metrics", None)
+        self._set_option("type_hint_metrics_sample_rate", 1.0)
+        self._set_option("type_hint_metrics_size", False)
+        self._set_option("type_hint_fingerprint", False)
+        self._set_option("type_hint_async_executor", None)
+        self._set_option("type_hint_async_inline_items", 1000)
+        if isinstance(self.type_hint_serialization, str):
+            # the name of a serializer, eg. "typed-msgpack"
+            self.serializer = self.type_hint_serialization
+        memo = self.type_hint_memoize
+        self._memo: typing.Optional[Memo] = None
+        if memo:
+            # True gives the task caches of its own
+            self._memo = memo if isinstance(memo, Memo) else Memo()
+        self._compiler = Compiler(self)
+        self._native_compiler = Compiler(self, native=True)
+        self._trusted_compiler = Compiler(self, trusted=True)
+        self._trusted_native_compiler = Compiler(self, native=True, trusted=True)
+        # keyed by whether the arguments were dumped for typed-msgpack
+        self._fingerprints: typing.Dict[bool, str] = {}
+        self._binding: typing.Optional[Binding] = None
+        self._return_codec: typing.Optional[Codec] = None
+        self._typed_backend: typing.Optional[TypedBackend] = None
+        self._lazy_codecs: typing.Dict[typing.Any, Codec] = {}
+        self._group_encoders = GroupEncoders()
+        self._recorder: typing.Optional[Recorder] = None
+        self._copier: typing.Optional[Copier] = None
+        self._validator: typing.Optional[Validator] = None
+        if self.type_hint_metrics:
+            # True only sends the signals
+            sink = self.type_hint_metrics
+            self._recorder = Recorder(
+                self,
+                sink if isinstance(sink, MetricsSink) else None,
+                self.type_hint_metrics_sample_rate,
+                self.type_hint_metrics_size,
+            )
+
+    def _set_option(self, name: str, default: typing.Any) -> None:
+        """
+        Options set on the task take precedence over the `task_<name>` app setting.
+        """
+        if getattr(self, name, None) is None:
+            setattr(self, name, self.app.conf.get(f"task_{name}", default))
+
+    @classmethod
+    def register_codec(cls, type_: type, dump: Dump, load: RegisteredLoad) -> None:
+        """
+        Register how tasks of this class, and of its subclasses, dump and load
+        `type_` and its subclasses.
 
-    def apply_async(self, args=None, kwargs=None, serializer=None, **options) -> AsyncResult:  # type: ignore
+        >>> MyTypedTask.register_codec(Money, str, lambda value, cls: cls.parse(value))
+        """
+        cls._get_codec_registry().register(type_, dump, load)
+
+    @classmethod
+    def _get_codec_registry(cls) -> CodecRegistry:
+        registry = cls.__dict__.get("_codec_registry")
+        if registry is None:
+            parent = None
+            for base in cls.__mro__[1:]:
+                if issubclass(base, TypedTask):
+                    parent = base._get_codec_registry()
+                    break
+            registry = CodecRegistry(parent=parent)
+            setattr(cls, "_codec_registry", registry)
+        return registry
+
+    def _get_registered_codec(self, cls: type) -> typing.Optional[RegisteredCodec]:
+        """
+        The codec registered for a class on the task class, or else on the app.
+        """
+        found = self._get_codec_registry().lookup(cls)
+        if found is None:
+            codecs = self.app.conf.get("task_type_hint_codecs")
+            if codecs is not None:
+                if not isinstance(codecs, CodecRegistry):
+                    # a plain {type: (dump, load)} setting
+                    codecs = self.app.conf.task_type_hint_codecs = CodecRegistry(codecs)
+                found = codecs.lookup(cls)
+        return found
+
+    def apply_async(self, args=None, kwargs=None, serializer=None, **options) -> typing.Union[AsyncResult, GroupResult]:  # type: ignore
+        if serializer is not None:
+            options["serializer"] = serializer
         if not self.type_hint_serialization:
             return super().apply_async(args=args, kwargs=kwargs, **options)
 
-        hinted_args = []
-        hinted_kwargs = {}
-        annotations = get_annotations(self.run)
-        if args:
-            args_annotations = list(annotations.values())[: len(args)]
-            for arg, annotation in zip(args, args_annotations):
-                hinted_args.append(self._dump_obj(arg, annotation))
-        if kwargs:
-            for key, value in kwargs.items():
-                hinted_kwargs[key] = self._dump_obj(value, annotations[key])
-        return super().apply_async(
-            args=tuple(hinted_args), kwargs=hinted_kwargs, **options
+        if (
+            self.type_hint_eager != ROUNDTRIP
+            and self.type_hint_chunk is None
+            and self.app.conf.task_always_eager
+        ):
+            return self._apply_eager(args, kwargs, options)
+        convert = self._get_dump(serializer)
+        if self.type_hint_fingerprint:
+            self._stamp_fingerprint(options, convert == self._dump_native_obj)
+        if self.type_hint_chunk is not None:
+            result = self._apply_chunked(args, kwargs, convert, serializer, options)
+            if result is not None:
+                return result
+        group_id = options.get("group_id")
+        if self.type_hint_dedupe and group_id is not None:
+            convert = self._get_group_encoder(group_id, convert).wrap(convert)
+        hinted_args, hinted_kwargs = self._hint_args(args, kwargs, convert)
+        return super().apply_async(args=hinted_args, kwargs=hinted_kwargs, **options)
+
+    def _apply_eager(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+        options: typing.Dict[str, typing.Any],
+    ) -> EagerResult:
+        """
+        Run an eager call on the arguments as they are, instead of dumping them
+        and loading them again. See `type_hint_eager`.
+        """
+        args, kwargs = self._eager_args(args, kwargs)
+        headers = dict(options.pop("headers", None) or {})
+        headers[EAGER_HEADER] = self.type_hint_eager
+        task_id = options.pop("task_id", None) or uuid()
+        with denied_join_result():
+            return self.apply(args, kwargs, task_id=task_id, headers=headers, **options)
+
+    def _eager_args(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+    ) -> typing.Tuple[typing.Tuple, typing.Dict[str, typing.Any]]:
+        mode = self.type_hint_eager
+        if mode == COPY:
+            if self._copier is None:
+                self._copier = Copier(self._compiler)
+            get = self._copier.get
+        elif mode == VALIDATE:
+            if self._validator is None:
+                self._validator = Validator(self._compiler)
+            get = self._validator.get
+        else:
+            return tuple(args or ()), dict(kwargs or {})
+        return self._convert_args(
+            args, kwargs, lambda obj, annotation: get(annotation)(obj)
         )
 
+    def _get_dump(
+        self, serializer: typing.Optional[str]
+    ) -> typing.Callable[[typing.Any, typing.Any], typing.Any]:
+        if (serializer or self.serializer) == TYPED_MSGPACK:
+            return self._dump_native_obj
+        return self._dump_obj
+
+    def _get_group_encoder(
+        self,
+        group_id: str,
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any],
+    ) -> GroupEncoder:
+        serializer = TYPED_MSGPACK if convert == self._dump_native_obj else "json"
+        return self._group_encoders.get(
+            group_id, self.type_hint_blob_store, serializer, "zlib"
+        )
+
+    def _get_fingerprint(self, native: bool) -> str:
+        value = self._fingerprints.get(native)
+        if value is None:
+            compiler = self._native_compiler if native else self._compiler
+            value = self._fingerprints[native] = fingerprint(
+                self._get_binding(), compiler
+            )
+        return value
+
+    def _stamp_fingerprint(
+        self, options: typing.Dict[str, typing.Any], native: bool
+    ) -> None:
+        """
+        Send the schema fingerprint of the arguments in the message headers.
+        """
+        headers = dict(options.get("headers") or {})
+        headers[FINGERPRINT_HEADER] = self._get_fingerprint(native)
+        options["headers"] = headers
+
+    def apply_async_many(
+        self,
+        calls: typing.Iterable[
+            typing.Tuple[
+                typing.Optional[typing.Sequence],
+                typing.Optional[typing.Mapping[str, typing.Any]],
+            ]
+        ],
+        executor: typing.Optional[concurrent.futures.Executor] = None,
+        **options: typing.Any,
+    ) -> typing.List[typing.Union[AsyncResult, GroupResult]]:
+        """
+        Enqueue many calls of this task, given as `(args, kwargs)` pairs, and return
+        their results in order.
+
+        The arguments are dumped with one shared binding, in `executor` when given,
+        and every message is published over a single acquired producer.
+        """
+        calls = list(calls)
+        if self.type_hint_chunk is not None:
+            return [self.apply_async(args, kwargs, **options) for args, kwargs in calls]
+
+        if not self.type_hint_serialization:
+            hinted = calls
+        else:
+            convert = self._get_dump(options.get("serializer"))
+            if self.type_hint_fingerprint:
+                self._stamp_fingerprint(options, convert == self._dump_native_obj)
+            hint = functools.partial(self._hint_call, convert=convert)
+            if executor is None:
+                hinted = list(map(hint, calls))
+            else:
+                hinted = list(executor.map(hint, calls))
+
+        apply_async: typing.Callable[..., AsyncResult] = super().apply_async
+        with self.app.producer_or_acquire(options.pop("producer", None)) as producer:
+            return [
+                apply_async(args=args, kwargs=kwargs, producer=producer, **options)
+                for args, kwargs in hinted
+            ]
+
+    async def apply_async_async(
+        self,
+        args: typing.Optional[typing.Sequence] = None,
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]] = None,
+        **options: typing.Any,
+    ) -> typing.Union[AsyncResult, GroupResult]:
+        """
+        Like `apply_async`, without blocking the running event loop.
+
+        Arguments with fewer than `type_hint_async_inline_items` items are dumped on
+        the loop, larger ones in `type_hint_async_executor`. Messages are published
+        from a worker thread, and concurrent enqueues share one acquired producer.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.type_hint_async_executor or get_executor()
+        if self.type_hint_chunk is not None or options.get("producer") is not None:
+            # publishes on its own
+            return await loop.run_in_executor(
+                executor, functools.partial(self.apply_async, args, kwargs, **options)
+            )
+
+        hinted_args: typing.Optional[typing.Sequence] = args
+        hinted_kwargs: typing.Optional[typing.Mapping[str, typing.Any]] = kwargs
+        if self.type_hint_serialization:
+            convert = self._get_dump(options.get("serializer"))
+            if self.type_hint_fingerprint:
+                self._stamp_fingerprint(options, convert == self._dump_native_obj)
+            group_id = options.get("group_id")
+            if self.type_hint_dedupe and group_id is not None:
+                convert = self._get_group_encoder(group_id, convert).wrap(convert)
+            items = _count_items(args or ()) + _count_items((kwargs or {}).values())
+            if items < self.type_hint_async_inline_items:
+                hinted_args, hinted_kwargs = self._hint_args(args, kwargs, convert)
+            else:
+                hinted_args, hinted_kwargs = await loop.run_in_executor(
+                    executor, self._hint_args, args, kwargs, convert
+                )
+        publish = functools.partial(self._publish, hinted_args, hinted_kwargs, options)
+        return await get_batcher().publish(self.app, publish)
+
+    async def adelay(
+        self, *args: typing.Any, **kwargs: typing.Any
+    ) -> typing.Union[AsyncResult, GroupResult]:
+        """
+        Like `delay`, without blocking the running event loop.
+        """
+        return await self.apply_async_async(args, kwargs)
+
+    def _publish(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+        options: typing.Dict[str, typing.Any],
+        producer: typing.Any,
+    ) -> AsyncResult:
+        """
+        Publish already dumped arguments.
+        """
+        apply_async: typing.Callable[..., AsyncResult] = super().apply_async
+        return apply_async(args=args, kwargs=kwargs, producer=producer, **options)
+
+    def _hint_call(
+        self,
+        call: typing.Tuple[
+            typing.Optional[typing.Sequence],
+            typing.Optional[typing.Mapping[str, typing.Any]],
+        ],
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any],
+    ) -> typing.Tuple[typing.Tuple, typing.Dict[str, typing.Any]]:
+        args, kwargs = call
+        return self._hint_args(args, kwargs, convert)
+
+    def _apply_chunked(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any],
+        serializer: typing.Optional[str],
+        options: typing.Dict[str, typing.Any],
+    ) -> typing.Optional[ChunkedGroupResult]:
+        """
+        Publish one task per chunk of the `type_hint_chunk` parameter, in a group.
+
+        The chunked iterable is dumped chunk by chunk, so the full encoded list is
+        never held in memory. Returns None when the parameter wasn't passed.
+        """
+        chunk = typing.cast(Chunk, self.type_hint_chunk)
+        name = chunk.parameter
+        binding = self._get_binding()
+        args = list(args or ())
+        kwargs = dict(kwargs or {})
+        names = [parameter for parameter, _ in binding.positional_for(len(args))]
+        index = names.index(name) if name in names[: len(args)] else None
+        if index is not None:
+            values, args[index] = args[index], []
+        else:
+            values = kwargs.get(name)
+            kwargs[name] = []
+        if values is None:
+            return None
+
+        # the other arguments are dumped once and shared by every chunk
+        hinted_args, hinted_kwargs = self._hint_args(args, kwargs, convert)
+        hinted_args_list = list(hinted_args)
+        if convert == self._dump_native_obj:
+            compiler = self._native_compiler
+        else:
+            compiler = self._compiler
+        codec = compiler.get_codec(binding.parameters[name])
+        group_id = options.pop("group_id", None) or uuid()
+        results = []
+        for part in chunk.split(values, codec, serializer or self.serializer):
+            if index is not None:
+                hinted_args_list[index] = part
+            else:
+                hinted_kwargs[name] = part
+            results.append(
+                super().apply_async(
+                    args=tuple(hinted_args_list),
+                    kwargs=dict(hinted_kwargs),
+                    group_id=group_id,  # type: ignore[call-arg]
+                    **options,
+                )
+            )
+        return ChunkedGroupResult(group_id, results, app=self.app)
+
     def dump_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
         """
         Hook method for custom serialization
@@ -49,51 +453,14 @@ class TypedTask(celery.Task):
         """
         Coerce an object into its raw serialized representation using its annotation.
         """
-        args = _get_args(annotation)
-        origin = _get_origin(annotation)
-        if origin and origin in [list, set]:
-            # Each nested object could be a complex type itself that requires serialization
-            arg = next(iter(args), None)
-            if not args or isinstance(arg, typing.TypeVar):
-                # The nested object has no type specified
-                # eg. obj: list or obj: typing.List
-                if origin is set:
-                    return list(obj)
-                return obj
-            return [self._dump_obj(item, args[0]) for item in obj]
-        elif issubclass(annotation, uuid.UUID):
-            return str(obj)
-        elif issubclass(annotation, decimal.Decimal):
-            return str(obj)
-        elif issubclass(annotation, datetime.datetime):
-            return obj.isoformat()
-        elif issubclass(annotation, datetime.date):
-            return obj.isoformat()
-        elif issubclass(annotation, datetime.time):
-            return obj.isoformat()
-        elif issubclass(annotation, set):
-            return list(obj)
-        elif is_dataclass(annotation):
-            # Each field could be a complex type itself that requires serialization
-            field_types = typing.get_type_hints(annotation)
-            return {
-                key: self._dump_obj(value, field_types[key])
-                for key, value in asdict(obj).items()
-            }
-        elif issubclass(annotation, (dict, list, int, str, bool, float)):
-            # pass through normally json serializable structures
-            return obj
-        elif annotation is inspect._empty:
-            # if type hint serialization is enabled but the type hint is empty,
-            # pass the item through as is
-            return obj
-        elif obj is None:
-            # pass through normally json serializable structures
-            return obj
-        else:
-            # fall back to any custom serialization if defined
-            # or by default `dump_obj` returns the obj passed in
-            return self.dump_obj(obj, annotation)
+        return self._compiler.get_codec(annotation).dump(obj)
+
+    def _dump_native_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        """
+        Like `_dump_obj`, but leaves types the `typed-msgpack` serializer encodes
+        natively as they are.
+        """
+        return self._native_compiler.get_codec(annotation).dump(obj)
 
     def load_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
         """
@@ -105,94 +472,263 @@ class TypedTask(celery.Task):
         """
         Coerce a raw object to the object type via its type annotation.
         """
-        args = _get_args(annotation)
-        origin = _get_origin(annotation)
-        if origin and origin in [list, set]:
-            # Each nested object could be a complex type itself that requires deserialization
-            arg = next(iter(args), None)
-            if isinstance(arg, typing.TypeVar) or arg is None:
-                # The nested object has no type specified
-                # eg. obj: list or obj: typing.List
-                objs = obj
-            else:
-                objs = (self._load_obj(item, annotation.__args__[0]) for item in obj)
-            if annotation.__origin__ == list:
-                return list(objs)
-            else:
-                return set(objs)
-        elif issubclass(annotation, uuid.UUID):
-            return uuid.UUID(obj)
-        elif issubclass(annotation, decimal.Decimal):
-            return decimal.Decimal(obj)
-        elif issubclass(annotation, datetime.datetime):
-            return datetime.datetime.fromisoformat(obj)
-        elif issubclass(annotation, datetime.date):
-            return datetime.date.fromisoformat(obj)
-        elif issubclass(annotation, datetime.time):
-            return datetime.time.fromisoformat(obj)
-        elif issubclass(annotation, set):
-            return set(obj)
-        elif is_dataclass(annotation):
-            # Each field could be a complex type itself that requires deserialization
-            field_types = typing.get_type_hints(annotation)
-            return annotation(
-                **{
-                    key: self._load_obj(value, field_types[key])
-                    for key, value in obj.items()
-                }
+        return self._compiler.get_codec(annotation).load(obj)
+
+    def _load_lazy_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        """
+        Like `_load_obj`, but lists and dataclasses decode on access.
+        """
+        codec = self._lazy_codecs.get(annotation)
+        if codec is None:
+            codec = self._lazy_codecs[annotation] = make_lazy(
+                self._compiler, self._compiler.get_codec(annotation)
             )
-        elif issubclass(annotation, (dict, list, int, str, bool, float)):
-            # pass through normally json serializable structures
-            return obj
-        elif annotation is inspect._empty:
-            # if type hint serialization is enabled but the type hint is empty,
-            # pass the item through as is
-            return obj
-        elif obj is None:
-            # pass through normally json serializable structures
-            return obj
-        else:
-            # fall back to any custom serialization if defined
-            # or by default `load_obj` returns the obj passed in
-            return self.load_obj(obj, annotation)
+        return codec.load(obj)
+
+    def _load_shared_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        """
+        Like `_load_obj`, but loads shared group arguments once per process.
+        """
+        load = self._load_lazy_obj if self.type_hint_lazy else self._load_obj
+        if isinstance(obj, dict) and SHARED in obj:
+            store = typing.cast(BlobStore, self.type_hint_blob_store)
+            return shared_cache.load(store, obj, annotation, load)
+        return load(obj, annotation)
+
+    def _load_trusted_obj(self, obj: typing.Any, annotation: typing.Any) -> typing.Any:
+        """
+        Like `_load_obj`, for arguments dumped with the same schema. Values are
+        assumed to be what the codecs dumped and aren't validated again.
+        """
+        return self._trusted_compiler.get_codec(annotation).load(obj)
+
+    def _load_trusted_native_obj(
+        self, obj: typing.Any, annotation: typing.Any
+    ) -> typing.Any:
+        return self._trusted_native_compiler.get_codec(annotation).load(obj)
+
+    def _get_fingerprinted_load(
+        self,
+    ) -> typing.Callable[[typing.Any, typing.Any], typing.Any]:
+        """
+        The load of the current request by its schema fingerprint. Requests from
+        producers with another schema, or without a fingerprint, take the validating
+        `_load_obj`.
+        """
+        received = get_header(self.request)
+        if received is None:
+            return self._load_obj
+        if received == self._get_fingerprint(False):
+            return self._load_trusted_obj
+        if received == self._get_fingerprint(True):
+            return self._load_trusted_native_obj
+        expected = self._get_fingerprint(False)
+        logger.warning(
+            "Schema fingerprint %s of %s doesn't match %s, validating arguments",
+            received,
+            self.name,
+            expected,
+        )
+        if self._recorder is not None and self._recorder.sink is not None:
+            self._recorder.sink.record_skew(self.name, received)
+        type_hint_schema_skew.send(sender=self, received=received, expected=expected)
+        return self._load_obj
 
     def __call__(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
         if not self.type_hint_serialization:
             return super().__call__(*args, **kwargs)
 
-        hinted_args = []
-        hinted_kwargs = {}
-        annotations = get_annotations(self.run)
-        args_annotations = list(annotations.values())[: len(args)]
-        for arg, annotation in zip(args, args_annotations):
-            hinted_args.append(self._load_obj(arg, annotation))
-        for key, value in kwargs.items():
-            hinted_kwargs[key] = self._load_obj(value, annotations[key])
-        return super().__call__(*hinted_args, **hinted_kwargs)
+        if self.type_hint_eager != ROUNDTRIP:
+            request = self.request
+            if request.called_directly:
+                # a local call, like an eager one without a result
+                args, kwargs = self._eager_args(args, kwargs)
+                return self._run(args, kwargs)
+            if request.is_eager and EAGER_HEADER in (request.headers or {}):
+                # `_apply_eager` prepared the arguments already
+                return self._run(args, kwargs)
 
+        store = self.type_hint_blob_store
+        if store is not None and self.type_hint_blob_cleanup:
+            with collect_keys() as keys:
+                retval = self._call(args, kwargs)
+            # the task succeeded, its offloaded arguments aren't needed anymore
+            for key in keys:
+                store.delete(key)
+        else:
+            retval = self._call(args, kwargs)
+        # chains and callbacks get the return value as it is, `backend` dumps it
+        # for the result backend
+        return retval
 
-def _get_origin(annotation: typing.Any) -> typing.Optional[typing.Any]:
-    """
-    https://docs.python.org/3.9/library/stdtypes.html?highlight=__origin__#genericalias.__origin__
+    def _call(
+        self, args: typing.Sequence, kwargs: typing.Mapping[str, typing.Any]
+    ) -> typing.Any:
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any]
+        if self.type_hint_dedupe and self.type_hint_blob_store is not None:
+            convert = self._load_shared_obj
+        elif self.type_hint_lazy:
+            convert = self._load_lazy_obj
+        elif self.type_hint_fingerprint:
+            convert = self._get_fingerprinted_load()
+        else:
+            convert = self._load_obj
+        hinted_args, hinted_kwargs = self._hint_args(args, kwargs, convert, DECODE)
+        return self._run(hinted_args, hinted_kwargs)
 
-    All parameterized generics implement special read-only attributes.
+    def _run(
+        self, args: typing.Sequence, kwargs: typing.Mapping[str, typing.Any]
+    ) -> typing.Any:
+        """
+        Call the task body with loaded arguments.
+        """
+        return super().__call__(*args, **kwargs)
 
-    >>> list[int].__origin__
-    <class 'list'>
-    """
-    return getattr(annotation, "__origin__", None)
+    @property
+    def backend(self) -> typing.Any:
+        backend = self._backend
+        if backend is None:
+            backend = self.app.backend
+        if not self.type_hint_serialization:
+            return backend
+        typed = self._typed_backend
+        if typed is None or typed.backend is not backend:
+            # the app's backend is per thread
+            typed = self._typed_backend = TypedBackend(self, backend)
+        return typed
 
+    @backend.setter
+    def backend(self, value: typing.Any) -> None:
+        self._backend = value
 
-def _get_args(annotation: typing.Any) -> typing.Tuple:
-    """
-    https://docs.python.org/3.9/library/stdtypes.html?highlight=__origin__#genericalias.__args__
+    def AsyncResult(self, task_id: str, **kwargs: typing.Any) -> AsyncResult:
+        if not self.type_hint_serialization:
+            return super().AsyncResult(task_id, **kwargs)
+        return TypedAsyncResult(
+            task_id,
+            backend=self.backend.backend,
+            task_name=self.name,
+            app=self.app,
+            **kwargs,
+        )
 
-    This attribute is a tuple (possibly of length 1) of generic types passed to the
-    original __class_getitem__() of the generic class:
-    >>> dict[str, list[int]].__args__
-    (<class 'str'>, list[int])
-    """
-    return getattr(annotation, "__args__", tuple())
+    def apply(self, *args: typing.Any, **kwargs: typing.Any) -> EagerResult:
+        result = super().apply(*args, **kwargs)
+        if not self.type_hint_serialization or isinstance(result, TypedEagerResult):
+            return result
+        typed = TypedEagerResult.from_result(result, self)
+        if typed.state == states.SUCCESS:
+            if EAGER_HEADER in (kwargs.get("headers") or {}):
+                # the return value is never dumped either, see `_apply_eager`
+                typed._decoded = result.result
+            else:
+                # hold the return value as the result backend would
+                typed._result = self._dump_return(result.result)
+        return typed
+
+    def _get_return_codec(self) -> Codec:
+        codec = self._return_codec
+        if codec is None:
+            annotation = self._get_binding().returns
+            if self.app.conf.result_serializer == TYPED_MSGPACK:
+                compiler = self._native_compiler
+            else:
+                compiler = self._compiler
+            try:
+                codec = compiler.get_codec(annotation)
+            except TypeError:
+                # return values weren't serialized before, so annotations that don't
+                # compile, eg. typing.Any, pass the value through
+                codec = compiler.get_codec(inspect._empty)
+            self._return_codec = codec
+        return codec
+
+    def _dump_return(self, retval: typing.Any) -> typing.Any:
+        if retval is None:
+            return retval
+        return self._get_return_codec().dump(retval)
+
+    def _load_return(self, retval: typing.Any) -> typing.Any:
+        if retval is None:
+            return retval
+        return self._get_return_codec().load(retval)
+
+    def _load_returns(self, retvals: typing.List) -> typing.List:
+        """
+        Decode many return values of this task in one pass.
+        """
+        if None in retvals:
+            return [self._load_return(retval) for retval in retvals]
+        return self._get_return_codec().load_many(retvals)
+
+    def _hint_args(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any],
+        direction: str = ENCODE,
+    ) -> typing.Tuple[typing.Tuple, typing.Dict[str, typing.Any]]:
+        """
+        Run `convert` over every argument with the annotation of its parameter.
+        """
+        recorder = self._recorder
+        if recorder is not None and recorder.sample():
+            return recorder.measure(
+                direction,
+                lambda: self._convert_args(args, kwargs, convert),
+                args,
+                kwargs,
+            )
+        return self._convert_args(args, kwargs, convert)
+
+    def _convert_args(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+        convert: typing.Callable[[typing.Any, typing.Any], typing.Any],
+    ) -> typing.Tuple[typing.Tuple, typing.Dict[str, typing.Any]]:
+        binding = self._get_binding()
+        none_defaults = binding.none_defaults
+        hinted_args: typing.List[typing.Any] = []
+        hinted_kwargs: typing.Dict[str, typing.Any] = {}
+        if args:
+            for arg, (name, annotation) in zip(args, binding.positional_for(len(args))):
+                if arg is None and name in none_defaults:
+                    hinted_args.append(arg)
+                else:
+                    hinted_args.append(convert(arg, annotation))
+        if kwargs:
+            for key, value in kwargs.items():
+                if value is None and key in none_defaults:
+                    hinted_kwargs[key] = value
+                else:
+                    hinted_kwargs[key] = convert(value, binding.keyword(key))
+        return tuple(hinted_args), hinted_kwargs
+
+    def _get_binding(self) -> Binding:
+        binding = self._binding
+        if binding is None:
+            binding = self._binding = Binding(self.run)
+        return binding
+
+    def warm(self) -> None:
+        """
+        Build the signature binding and compile the codec of every parameter ahead of
+        the first call.
+        """
+        binding = self._get_binding()
+        compilers = [self._compiler]
+        if self.serializer == TYPED_MSGPACK:
+            compilers.append(self._native_compiler)
+        for annotation in binding.parameters.values():
+            try:
+                for compiler in compilers:
+                    compiler.get_codec(annotation)
+            except Exception:
+                # annotations that can't compile raise on the first call instead
+                logger.debug(
+                    "Could not compile %r for %s", annotation, self.name, exc_info=True
+                )
 
 
 def get_annotations(fn: typing.Callable) -> typing.Dict[str, typing.Any]:
@@ -200,3 +736,19 @@ def get_annotations(fn: typing.Callable) -> typing.Dict[str, typing.Any]:
     for key, value in inspect.signature(fn).parameters.items():
         annotations[key] = value.annotation
     return annotations
+
+
+@signals.worker_init.connect
+def warm_typed_tasks(sender: typing.Any = None, **kwargs: typing.Any) -> None:
+    """
+    Warm every `TypedTask` before a prefork pool forks, so the children share the
+    bindings and compiled codecs copy on write.
+
+    Set `task_type_hint_lazy_binding` to build them on first use instead.
+    """
+    app = sender.app
+    if app.conf.get("task_type_hint_lazy_binding", False):
+        return
+    for task in app.tasks.values():
+        if isinstance(task, TypedTask) and task.type_hint_serialization:
+            task.warm()
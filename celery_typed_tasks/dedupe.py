@@ -0,0 +1,165 @@
+import collections
+import threading
+import typing
+
+from .offload import BlobStore
+from .offload import read_blob
+from .offload import write_blob
+
+SHARED = "__shared__"
+
+Convert = typing.Callable[[typing.Any, typing.Any], typing.Any]
+
+# types that are cheaper to send again than to look up
+_SCALARS = (type(None), bool, int, float, str)
+# the objects a `GroupEncoder` remembers
+MAX_ENTRIES = 1024
+_UNSEEN = object()
+
+# an argument object and its dumped value, `_UNSEEN` until it repeats
+Entry = typing.Tuple[typing.Any, typing.Any]
+
+
+class GroupEncoder:
+    """
+    Dump each repeated argument object once per group.
+
+    Canvas groups call `apply_async` once per signature with the group's id. The
+    first time an object is seen in a group it's sent inline and only the object is
+    remembered, not its dumped value. When the same object shows up again its value
+    is dumped once more and, with a blob store, written to it, and the following
+    messages carry a reference. Without a store the dumped value is reused inline.
+
+    At most `max_entries` objects are remembered, least recently seen first, so a
+    group of many distinct arguments doesn't keep them all alive.
+    """
+
+    def __init__(
+        self,
+        group_id: str,
+        store: typing.Optional[BlobStore],
+        serializer: str,
+        compression: typing.Optional[str],
+        max_entries: int = MAX_ENTRIES,
+    ) -> None:
+        self.group_id = group_id
+        self.store = store
+        self.serializer = serializer
+        self.compression = compression
+        self.max_entries = max_entries
+        # keyed by id(), the object is kept alive so its id isn't reused
+        self._seen: "collections.OrderedDict[typing.Tuple[int, typing.Any], Entry]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def wrap(self, convert: Convert) -> Convert:
+        seen = self._seen
+        lock = self._lock
+
+        def dedupe(obj: typing.Any, annotation: typing.Any) -> typing.Any:
+            if isinstance(obj, _SCALARS):
+                return convert(obj, annotation)
+            key = (id(obj), annotation)
+            with lock:
+                entry = seen.get(key)
+                if entry is None:
+                    seen[key] = (obj, _UNSEEN)
+                    while len(seen) > self.max_entries:
+                        seen.popitem(last=False)
+                else:
+                    seen.move_to_end(key)
+            if entry is None:
+                return convert(obj, annotation)
+            value = entry[1]
+            if value is not _UNSEEN:
+                return value
+            # the object repeats, dump it again once and keep the value
+            value = convert(obj, annotation)
+            if self.store is not None:
+                value = write_blob(
+                    self.store, SHARED, value, self.serializer, self.compression
+                )
+            with lock:
+                if key in seen:
+                    seen[key] = (obj, value)
+            return value
+
+        return dedupe
+
+
+class GroupEncoders:
+    """
+    The encoders of the groups a task is sending, keyed by group id, so threads
+    sending different groups don't share one. Only the `maxsize` most recently used
+    groups are kept, a group's encoder is dropped once other groups are sent.
+    """
+
+    def __init__(self, maxsize: int = 8) -> None:
+        self.maxsize = maxsize
+        self._encoders: (
+            "collections.OrderedDict[typing.Tuple[str, str], GroupEncoder]"
+        ) = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        group_id: str,
+        store: typing.Optional[BlobStore],
+        serializer: str,
+        compression: typing.Optional[str],
+    ) -> GroupEncoder:
+        key = (group_id, serializer)
+        with self._lock:
+            encoder = self._encoders.get(key)
+            if encoder is None:
+                encoder = self._encoders[key] = GroupEncoder(
+                    group_id, store, serializer, compression
+                )
+                if len(self._encoders) > self.maxsize:
+                    self._encoders.popitem(last=False)
+            else:
+                self._encoders.move_to_end(key)
+            return encoder
+
+
+class SharedCache:
+    """
+    The decoded values of shared arguments in this process, keyed by content hash
+    and annotation, least recently used first. Every task that loads a shared
+    argument gets the same instance, so tasks mustn't mutate them.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._values: (
+            "collections.OrderedDict[typing.Tuple[str, typing.Any], typing.Any]"
+        ) = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(
+        self,
+        store: BlobStore,
+        ref: typing.Dict[str, typing.Any],
+        annotation: typing.Any,
+        load: Convert,
+    ) -> typing.Any:
+        key = (ref[SHARED], annotation)
+        with self._lock:
+            try:
+                self._values.move_to_end(key)
+                return self._values[key]
+            except KeyError:
+                pass
+        value = load(read_blob(store, SHARED, ref), annotation)
+        with self._lock:
+            self._values[key] = value
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+        return value
+
+
+shared_cache = SharedCache()
@@ -0,0 +1,288 @@
+import copy
+import inspect
+import typing
+
+from .codecs import _IMMUTABLE
+from .codecs import _IMMUTABLE_KINDS
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import FieldTable
+from .codecs import _get_args
+from .codecs import _get_origin
+from .codecs import _is_typeddict
+from .codecs import _NoneType
+from .codecs import _runtime_class
+
+ROUNDTRIP = "roundtrip"
+PASSTHROUGH = "passthrough"
+COPY = "copy"
+VALIDATE = "validate"
+MODES = (ROUNDTRIP, PASSTHROUGH, COPY, VALIDATE)
+
+EAGER_HEADER = "type_hint_eager"
+
+Convert = typing.Callable[[typing.Any], typing.Any]
+
+_ANY = (typing.Any, inspect._empty)
+
+
+def _identity(obj: typing.Any) -> typing.Any:
+    return obj
+
+
+class Copier:
+    """
+    Structural copies of values, compiled from the codec tree of their annotation.
+
+    Lists, sets, dicts and dataclasses are rebuilt with copies of their items and
+    fields, immutable values are shared. Anything else is deep copied.
+    """
+
+    def __init__(self, compiler: Compiler) -> None:
+        self.compiler = compiler
+        self._copies: typing.Dict[typing.Any, Convert] = {}
+
+    def get(self, annotation: typing.Any) -> Convert:
+        try:
+            return self._copies[annotation]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable
+            return self.build(self.compiler.get_codec(annotation))
+        copy_ = self._copies[annotation] = self.build(
+            self.compiler.get_codec(annotation)
+        )
+        return copy_
+
+    def build(self, codec: Codec) -> Convert:
+        kind = codec.kind
+        if kind in _IMMUTABLE_KINDS:
+            return _identity
+        elif kind == "passthrough" and not codec.children:
+            if codec.annotation in _IMMUTABLE:
+                return _identity
+            return copy.deepcopy
+        elif kind in ("list", "set") and codec.children:
+            return self._collection(list if kind == "list" else set, codec)
+        elif kind == "optional":
+            return self._optional(self.build(codec.children[0]))
+        elif kind == "dict":
+            return self._dict(codec)
+        elif kind == "dataclass":
+            return self._dataclass(codec)
+        elif kind == "columnar":
+            return self.build(codec.children[0])
+        elif kind == "bytes":
+            return self._buffer(codec.annotation)
+        elif kind == "forward":
+            # a recursive type, resolved when it's called
+            annotation = codec.annotation
+            return lambda obj: self.get(annotation)(obj)
+        return copy.deepcopy
+
+    def _collection(self, cls: type, codec: Codec) -> Convert:
+        item = self.build(codec.children[0])
+        if item is _identity:
+            return cls
+        return lambda obj: cls(map(item, obj))
+
+    def _buffer(self, cls: type) -> Convert:
+        if issubclass(cls, bytearray):
+            return bytearray
+        elif issubclass(cls, memoryview):
+            # memoryviews can't be deep copied
+            return lambda obj: memoryview(bytes(obj))
+        return _identity
+
+    def _optional(self, inner: Convert) -> Convert:
+        def copy_(obj: typing.Any) -> typing.Any:
+            if obj is None:
+                return obj
+            return inner(obj)
+
+        return copy_
+
+    def _dict(self, codec: Codec) -> Convert:
+        key, value = (self.build(child) for child in codec.children)
+        return lambda obj: {key(k): value(v) for k, v in obj.items()}
+
+    def _dataclass(self, codec: Codec) -> Convert:
+        cls = codec.annotation
+        table = FieldTable.get(cls)
+        names = table.names
+        get_values = table.get_values
+        build = table.build
+        fields = tuple(self.build(child) for child in codec.children)
+
+        def copy_(obj: typing.Any) -> typing.Any:
+            if obj.__class__ is not cls:
+                # eg. a subclass with fields of its own
+                return copy.deepcopy(obj)
+            return build(
+                {
+                    name: field(value)
+                    for name, field, value in zip(names, fields, get_values(obj))
+                }
+            )
+
+        return copy_
+
+
+class Validator:
+    """
+    Type checks of values against their annotations, compiled from the codec tree.
+
+    The checks walk the values without converting them and raise a TypeError for
+    the first value that doesn't match.
+    """
+
+    def __init__(self, compiler: Compiler) -> None:
+        self.compiler = compiler
+        self._checks: typing.Dict[typing.Any, Convert] = {}
+
+    def get(self, annotation: typing.Any) -> Convert:
+        try:
+            return self._checks[annotation]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable
+            return self.build(self.compiler.get_codec(annotation))
+        check = self._checks[annotation] = self.build(
+            self.compiler.get_codec(annotation)
+        )
+        return check
+
+    def build(self, codec: Codec) -> Convert:
+        kind = codec.kind
+        annotation = codec.annotation
+        if kind == "passthrough" and codec.children:
+            if _get_origin(annotation) is dict:
+                return self._dict(codec)
+            elif isinstance(annotation, type) and _is_typeddict(annotation):
+                # a TypedDict whose fields need no conversion, its children are
+                # the fields
+                return self._isinstance(annotation, dict)
+            # a union of types the serializer handles as they are
+            return self._union(codec)
+        elif kind in ("list", "set") and codec.children:
+            return self._collection(codec)
+        elif kind == "tuple" and codec.children:
+            return self._tuple(codec)
+        elif kind == "optional":
+            return self._optional(self.build(codec.children[0]))
+        elif kind == "union":
+            return self._union(codec)
+        elif kind == "dict":
+            return self._dict(codec)
+        elif kind == "dataclass":
+            return self._dataclass(codec)
+        elif kind == "columnar":
+            return self.build(codec.children[0])
+        elif kind == "forward":
+            return lambda obj: self.get(annotation)(obj)
+        elif annotation in _ANY:
+            return _identity
+        elif annotation is None or annotation is _NoneType:
+            return self._isinstance(annotation, _NoneType)
+        elif annotation is float:
+            return self._isinstance(annotation, (int, float))
+        elif kind == "typeddict":
+            # TypedDicts don't support isinstance
+            return self._isinstance(annotation, dict)
+        return self._isinstance(annotation, _runtime_class(annotation))
+
+    def _isinstance(
+        self, annotation: typing.Any, cls: typing.Union[type, typing.Tuple[type, ...]]
+    ) -> Convert:
+        def check(obj: typing.Any) -> typing.Any:
+            if not isinstance(obj, cls):
+                raise TypeError(f"{obj!r} is not a {annotation!r}")
+            return obj
+
+        return check
+
+    def _optional(self, inner: Convert) -> Convert:
+        def check(obj: typing.Any) -> typing.Any:
+            if obj is None:
+                return obj
+            return inner(obj)
+
+        return check
+
+    def _union(self, codec: Codec) -> Convert:
+        check = self._any(codec)
+        if _NoneType in _get_args(codec.annotation):
+            return self._optional(check)
+        return check
+
+    def _any(self, codec: Codec) -> Convert:
+        members = tuple(self.build(child) for child in codec.children)
+        annotation = codec.annotation
+
+        def check(obj: typing.Any) -> typing.Any:
+            for member in members:
+                try:
+                    return member(obj)
+                except TypeError:
+                    pass
+            raise TypeError(f"{obj!r} is not a {annotation!r}")
+
+        return check
+
+    def _collection(self, codec: Codec) -> Convert:
+        outer = self._isinstance(codec.annotation, _runtime_class(codec.annotation))
+        item = self.build(codec.children[0])
+
+        def check(obj: typing.Any) -> typing.Any:
+            outer(obj)
+            if item is not _identity:
+                for value in obj:
+                    item(value)
+            return obj
+
+        return check
+
+    def _tuple(self, codec: Codec) -> Convert:
+        outer = self._isinstance(codec.annotation, tuple)
+        items = tuple(self.build(child) for child in codec.children)
+        if _get_args(codec.annotation)[-1] is Ellipsis:
+            return self._collection(codec)
+
+        def check(obj: typing.Any) -> typing.Any:
+            outer(obj)
+            if len(obj) != len(items):
+                raise TypeError(f"{obj!r} is not a {codec.annotation!r}")
+            for item, value in zip(items, obj):
+                item(value)
+            return obj
+
+        return check
+
+    def _dict(self, codec: Codec) -> Convert:
+        outer = self._isinstance(codec.annotation, dict)
+        key, value = (self.build(child) for child in codec.children)
+
+        def check(obj: typing.Any) -> typing.Any:
+            outer(obj)
+            for k, v in obj.items():
+                key(k)
+                value(v)
+            return obj
+
+        return check
+
+    def _dataclass(self, codec: Codec) -> Convert:
+        cls = codec.annotation
+        outer = self._isinstance(cls, cls)
+        get_values = FieldTable.get(cls).get_values
+        fields = tuple(self.build(child) for child in codec.children)
+
+        def check(obj: typing.Any) -> typing.Any:
+            outer(obj)
+            for field, value in zip(fields, get_values(obj)):
+                field(value)
+            return obj
+
+        return check
@@ -0,0 +1,57 @@
+import hashlib
+import typing
+
+from .binding import Binding
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import FieldTable
+
+FINGERPRINT_HEADER = "type_hint_fingerprint"
+
+
+def _name(annotation: typing.Any) -> str:
+    if isinstance(annotation, type):
+        return f"{annotation.__module__}.{annotation.__qualname__}"
+    return repr(annotation)
+
+
+def describe(codec: Codec) -> str:
+    """
+    A canonical description of a compiled codec tree, eg.
+    `list:typing.List[example.Dog](dataclass:example.Dog[name,dob](...))`.
+    """
+    description = f"{codec.kind}:{_name(codec.annotation)}"
+    if codec.kind == "dataclass":
+        # renamed fields compile to the same codecs
+        description += "[" + ",".join(FieldTable.get(codec.annotation).names) + "]"
+    if codec.children:
+        description += "(" + ",".join(describe(child) for child in codec.children) + ")"
+    return description
+
+
+def fingerprint(binding: Binding, compiler: Compiler) -> str:
+    """
+    A short hash of the compiled schema of a task's parameters.
+    """
+    parts = [f"native={compiler.native}"]
+    for name, annotation in binding.parameters.items():
+        try:
+            codec = compiler.get_codec(annotation)
+        except Exception:
+            # raises on the first call that uses it
+            parts.append(f"{name}=?{_name(annotation)}")
+            continue
+        parts.append(f"{name}={describe(codec)}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def get_header(request: typing.Any) -> typing.Optional[str]:
+    """
+    The fingerprint of a task request. Workers merge custom headers into the
+    request, eager calls keep them under `headers`.
+    """
+    value = getattr(request, FINGERPRINT_HEADER, None)
+    if value is None:
+        headers = getattr(request, "headers", None) or {}
+        value = headers.get(FINGERPRINT_HEADER)
+    return value
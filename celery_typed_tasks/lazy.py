@@ -0,0 +1,173 @@
+import collections.abc
+import dataclasses
+import typing
+
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import FieldTable
+from .codecs import Marker
+
+_missing = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class Lazy(Marker):
+    """
+    Decode a `List` or dataclass argument on access instead of before the task runs.
+
+    >>> @app.task
+    ... def first_puppy(dogs: typing.Annotated[typing.List[Dog], Lazy()]) -> Dog:
+    ...     ...
+    """
+
+    def apply(self, compiler: Compiler, codec: Codec) -> Codec:
+        return make_lazy(compiler, codec)
+
+
+def make_lazy(compiler: Compiler, codec: Codec) -> Codec:
+    """
+    Wrap a codec so that its load returns a proxy that decodes on access. Codecs
+    with nothing worth deferring are returned as they are.
+    """
+    if compiler.task.type_hint_references:
+        # references resolve against the table of the whole value
+        return codec
+    if codec.kind == "list" and codec.children:
+        item = codec.children[0]
+        if item.kind == "passthrough":
+            return codec
+        item_load = item.load
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, LazyList):
+                return obj
+            return LazyList(obj, item_load)
+
+    elif codec.kind == "dataclass":
+        cls = codec.annotation
+        table = FieldTable.get(cls)
+        loads = {name: child.load for name, child in zip(table.names, codec.children)}
+        build = table.build if compiler.task.type_hint_skip_init else table.init
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, cls):
+                # an instance or a proxy of one
+                return obj
+            return LazyObject(cls, obj, loads, build)
+
+    else:
+        return codec
+    return Codec(codec.annotation, codec.dump, load, "lazy", (codec,))
+
+
+def unwrap(obj: typing.Any) -> typing.Any:
+    """
+    Decode whatever a lazy proxy has left and return the plain object.
+    """
+    if isinstance(obj, LazyList):
+        return list(obj)
+    elif type(obj) is LazyObject:
+        return obj._materialize()
+    return obj
+
+
+class LazyList(collections.abc.Sequence):
+    """
+    A read-only list of raw items, each decoded on first access and memoized.
+    """
+
+    __slots__ = ("_raw", "_load", "_items")
+
+    def __init__(self, raw: typing.Sequence, load: typing.Callable) -> None:
+        self._raw = raw
+        self._load = load
+        self._items = [_missing] * len(raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index: typing.Any) -> typing.Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        item = self._items[index]
+        if item is _missing:
+            item = self._items[index] = self._load(self._raw[index])
+        return item
+
+    def __iter__(self) -> typing.Iterator:
+        for index in range(len(self._raw)):
+            yield self[index]
+
+    def __eq__(self, other: typing.Any) -> bool:
+        if isinstance(other, (list, LazyList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"LazyList({list(self)!r})"
+
+
+class LazyObject:
+    """
+    A stand-in for a dataclass instance that decodes each field on first access.
+
+    It reports the dataclass as its `__class__`, so `isinstance` checks pass. Any
+    other attribute, eg. a method, decodes the remaining fields and builds the real
+    instance, which the proxy delegates to from then on.
+    """
+
+    __slots__ = ("_cls", "_raw", "_loads", "_build", "_values", "_obj")
+
+    def __init__(
+        self,
+        cls: type,
+        raw: typing.Dict[str, typing.Any],
+        loads: typing.Dict[str, typing.Callable],
+        build: typing.Callable,
+    ) -> None:
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_raw", raw)
+        object.__setattr__(self, "_loads", loads)
+        object.__setattr__(self, "_build", build)
+        object.__setattr__(self, "_values", {})
+        object.__setattr__(self, "_obj", _missing)
+
+    @property  # type: ignore
+    def __class__(self) -> type:  # type: ignore
+        return self._cls
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if self._obj is _missing and name in self._raw and name in self._loads:
+            values = self._values
+            try:
+                return values[name]
+            except KeyError:
+                value = values[name] = self._loads[name](self._raw[name])
+                return value
+        return getattr(self._materialize(), name)
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        setattr(self._materialize(), name, value)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        return self._materialize() == unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._materialize())
+
+    def __repr__(self) -> str:
+        return repr(self._materialize())
+
+    def _materialize(self) -> typing.Any:
+        obj = self._obj
+        if obj is _missing:
+            values = self._values
+            loads = self._loads
+            for key, value in self._raw.items():
+                if key not in values:
+                    values[key] = loads[key](value)
+            obj = self._build(values)
+            object.__setattr__(self, "_obj", obj)
+        return obj
@@ -0,0 +1,271 @@
+import collections
+import dataclasses
+import datetime
+import decimal
+import enum
+import marshal
+import sys
+import threading
+import typing
+import uuid
+
+Convert = typing.Callable[[typing.Any], typing.Any]
+
+# the default bound of each cache of a `Memo`
+MAX_BYTES = 16 * 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+
+class LRUCache:
+    """
+    Values by key, least recently used first, bounded by the estimated size of the
+    cached values. A value larger than the whole cache isn't cached.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: (
+            "collections.OrderedDict[typing.Any, typing.Tuple[typing.Any, int]]"
+        ) = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Any, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: typing.Any, value: typing.Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self.hits, self.misses, self.evictions, len(self._entries), self.size
+            )
+
+
+class Memo:
+    """
+    The caches of `type_hint_memoize`. `encode` holds the dumped values of frozen
+    dataclasses and tuples on producers, `decode` the instances loaded from
+    repeated payloads on workers.
+
+    Pass one `Memo` to several tasks to share its caches, the keys include the
+    annotation.
+    """
+
+    def __init__(
+        self, max_bytes: int = MAX_BYTES, max_decode_bytes: typing.Optional[int] = None
+    ) -> None:
+        self.encode = LRUCache(max_bytes)
+        self.decode = LRUCache(
+            max_bytes if max_decode_bytes is None else max_decode_bytes
+        )
+
+    def stats(self) -> typing.Dict[str, CacheStats]:
+        return {"encode": self.encode.stats(), "decode": self.decode.stats()}
+
+
+_MISSING = object()
+_CONTAINERS = (dict, list, tuple)
+
+
+def sizeof(obj: typing.Any) -> int:
+    """
+    The approximate memory of a dumped value, its containers and their items.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key)
+            size += (
+                sizeof(value)
+                if isinstance(value, _CONTAINERS)
+                else sys.getsizeof(value)
+            )
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            size += (
+                sizeof(value)
+                if isinstance(value, _CONTAINERS)
+                else sys.getsizeof(value)
+            )
+    return size
+
+
+def payload_key(obj: typing.Any) -> typing.Any:
+    """
+    A hashable key for a dumped value. Payloads of json types are marshalled, an
+    order of magnitude faster than walking them, others are frozen.
+    """
+    try:
+        # version 2 writes no back references, so equal payloads are equal bytes
+        return marshal.dumps(obj, 2)
+    except ValueError:
+        # eg. datetimes in a payload for typed-msgpack
+        return freeze(obj)
+
+
+# values that compare equal but encode differently, keyed by their encoded form
+_ENCODED_KEYS: typing.Dict[type, typing.Callable[[typing.Any], typing.Any]] = {
+    # Decimal("1.0") == Decimal("1.00")
+    decimal.Decimal: str,
+    # the same instant in different offsets
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.time: datetime.time.isoformat,
+    datetime.date: datetime.date.isoformat,
+    # 0.0 == -0.0
+    float: repr,
+}
+# values that only compare equal when they encode the same
+_EXACT = frozenset([str, int, bool, type(None), bytes, uuid.UUID])
+
+
+def _leaf_key(obj: typing.Any) -> typing.Any:
+    cls = type(obj)
+    encoded = _ENCODED_KEYS.get(cls)
+    if encoded is not None:
+        return (cls, encoded(obj))
+    # the type keeps eg. 1 and True apart
+    return (cls, obj)
+
+
+def freeze(obj: typing.Any) -> typing.Any:
+    """
+    A hashable key for a dumped value. Dicts and lists become tuples, tagged so
+    `{"a": 1}`, `[["a", 1]]` and `[("a", 1)]` stay distinct.
+    """
+    cls = type(obj)
+    if cls is dict:
+        return (dict, tuple((key, freeze(value)) for key, value in obj.items()))
+    elif cls is list or cls is tuple:
+        return (cls, tuple(freeze(value) for value in obj))
+    return _leaf_key(obj)
+
+
+def value_key(obj: typing.Any) -> typing.Any:
+    """
+    A hashable key for a value, equal only for values that dump the same. Tuples,
+    enums, frozen dataclasses and scalars are supported, anything else raises
+    TypeError.
+    """
+    cls = type(obj)
+    if cls is tuple:
+        return (tuple, tuple(value_key(value) for value in obj))
+    elif cls in _EXACT or cls in _ENCODED_KEYS:
+        return _leaf_key(obj)
+    elif isinstance(obj, enum.Enum):
+        # members only equal themselves
+        return (cls, obj)
+    elif dataclasses.is_dataclass(obj) and cls.__dataclass_params__.frozen:
+        return (
+            cls,
+            tuple(
+                value_key(getattr(obj, field.name)) for field in dataclasses.fields(obj)
+            ),
+        )
+    raise TypeError(f"{cls!r} values can't be memoized by value")
+
+
+def memo_dump(cache: LRUCache, annotation: typing.Any, dump: Convert) -> Convert:
+    """
+    Dump each instance once while it's cached. Instances are keyed by identity and
+    kept alive by the cache, so their ids aren't reused. Values are immutable, so
+    the cached dump stays valid.
+    """
+    get = cache.get
+    put = cache.put
+
+    def memoized(obj: typing.Any) -> typing.Any:
+        key = (annotation, id(obj))
+        entry = get(key, _MISSING)
+        if entry is not _MISSING:
+            return entry[1]
+        value = dump(obj)
+        put(key, (obj, value), sizeof(value))
+        return value
+
+    return memoized
+
+
+def memo_value_dump(cache: LRUCache, annotation: typing.Any, dump: Convert) -> Convert:
+    """
+    Like `memo_dump`, keyed by `value_key`, for values that are rebuilt between
+    calls, eg. tuples. Equality isn't enough, `(Decimal("1.0"), True)` equals
+    `(Decimal("1.00"), 1)` and dumps differently. Values `value_key` doesn't
+    support are dumped every time.
+    """
+    get = cache.get
+    put = cache.put
+
+    def memoized(obj: typing.Any) -> typing.Any:
+        try:
+            key = (annotation, value_key(obj))
+            entry = get(key, _MISSING)
+        except TypeError:
+            return dump(obj)
+        if entry is not _MISSING:
+            return entry
+        value = dump(obj)
+        put(key, value, sizeof(value))
+        return value
+
+    return memoized
+
+
+def memo_load(cache: LRUCache, annotation: typing.Any, load: Convert) -> Convert:
+    """
+    Load repeated payloads as one shared instance. Only for immutable values, the
+    instance is shared by every call that loads the same payload.
+    """
+    get = cache.get
+    put = cache.put
+
+    def memoized(obj: typing.Any) -> typing.Any:
+        try:
+            key = (annotation, payload_key(obj))
+            value = get(key, _MISSING)
+        except TypeError:
+            # eg. a set in the payload
+            return load(obj)
+        if value is not _MISSING:
+            return value
+        value = load(obj)
+        put(key, value, sizeof(obj))
+        return value
+
+    return memoized
@@ -0,0 +1,243 @@
+import bisect
+import collections
+import dataclasses
+import random
+import threading
+import time
+import typing
+
+from celery.utils.dispatch import Signal
+from kombu import serialization
+
+from .codecs import Codec
+
+ENCODE = "encode"
+DECODE = "decode"
+
+#: Sent after a sampled `apply_async` dumped the arguments of a `TypedTask`.
+type_hint_encoded = Signal(name="type_hint_encoded")
+#: Sent after a sampled task call loaded its arguments.
+type_hint_decoded = Signal(name="type_hint_decoded")
+#: Sent when a task call's schema fingerprint doesn't match the worker's.
+type_hint_schema_skew = Signal(name="type_hint_schema_skew")
+
+
+@dataclasses.dataclass
+class Measurement:
+    """
+    The cost of converting the arguments of one task call.
+
+    `size` is the length of the converted arguments in the task's serializer, or
+    None unless `type_hint_metrics_size` is set. `items` counts the top level
+    arguments plus the items of list, set and dict arguments. `codec_kinds` counts
+    the branches, eg. `"dataclass"`, in the compiled codecs of the call's
+    parameters. It's static, the same for every call with the same parameters, and
+    doesn't follow the branches the values took, eg. the member of a union.
+    """
+
+    task_name: str
+    direction: str
+    seconds: float
+    size: typing.Optional[int]
+    items: int
+    codec_kinds: typing.Dict[str, int]
+
+
+class MetricsSink:
+    """
+    Base class for the receivers of the measurements of `type_hint_metrics`.
+    """
+
+    def record(self, measurement: Measurement) -> None:
+        raise NotImplementedError
+
+    def record_skew(self, task_name: str, fingerprint: str) -> None:
+        """
+        Called for task calls sent with another schema fingerprint than the worker's.
+        """
+
+
+class Histogram:
+    """
+    Counts of observed values in fixed, exponentially growing buckets.
+    """
+
+    def __init__(self, bounds: typing.Sequence[float]) -> None:
+        self.bounds = list(bounds)
+        # the last bucket counts the values above the largest bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """
+        The upper bound of the bucket that holds the `q` quantile.
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _bounds(start: float, factor: float, count: int) -> typing.List[float]:
+    return [start * factor**index for index in range(count)]
+
+
+class HistogramSink(MetricsSink):
+    """
+    Keep histograms of the measurements in process, per task name and direction.
+
+    >>> sink = HistogramSink()
+    >>> sink.histograms[("tasks.walk", "decode", "seconds")].quantile(0.99)
+    """
+
+    #: 1µs to ~67s
+    seconds_bounds = _bounds(1e-6, 2, 27)
+    #: 16B to ~1GB
+    bytes_bounds = _bounds(16, 2, 27)
+    #: 1 to ~16M items
+    items_bounds = _bounds(1, 2, 25)
+
+    def __init__(self) -> None:
+        self.histograms: typing.Dict[typing.Tuple[str, str, str], Histogram] = {}
+        self.codec_kinds: typing.Counter[typing.Tuple[str, str, str]] = (
+            collections.Counter()
+        )
+        self.skews: typing.Counter[typing.Tuple[str, str]] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, measurement: Measurement) -> None:
+        key = (measurement.task_name, measurement.direction)
+        with self._lock:
+            self._observe(key, "seconds", self.seconds_bounds, measurement.seconds)
+            if measurement.size is not None:
+                self._observe(key, "bytes", self.bytes_bounds, measurement.size)
+            self._observe(key, "items", self.items_bounds, measurement.items)
+            for kind, count in measurement.codec_kinds.items():
+                self.codec_kinds[key + (kind,)] += count
+
+    def record_skew(self, task_name: str, fingerprint: str) -> None:
+        with self._lock:
+            self.skews[(task_name, fingerprint)] += 1
+
+    def _observe(
+        self,
+        key: typing.Tuple[str, str],
+        name: str,
+        bounds: typing.Sequence[float],
+        value: float,
+    ) -> None:
+        histogram = self.histograms.get(key + (name,))
+        if histogram is None:
+            histogram = self.histograms[key + (name,)] = Histogram(bounds)
+        histogram.observe(value)
+
+
+def _count_items(values: typing.Iterable) -> int:
+    items = 0
+    for value in values:
+        if isinstance(value, (list, set, dict)):
+            items += len(value)
+        else:
+            items += 1
+    return items
+
+
+def _walk_kinds(codec: Codec, kinds: typing.Counter[str]) -> None:
+    kinds[codec.kind] += 1
+    for child in codec.children:
+        _walk_kinds(child, kinds)
+
+
+class Recorder:
+    """
+    Measure the argument conversions of one task for its `type_hint_metrics`.
+
+    The task only builds a recorder when metrics are enabled, and only the calls
+    picked by `type_hint_metrics_sample_rate` are measured. Measuring the size
+    serializes the arguments again, so it's only done with `measure_size`.
+    """
+
+    def __init__(
+        self,
+        task: typing.Any,
+        sink: typing.Optional[MetricsSink],
+        sample_rate: float,
+        measure_size: bool = False,
+    ) -> None:
+        self.task = task
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.measure_size = measure_size
+        self._kinds: typing.Dict[typing.Any, typing.Counter[str]] = {}
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def measure(
+        self,
+        direction: str,
+        convert: typing.Callable[[], typing.Tuple[typing.Tuple, typing.Dict]],
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+    ) -> typing.Tuple[typing.Tuple, typing.Dict[str, typing.Any]]:
+        start = time.perf_counter()
+        hinted_args, hinted_kwargs = convert()
+        seconds = time.perf_counter() - start
+
+        if direction == ENCODE:
+            encoded: typing.Tuple = (hinted_args, hinted_kwargs)
+        else:
+            encoded = (tuple(args or ()), dict(kwargs or {}))
+        measurement = Measurement(
+            task_name=self.task.name,
+            direction=direction,
+            seconds=seconds,
+            size=self._size(encoded) if self.measure_size else None,
+            items=_count_items(encoded[0]) + _count_items(encoded[1].values()),
+            codec_kinds=dict(self._count_kinds(args, kwargs)),
+        )
+        if self.sink is not None:
+            self.sink.record(measurement)
+        signal = type_hint_encoded if direction == ENCODE else type_hint_decoded
+        signal.send(sender=self.task, measurement=measurement)
+        return hinted_args, hinted_kwargs
+
+    def _size(self, encoded: typing.Tuple) -> int:
+        try:
+            data = serialization.dumps(encoded, self.task.serializer)[2]
+        except Exception:
+            # eg. a task that loads its arguments lazily
+            return 0
+        return len(data)
+
+    def _count_kinds(
+        self,
+        args: typing.Optional[typing.Sequence],
+        kwargs: typing.Optional[typing.Mapping[str, typing.Any]],
+    ) -> typing.Counter[str]:
+        binding = self.task._get_binding()
+        annotations = [
+            annotation for _, annotation in binding.positional_for(len(args or ()))
+        ][: len(args or ())]
+        annotations.extend(binding.keyword(key) for key in kwargs or ())
+        kinds: typing.Counter[str] = collections.Counter()
+        for annotation in annotations:
+            counted = self._kinds.get(annotation)
+            if counted is None:
+                counted = collections.Counter()
+                try:
+                    _walk_kinds(self.task._compiler.get_codec(annotation), counted)
+                except Exception:
+                    pass
+                self._kinds[annotation] = counted
+            kinds.update(counted)
+        return kinds
@@ -0,0 +1,267 @@
+import contextlib
+import dataclasses
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import typing
+import uuid
+import zlib
+
+from kombu import serialization
+
+from .codecs import Codec
+from .codecs import Compiler
+from .codecs import Marker
+from .serialization import TYPED_MSGPACK
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+BLOB = "__blob__"
+OCTET_STREAM = "application/octet-stream"
+
+Buffer = typing.Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class BlobStore:
+    """
+    Base class for the stores that hold offloaded arguments. Keys are content
+    hashes, with a random suffix when the blob belongs to a single message, so
+    writing a key that exists can be skipped.
+    """
+
+    def put(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def open(self, key: str) -> typing.ContextManager[Buffer]:
+        """
+        A buffer of the blob that's valid until the context exits. Stores that can
+        avoid a copy, eg. with mmap, override this.
+        """
+        return contextlib.nullcontext(self.get(key))
+
+
+class MemoryBlobStore(BlobStore):
+    """
+    A store in the memory of the current process, for tests and eager apps.
+    """
+
+    def __init__(self) -> None:
+        self.blobs: typing.Dict[str, bytes] = {}
+
+    def put(self, key: str, data: bytes) -> None:
+        self.blobs[key] = data
+
+    def get(self, key: str) -> bytes:
+        return self.blobs[key]
+
+    def delete(self, key: str) -> None:
+        self.blobs.pop(key, None)
+
+    def exists(self, key: str) -> bool:
+        return key in self.blobs
+
+
+class FileSystemBlobStore(BlobStore):
+    """
+    A store in a directory shared by producers and workers, eg. a network mount.
+    Blobs are written atomically and read through mmap.
+    """
+
+    def __init__(self, path: typing.Union[str, "os.PathLike[str]"]) -> None:
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key)
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    @contextlib.contextmanager
+    def open(self, key: str) -> typing.Iterator[Buffer]:
+        with open(self._path(key), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # empty files can't be mapped
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+
+
+def _compress(compression: typing.Optional[str], data: bytes) -> bytes:
+    if compression is None:
+        return data
+    elif compression == "zlib":
+        return zlib.compress(data)
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _decompress(compression: typing.Optional[str], buffer: Buffer) -> bytes:
+    if compression is None:
+        return bytes(buffer)
+    elif compression == "zlib":
+        return zlib.decompress(buffer)
+    return zstandard.ZstdDecompressor().decompress(memoryview(buffer))
+
+
+def write_blob(
+    store: BlobStore,
+    marker: str,
+    value: typing.Any,
+    serializer: str,
+    compression: typing.Optional[str],
+    threshold: int = 0,
+    unique: bool = False,
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """
+    Serialize a dumped value into the store and return a reference to it, with the
+    key under `marker`. Values under `threshold` bytes aren't stored and return None.
+
+    Equal values share a blob, unless `unique` gives this one a key of its own, eg.
+    so the task that loads it can delete it without breaking other messages.
+    """
+    data: typing.Union[str, bytes, bytearray, memoryview]
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        content_type, content_encoding, data = OCTET_STREAM, "binary", value
+    else:
+        content_type, content_encoding, data = serialization.dumps(value, serializer)
+    if isinstance(data, str):
+        data = data.encode(content_encoding)
+    if len(data) < threshold:
+        return None
+    key = hashlib.sha256(data).hexdigest()
+    if unique:
+        key = f"{key}-{uuid.uuid4().hex}"
+    if compression is not None:
+        key = f"{key}.{compression}"
+    if not store.exists(key):
+        store.put(key, _compress(compression, bytes(data)))
+    return {
+        marker: key,
+        "content_type": content_type,
+        "content_encoding": content_encoding,
+        "compression": compression,
+    }
+
+
+def read_blob(
+    store: BlobStore, marker: str, ref: typing.Dict[str, typing.Any]
+) -> typing.Any:
+    """
+    Fetch and deserialize the value of a reference from `write_blob`.
+    """
+    key = ref[marker]
+    with store.open(key) as buffer:
+        data = _decompress(ref["compression"], buffer)
+    if ref["content_type"] == OCTET_STREAM:
+        return data
+    return serialization.loads(data, ref["content_type"], ref["content_encoding"])
+
+
+@dataclasses.dataclass(frozen=True)
+class Offload(Marker):
+    """
+    Write the argument to the task's `type_hint_blob_store` when it serializes to at
+    least `threshold` bytes. The message only carries a reference to it.
+
+    >>> @app.task
+    ... def resize(image: typing.Annotated[bytes, Offload(threshold=2**20)]):
+    ...     ...
+    """
+
+    threshold: int = 0
+    compression: typing.Optional[str] = "zlib"
+
+    def __post_init__(self) -> None:
+        if self.compression not in (None, "zlib", "zstd"):
+            raise ValueError(f"Unknown compression {self.compression!r}")
+        if self.compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+
+    def apply(self, compiler: Compiler, codec: Codec) -> Codec:
+        task = compiler.task
+        store = task.type_hint_blob_store
+        if store is None:
+            raise ValueError(f"Offload needs a type_hint_blob_store for {task.name}")
+        # native values only survive the typed-msgpack serializer
+        serializer = TYPED_MSGPACK if compiler.native else "json"
+        threshold = self.threshold
+        compression = self.compression
+        # a blob that's deleted after use can't be shared with other messages
+        unique = task.type_hint_blob_cleanup
+        codec_dump = codec.dump
+        codec_load = codec.load
+
+        def dump(obj: typing.Any) -> typing.Any:
+            value = codec_dump(obj)
+            ref = write_blob(
+                store, BLOB, value, serializer, compression, threshold, unique
+            )
+            return value if ref is None else ref
+
+        def load(obj: typing.Any) -> typing.Any:
+            if isinstance(obj, dict) and BLOB in obj:
+                _collect(obj[BLOB])
+                obj = read_blob(store, BLOB, obj)
+            return codec_load(obj)
+
+        return Codec(codec.annotation, dump, load, "offload", (codec,))
+
+
+_local = threading.local()
+
+
+def _collect(key: str) -> None:
+    keys = getattr(_local, "keys", None)
+    if keys is not None:
+        keys.append(key)
+
+
+@contextlib.contextmanager
+def collect_keys() -> typing.Iterator[typing.List[str]]:
+    """
+    Collect the keys of the blobs loaded in this thread until the context exits.
+    """
+    keys = getattr(_local, "keys", None)
+    _local.keys = []
+    try:
+        yield _local.keys
+    finally:
+        _local.keys = keys
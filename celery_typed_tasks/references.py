@@ -0,0 +1,133 @@
+import contextvars
+import typing
+
+REF = "__ref__"
+REFS = "__refs__"
+VALUE = "__value__"
+
+Convert = typing.Callable[[typing.Any], typing.Any]
+
+
+class DumpTable:
+    """
+    The objects dumped so far in one value. An object seen a second time moves its
+    dumped fields into the reference table, and every occurrence becomes a reference.
+    """
+
+    __slots__ = ("seen", "table")
+
+    def __init__(self) -> None:
+        # keyed by id(), the object is kept alive so its id isn't reused
+        self.seen: typing.Dict[
+            int, typing.Tuple[typing.Any, typing.Dict[str, typing.Any], int]
+        ] = {}
+        self.table: typing.List[typing.Dict[str, typing.Any]] = []
+
+    def reference(self, key: int) -> typing.Dict[str, int]:
+        obj, value, index = self.seen[key]
+        if index < 0:
+            index = len(self.table)
+            self.table.append(dict(value))
+            # the first occurrence was dumped inline, turn it into a reference too
+            value.clear()
+            value[REF] = index
+            self.seen[key] = (obj, value, index)
+        return {REF: index}
+
+
+class LoadTable:
+    """
+    The reference table of one value and the objects loaded from it so far.
+    """
+
+    __slots__ = ("table", "loaded")
+
+    def __init__(self, table: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        self.table = table
+        self.loaded: typing.Dict[int, typing.Any] = {}
+
+
+_dump_table: "contextvars.ContextVar[typing.Optional[DumpTable]]" = (
+    contextvars.ContextVar("type_hint_dump_table", default=None)
+)
+_load_table: "contextvars.ContextVar[typing.Optional[LoadTable]]" = (
+    contextvars.ContextVar("type_hint_load_table", default=None)
+)
+
+
+def scope_dump(dump: Convert) -> Convert:
+    """
+    Share the repeated objects of a value when `dump` is the outermost dump.
+    """
+
+    def scoped(obj: typing.Any) -> typing.Any:
+        if _dump_table.get() is not None:
+            return dump(obj)
+        table = DumpTable()
+        token = _dump_table.set(table)
+        try:
+            value = dump(obj)
+        finally:
+            _dump_table.reset(token)
+        if table.table:
+            return {REFS: table.table, VALUE: value}
+        return value
+
+    return scoped
+
+
+def scope_load(load: Convert) -> Convert:
+    """
+    Restore the shared objects of a value dumped by `scope_dump`.
+    """
+
+    def scoped(obj: typing.Any) -> typing.Any:
+        if type(obj) is not dict or REFS not in obj or _load_table.get() is not None:
+            return load(obj)
+        token = _load_table.set(LoadTable(obj[REFS]))
+        try:
+            return load(obj[VALUE])
+        finally:
+            _load_table.reset(token)
+
+    return scoped
+
+
+def reference_dump(dump: Convert) -> Convert:
+    """
+    Dump an object once per value, later occurrences become references.
+    """
+
+    def referencing(obj: typing.Any) -> typing.Any:
+        table = _dump_table.get()
+        if table is None:
+            return dump(obj)
+        key = id(obj)
+        if key in table.seen:
+            return table.reference(key)
+        value = dump(obj)
+        table.seen[key] = (obj, value, -1)
+        return value
+
+    return referencing
+
+
+def reference_load(load: Convert) -> Convert:
+    """
+    Load a reference once per value, so every occurrence is the same instance.
+    """
+
+    def referencing(obj: typing.Any) -> typing.Any:
+        if type(obj) is not dict or REF not in obj:
+            return load(obj)
+        table = _load_table.get()
+        if table is None:
+            raise ValueError(f"Reference {obj[REF]} outside of a reference table")
+        index = obj[REF]
+        try:
+            return table.loaded[index]
+        except KeyError:
+            loaded = table.loaded[index] = load(table.table[index])
+            return loaded
+
+    return referencing
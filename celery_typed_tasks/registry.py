@@ -0,0 +1,62 @@
+import typing
+
+from .codecs import Dump
+
+RegisteredLoad = typing.Callable[[typing.Any, typing.Any], typing.Any]
+RegisteredCodec = typing.Tuple[Dump, RegisteredLoad]
+
+
+class CodecRegistry:
+    """
+    Dump and load functions for custom types, looked up along the MRO of a class.
+    `dump(obj)` returns the serializable value and `load(value, cls)` builds an
+    instance of the annotated class from it.
+
+    The first lookup of a class walks its MRO, after that it's a dict hit. Lookups
+    that miss fall back to the `parent` registry.
+    """
+
+    def __init__(
+        self,
+        codecs: typing.Optional[typing.Mapping[type, RegisteredCodec]] = None,
+        parent: typing.Optional["CodecRegistry"] = None,
+    ) -> None:
+        self._codecs: typing.Dict[type, RegisteredCodec] = dict(codecs or {})
+        self._cache: typing.Dict[type, typing.Optional[RegisteredCodec]] = {}
+        self.parent = parent
+
+    def register(self, cls: type, dump: Dump, load: RegisteredLoad) -> None:
+        self._codecs[cls] = (dump, load)
+        self._cache.clear()
+
+    def lookup(self, cls: type) -> typing.Optional[RegisteredCodec]:
+        try:
+            found = self._cache[cls]
+        except KeyError:
+            found = self._cache[cls] = self._lookup_mro(cls)
+        if found is None and self.parent is not None:
+            return self.parent.lookup(cls)
+        return found
+
+    def _lookup_mro(self, cls: type) -> typing.Optional[RegisteredCodec]:
+        codecs = self._codecs
+        for base in cls.__mro__:
+            if base in codecs:
+                return codecs[base]
+        return None
+
+
+def register_codec(
+    app: typing.Any, cls: type, dump: Dump, load: RegisteredLoad
+) -> None:
+    """
+    Register how every `TypedTask` of an app dumps and loads `cls` and its
+    subclasses. Codecs registered on a task class with `TypedTask.register_codec`
+    take precedence.
+
+    >>> register_codec(app, Money, str, lambda value, cls: cls.parse(value))
+    """
+    registry = app.conf.get("task_type_hint_codecs")
+    if not isinstance(registry, CodecRegistry):
+        registry = app.conf.task_type_hint_codecs = CodecRegistry(registry)
+    registry.register(cls, dump, load)
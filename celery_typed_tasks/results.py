@@ -0,0 +1,176 @@
+import threading
+import typing
+
+from celery import states
+from celery.result import AsyncResult
+from celery.result import EagerResult
+from celery.result import GroupResult
+from kombu.exceptions import EncodeError
+
+_local = threading.local()
+
+
+class TypedResultMixin:
+    """
+    Decode the return value of a `TypedTask` with its return annotation.
+
+    Decoding happens on the first `get()` and is cached on the result, so `ready()`
+    checks and polling never pay for it.
+    """
+
+    app: typing.Any
+    task_name: typing.Optional[str] = None
+    _task: typing.Any = None
+    _decoded: typing.Any
+
+    def get(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        value = super().get(*args, **kwargs)  # type: ignore
+        if getattr(_local, "raw", False) or getattr(self, "state") != states.SUCCESS:
+            return value
+        try:
+            return self._decoded
+        except AttributeError:
+            pass
+        task = self._get_task()
+        if task is not None:
+            value = task._load_return(value)
+        self._decoded = value
+        return value
+
+    def _get_task(self) -> typing.Any:
+        task = self._task
+        if task is None and self.task_name is not None:
+            task = self._task = self.app.tasks.get(self.task_name)
+        if getattr(task, "type_hint_serialization", False):
+            return task
+        return None
+
+
+class TypedAsyncResult(TypedResultMixin, AsyncResult):
+    def __init__(
+        self,
+        id: str,
+        backend: typing.Any = None,
+        task_name: typing.Optional[str] = None,
+        app: typing.Any = None,
+        parent: typing.Any = None,
+    ) -> None:
+        super().__init__(id, backend=backend, app=app, parent=parent)
+        self.task_name = task_name
+
+    def __reduce_args__(self) -> typing.Tuple:
+        return self.id, self.backend, self.task_name, None, self.parent
+
+
+class TypedEagerResult(TypedResultMixin, EagerResult):
+    _result: typing.Any
+
+    @classmethod
+    def from_result(cls, result: EagerResult, task: typing.Any) -> "TypedEagerResult":
+        typed = cls(*result.__reduce_args__())
+        typed._task = task
+        return typed
+
+
+class TypedBackend:
+    """
+    The result backend of a `TypedTask`, as the worker sees it. Return values are
+    dumped with the return annotation on their way into the backend, while chains
+    and callbacks get them as the task returned them.
+    """
+
+    def __init__(self, task: typing.Any, backend: typing.Any) -> None:
+        self.task = task
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self.backend, name)
+
+    def __reduce__(self) -> typing.Tuple:
+        # pickles as the backend it wraps
+        return self.backend.__reduce__()
+
+    def mark_as_done(
+        self,
+        task_id: str,
+        result: typing.Any,
+        request: typing.Any = None,
+        store_result: bool = True,
+        state: str = states.SUCCESS,
+    ) -> None:
+        if store_result or getattr(request, "chord", None):
+            try:
+                result = self.task._dump_return(result)
+            except Exception as exc:
+                # fails the task like a result the backend can't serialize
+                raise EncodeError(exc) from exc
+        self.backend.mark_as_done(task_id, result, request, store_result, state)
+
+
+class TypedGroupResult(GroupResult):
+    """
+    A group result that decodes the return values of its `TypedTask` children in
+    one batch per task, instead of once per child.
+
+    Canvas groups use the app's `GroupResult` class, so to get these from `group`
+    install it on the app with
+
+    >>> app.GroupResult = app.subclass_with_self(TypedGroupResult)
+    """
+
+    def join(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        return self._decode(self._raw(super().join, *args, **kwargs))
+
+    def join_native(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        return self._decode(self._raw(super().join_native, *args, **kwargs))
+
+    def _raw(
+        self, join: typing.Callable, *args: typing.Any, **kwargs: typing.Any
+    ) -> typing.Any:
+        raw = getattr(_local, "raw", False)
+        _local.raw = True
+        try:
+            return join(*args, **kwargs)
+        finally:
+            _local.raw = raw
+
+    def _decode(self, values: typing.Optional[typing.List]) -> typing.Any:
+        if values is None or getattr(_local, "raw", False):
+            # a callback was given, or this group is nested in another one
+            return values
+
+        results = self.results or []
+        batches: typing.Dict[typing.Any, typing.List[int]] = {}
+        for index, result in enumerate(results):
+            if not isinstance(result, TypedResultMixin):
+                continue
+            try:
+                values[index] = result._decoded
+                continue
+            except AttributeError:
+                pass
+            task = result._get_task()
+            if task is not None and result.state == states.SUCCESS:
+                batches.setdefault(task, []).append(index)
+
+        for task, indexes in batches.items():
+            decoded = task._load_returns([values[index] for index in indexes])
+            for index, value in zip(indexes, decoded):
+                values[index] = value
+                typing.cast(TypedResultMixin, results[index])._decoded = value
+        return values
+
+
+class ChunkedGroupResult(TypedGroupResult):
+    """
+    The result of a task whose `type_hint_chunk` parameter was split across several
+    messages. Return values that are lists are merged back into one list.
+    """
+
+    def _decode(self, values: typing.Optional[typing.List]) -> typing.Any:
+        values = super()._decode(values)
+        if values is None or getattr(_local, "raw", False):
+            return values
+        if not all(isinstance(value, list) for value in values):
+            return values
+        return [item for value in values for item in value]
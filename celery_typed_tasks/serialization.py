@@ -0,0 +1,211 @@
+import datetime
+import decimal
+import struct
+import typing
+import uuid
+
+from kombu import serialization
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+TYPED_MSGPACK = "typed-msgpack"
+CONTENT_TYPE = "application/x-typed-msgpack"
+
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_TIME = 3
+EXT_UUID = 4
+EXT_DECIMAL = 5
+EXT_BUFFER = 6
+
+# 0xc1 is never used by msgpack, it marks a body followed by out-of-band buffers
+FRAMED = b"\xc1"
+# buffers start at multiples of this offset, so arrays over them are aligned
+ALIGNMENT = 16
+
+_datetime = struct.Struct(">HBBBBBI")
+_date = struct.Struct(">HBB")
+_time = struct.Struct(">BBBI")
+_offset = struct.Struct(">i")
+_index = struct.Struct(">I")
+_count = struct.Struct(">I")
+_length = struct.Struct(">Q")
+
+
+class OutOfBand:
+    """
+    A buffer that `typed-msgpack` appends to the message as a raw frame, instead
+    of packing it into the msgpack body. Loads return a memoryview of the frame.
+    """
+
+    __slots__ = ("buffer",)
+
+    def __init__(self, buffer: typing.Any) -> None:
+        self.buffer = memoryview(buffer).cast("B")
+
+
+def _pack_offset(value: typing.Union[datetime.datetime, datetime.time]) -> bytes:
+    offset = value.utcoffset()
+    if offset is None:
+        return b""
+    return _offset.pack(offset // datetime.timedelta(seconds=1))
+
+
+def _unpack_offset(data: bytes, start: int) -> typing.Optional[datetime.tzinfo]:
+    if len(data) == start:
+        return None
+    (seconds,) = _offset.unpack_from(data, start)
+    if seconds == 0:
+        return datetime.timezone.utc
+    return datetime.timezone(datetime.timedelta(seconds=seconds))
+
+
+def _default(obj: typing.Any) -> typing.Any:
+    # datetime has to be checked before date, it's a subclass
+    if isinstance(obj, datetime.datetime):
+        data = _datetime.pack(
+            obj.year,
+            obj.month,
+            obj.day,
+            obj.hour,
+            obj.minute,
+            obj.second,
+            obj.microsecond,
+        )
+        return msgpack.ExtType(EXT_DATETIME, data + _pack_offset(obj))
+    elif isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, _date.pack(obj.year, obj.month, obj.day))
+    elif isinstance(obj, datetime.time):
+        data = _time.pack(obj.hour, obj.minute, obj.second, obj.microsecond)
+        return msgpack.ExtType(EXT_TIME, data + _pack_offset(obj))
+    elif isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    elif isinstance(obj, decimal.Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode("ascii"))
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def _ext_hook(code: int, data: bytes) -> typing.Any:
+    if code == EXT_DATETIME:
+        year, month, day, hour, minute, second, microsecond = _datetime.unpack_from(
+            data
+        )
+        return datetime.datetime(
+            year,
+            month,
+            day,
+            hour,
+            minute,
+            second,
+            microsecond,
+            tzinfo=_unpack_offset(data, _datetime.size),
+        )
+    elif code == EXT_DATE:
+        return datetime.date(*_date.unpack(data))
+    elif code == EXT_TIME:
+        hour, minute, second, microsecond = _time.unpack_from(data)
+        return datetime.time(
+            hour, minute, second, microsecond, tzinfo=_unpack_offset(data, _time.size)
+        )
+    elif code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    elif code == EXT_DECIMAL:
+        return decimal.Decimal(data.decode("ascii"))
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj: typing.Any) -> bytes:
+    buffers: typing.List[memoryview] = []
+
+    def default(value: typing.Any) -> typing.Any:
+        if isinstance(value, OutOfBand):
+            buffers.append(value.buffer)
+            return msgpack.ExtType(EXT_BUFFER, _index.pack(len(buffers) - 1))
+        return _default(value)
+
+    body = msgpack.packb(obj, default=default, use_bin_type=True)
+    if not buffers:
+        return body
+    return _frame(body, buffers)
+
+
+def _frame(body: bytes, buffers: typing.List[memoryview]) -> bytes:
+    """
+    `FRAMED`, the number of buffers, the lengths of the body and of each buffer,
+    the body, then each buffer padded to `ALIGNMENT`. The buffers are copied once,
+    into the message.
+    """
+    lengths = [len(body)] + [buffer.nbytes for buffer in buffers]
+    header = FRAMED + _count.pack(len(buffers)) + b"".join(map(_length.pack, lengths))
+    parts: typing.List[typing.Any] = [header, body]
+    offset = len(header) + len(body)
+    for buffer in buffers:
+        padding = -offset % ALIGNMENT
+        parts.append(b"\0" * padding)
+        parts.append(buffer)
+        offset += padding + buffer.nbytes
+    return b"".join(parts)
+
+
+def loads(data: typing.Union[bytes, str]) -> typing.Any:
+    if data[:1] == FRAMED:
+        return _loads_framed(typing.cast(bytes, data))
+    return msgpack.unpackb(
+        data, ext_hook=_ext_hook, raw=False, strict_map_key=False, use_list=True
+    )
+
+
+def _loads_framed(data: bytes) -> typing.Any:
+    """
+    Load a body written by `_frame`. The buffers load as memoryviews of `data`.
+    """
+    view = memoryview(data)
+    (count,) = _count.unpack_from(view, 1)
+    offset = 1 + _count.size
+    lengths = [
+        _length.unpack_from(view, offset + index * _length.size)[0]
+        for index in range(count + 1)
+    ]
+    offset += len(lengths) * _length.size
+    body = view[offset : offset + lengths[0]]
+    offset += lengths[0]
+    frames = []
+    for length in lengths[1:]:
+        offset += -offset % ALIGNMENT
+        frames.append(view[offset : offset + length])
+        offset += length
+
+    def ext_hook(code: int, ext: bytes) -> typing.Any:
+        if code == EXT_BUFFER:
+            return frames[_index.unpack(ext)[0]]
+        return _ext_hook(code, ext)
+
+    return msgpack.unpackb(
+        body, ext_hook=ext_hook, raw=False, strict_map_key=False, use_list=True
+    )
+
+
+def register() -> None:
+    """
+    Register the `typed-msgpack` serializer with kombu. Datetimes, dates, times,
+    UUIDs and Decimals travel as compact msgpack extension types instead of strings.
+    Large buffers, eg. of numpy arrays, travel as raw frames after the msgpack body.
+
+    This runs on import when msgpack is installed.
+    """
+    serialization.register(
+        TYPED_MSGPACK,
+        dumps,  # type: ignore[arg-type]
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding="binary",
+    )
+
+
+if msgpack is not None:
+    register()
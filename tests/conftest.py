@@ -45,6 +45,34 @@ def test_app(test_app_factory):
     return test_app_factory()
 
 
+@pytest.fixture
+def memory_app(test_app_factory):
+    """
+    An app that publishes to kombu's in-memory transport instead of running eagerly.
+    """
+    app = test_app_factory(broker="memory://")
+    app.conf.task_always_eager = False
+    return app
+
+
+@pytest.fixture
+def consume(memory_app):
+    """
+    Take `count` messages off the default queue of `memory_app` and ack them.
+    """
+
+    def consume(count):
+        with memory_app.connection_for_read() as connection:
+            queue = connection.SimpleQueue("celery")
+            messages = [queue.get(timeout=1) for _ in range(count)]
+            for message in messages:
+                message.ack()
+            queue.close()
+        return messages
+
+    return consume
+
+
 @pytest.fixture
 def type_hint_serialization_disabled_task(test_app):
     NoneType = type(None)
@@ -0,0 +1,93 @@
+import datetime
+import typing
+
+import pytest
+
+import celery_typed_tasks
+from celery_typed_tasks import adapters
+from celery_typed_tasks.codecs import Compiler
+from example import Dog
+
+pydantic = pytest.importorskip("pydantic")
+if not hasattr(pydantic, "TypeAdapter"):  # pragma: no cover
+    pytest.skip("requires pydantic v2", allow_module_level=True)
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+class Item(pydantic.BaseModel):
+    name: str
+    price: float
+    made: datetime.datetime
+    tax: typing.Optional[float] = None
+
+
+items = [Item(name=name, price=1.5, made=dob) for name in ["bone", "leash"]]
+
+
+class TestAdaptable:
+    @pytest.mark.parametrize(
+        "annotation, adaptable",
+        [
+            (Item, True),
+            (typing.List[Item], True),
+            (typing.Dict[str, typing.Optional[Item]], True),
+            (typing.Tuple[Item, datetime.datetime], True),
+            (typing.List[int], False),
+            (Dog, False),
+            (typing.List[typing.Union[Item, Dog]], False),
+        ],
+    )
+    def test_is_adaptable(self, annotation, adaptable):
+        assert adapters.is_adaptable(annotation) is adaptable
+
+    def test_adapter_is_cached(self):
+        assert adapters.get_adapter(Item) is adapters.get_adapter(Item)
+
+
+class TestPydantic:
+    def test_whole_tree_is_one_codec(self):
+        compiler = Compiler(celery_typed_tasks.TypedTask())
+        codec = compiler.get_codec(typing.List[Item])
+        assert codec.kind == "pydantic"
+        dumped = codec.dump(items)
+        assert dumped[0] == {
+            "name": "bone",
+            "price": 1.5,
+            "made": "2020-01-01T00:00:00",
+            "tax": None,
+        }
+        assert codec.load(dumped) == items
+
+    def test_batch(self):
+        codec = Compiler(celery_typed_tasks.TypedTask()).get_codec(Item)
+        assert codec.load_many(codec.dump_many(items)) == items
+
+    def test_task(self, test_app):
+        @test_app.task
+        def cheapest(items: typing.List[Item], dog: Dog) -> Item:
+            assert dog.dob == dob
+            return min(items, key=lambda item: item.price)
+
+        assert cheapest.delay(items, Dog(name="Gus", dob=dob)).get() == items[0]
+
+    def test_disabled(self, test_app):
+        @test_app.task(type_hint_pydantic=False)
+        def cheapest(items: typing.List[Item]) -> Item: ...
+
+        assert cheapest._compiler.get_codec(typing.List[Item]).kind == "list"
+
+    def test_registered_codecs_take_precedence(self, test_app):
+        celery_typed_tasks.register_codec(
+            test_app,
+            pydantic.BaseModel,
+            lambda obj: obj.model_dump_json(),
+            lambda value, cls: cls.model_validate_json(value),
+        )
+
+        @test_app.task
+        def cheapest(item: Item) -> Item:
+            return item
+
+        assert isinstance(cheapest._dump_obj(items[0], Item), str)
+        assert cheapest.delay(items[0]).get() == items[0]
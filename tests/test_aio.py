@@ -0,0 +1,92 @@
+import asyncio
+import concurrent.futures
+import datetime
+import typing
+
+import pytest
+
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+names = ["Bruce", "Gus", "Rex"]
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):  # type: ignore
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    executor = CountingExecutor()
+    yield executor
+    executor.shutdown()
+
+
+class TestAsyncApply:
+    def test_adelay(self, test_app):
+        @test_app.task
+        def adopt(name: str, dob: datetime.datetime) -> Dog:
+            return Dog(name=name, dob=dob)
+
+        result = asyncio.run(adopt.adelay("Bruce", dob=dob))
+        assert result.get() == Dog(name="Bruce", dob=dob)
+
+    def test_small_payload_dumps_inline(self, test_app, executor):
+        @test_app.task(type_hint_async_executor=executor)
+        def walk(dogs: typing.List[Dog]) -> int:
+            return len(dogs)
+
+        dogs = [Dog(name=name, dob=dob) for name in names]
+        result = asyncio.run(walk.apply_async_async((dogs,)))
+        assert result.get() == 3
+        assert executor.submitted == 0
+
+    def test_large_payload_dumps_in_executor(self, test_app, executor):
+        @test_app.task(
+            type_hint_async_executor=executor, type_hint_async_inline_items=2
+        )
+        def walk(dogs: typing.List[Dog]) -> int:
+            return len(dogs)
+
+        dogs = [Dog(name=name, dob=dob) for name in names]
+        result = asyncio.run(walk.apply_async_async((dogs,)))
+        assert result.get() == 3
+        assert executor.submitted == 1
+
+    def test_batches_concurrent_enqueues(self, memory_app, consume, mocker):
+        @memory_app.task
+        def walk(dog: Dog, minutes: int): ...
+
+        async def enqueue():
+            return await asyncio.gather(
+                *(
+                    walk.adelay(Dog(name=name, dob=dob), minutes=index)
+                    for index, name in enumerate(names)
+                )
+            )
+
+        acquire_spy = mocker.spy(memory_app.producer_pool, "acquire")
+        results = asyncio.run(enqueue())
+        assert acquire_spy.call_count == 1
+
+        messages = consume(len(names))
+        assert [result.id for result in results] == [
+            message.headers["id"] for message in messages
+        ]
+        args, kwargs, _ = messages[0].decode()
+        assert args == [{"name": "Bruce", "dob": dob.isoformat()}]
+        assert kwargs == {"minutes": 0}
+
+    def test_publish_error(self, memory_app, mocker):
+        @memory_app.task
+        def walk(dog: Dog): ...
+
+        mocker.patch("celery.Task.apply_async", side_effect=ConnectionError)
+        with pytest.raises(ConnectionError):
+            asyncio.run(walk.adelay(Dog(name="Bruce", dob=dob)))
@@ -0,0 +1,254 @@
+import datetime
+import types
+import typing
+
+import pytest
+from celery.worker.state import revoked
+
+from celery_typed_tasks.batches import BatchTypedTask
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+class Pool:
+    def apply_async(self, target, args, callback, error_callback):
+        callback(target(*args))
+
+
+@pytest.fixture
+def memory_app(memory_app):
+    memory_app.conf.result_backend = "cache+memory://"
+    return memory_app
+
+
+@pytest.fixture
+def consumer(mocker):
+    return types.SimpleNamespace(
+        connection_errors=(), pool=Pool(), timer=mocker.Mock(), qos=mocker.Mock()
+    )
+
+
+def receive(app, task, consumer, count, mocker):
+    """
+    Feed `count` published messages to the worker strategy of `task`.
+    """
+    handler = task.start_strategy(app, consumer)
+    settled = []
+    with app.connection_for_read() as connection:
+        queue = connection.SimpleQueue("celery")
+        for _ in range(count):
+            message = queue.get(timeout=1)
+            ack, reject = mocker.Mock(), mocker.Mock()
+            settled.append((ack, reject))
+            handler(message, None, ack, reject, [])
+        queue.close()
+    return settled
+
+
+class TestBatchTypedTask:
+    def test_eager(self, test_app):
+        @test_app.task(base=BatchTypedTask)
+        def walk(dogs: typing.List[Dog]) -> typing.List[Dog]:
+            assert isinstance(dogs, list)
+            return dogs
+
+        assert walk.delay(dogs[0]).get() == dogs[0]
+        assert walk(dogs[1]) == dogs[1]
+
+    def test_dumps_items(self, test_app):
+        @test_app.task(base=BatchTypedTask)
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]: ...
+
+        binding = walk._get_binding()
+        assert binding.parameters == {"dogs": Dog}
+        assert binding.returns is str
+        assert walk._hint_args((dogs[0],), {}, walk._dump_obj) == (
+            ({"name": "Bruce", "dob": dob.isoformat()},),
+            {},
+        )
+
+    def test_signature(self, test_app):
+        # not shared, other apps would finalize it
+        @test_app.task(base=BatchTypedTask, shared=False)
+        def walk(dog: Dog): ...
+
+        with pytest.raises(TypeError):
+            walk._get_binding()
+
+        @test_app.task(base=BatchTypedTask, shared=False)
+        def walk_many(dogs: typing.List[Dog], minutes: int): ...
+
+        with pytest.raises(TypeError):
+            walk_many._get_binding()
+
+    def test_batch(self, memory_app, consumer, mocker):
+        calls = []
+
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_size=3)
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+            calls.append(dogs)
+            return [dog.name.upper() for dog in dogs]
+
+        results = [walk.delay(dog) for dog in dogs]
+        load_spy = mocker.spy(walk._compiler, "get_codec")
+        settled = receive(memory_app, walk, consumer, 3, mocker)
+
+        assert calls == [dogs]
+        # one load for the whole batch
+        assert load_spy.call_args_list[0] == mocker.call(typing.List[Dog])
+        assert [result.get(timeout=1) for result in results] == ["BRUCE", "GUS", "REX"]
+        for ack, reject in settled:
+            ack.assert_called_once()
+            reject.assert_not_called()
+
+    def test_typed_msgpack(self, memory_app, consumer, mocker):
+        pytest.importorskip("msgpack")
+        memory_app.conf.accept_content = ["json", "typed-msgpack"]
+        calls = []
+
+        @memory_app.task(
+            base=BatchTypedTask,
+            type_hint_batch_size=3,
+            type_hint_serialization="typed-msgpack",
+        )
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+            calls.append(dogs)
+            return [dog.name for dog in dogs]
+
+        results = [walk.delay(dog) for dog in dogs]
+        native_spy = mocker.spy(walk._native_compiler, "get_codec")
+        json_spy = mocker.spy(walk._compiler, "get_codec")
+        receive(memory_app, walk, consumer, 3, mocker)
+
+        assert calls == [dogs]
+        # datetimes arrive decoded, the native codecs load them
+        assert native_spy.call_args_list[0] == mocker.call(typing.List[Dog])
+        # only for the return values, the result backend uses json
+        assert json_spy.call_args_list == [mocker.call(str)]
+        assert [result.get(timeout=1) for result in results] == ["Bruce", "Gus", "Rex"]
+
+    def test_flush_on_interval(self, memory_app, consumer, mocker):
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_interval=5)
+        def walk(dogs: typing.List[Dog]) -> None: ...
+
+        walk.delay(dogs[0])
+        walk.delay(dogs[1])
+        settled = receive(memory_app, walk, consumer, 2, mocker)
+        consumer.timer.call_repeatedly.assert_called_once()
+        interval, flush = consumer.timer.call_repeatedly.call_args[0]
+        assert interval == 5
+        for ack, _ in settled:
+            ack.assert_not_called()
+
+        flush()
+        for ack, _ in settled:
+            ack.assert_called_once()
+
+    def test_bad_argument(self, memory_app, consumer, mocker):
+        @memory_app.task(
+            base=BatchTypedTask,
+            type_hint_batch_size=2,
+            acks_on_failure_or_timeout=False,
+        )
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+            return [dog.name for dog in dogs]
+
+        # skips the argument dump
+        bad = memory_app.send_task(walk.name, ({"name": "Gus", "dob": "yesterday"},))
+        good = walk.delay(dogs[0])
+        (bad_ack, bad_reject), (good_ack, good_reject) = receive(
+            memory_app, walk, consumer, 2, mocker
+        )
+
+        assert good.get(timeout=1) == "Bruce"
+        good_ack.assert_called_once()
+        assert bad.state == "FAILURE"
+        bad_ack.assert_not_called()
+        bad_reject.assert_called_once()
+
+    def test_failed_batch(self, memory_app, consumer, mocker):
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_size=2)
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+            return []
+
+        results = [walk.delay(dog) for dog in dogs[:2]]
+        settled = receive(memory_app, walk, consumer, 2, mocker)
+        for result in results:
+            with pytest.raises(ValueError):
+                result.get(timeout=1)
+        # acked, like other failed tasks
+        for ack, reject in settled:
+            ack.assert_called_once()
+
+    def test_eta(self, memory_app, consumer, mocker):
+        calls = []
+
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_size=1)
+        def walk(dogs: typing.List[Dog]) -> typing.List[str]:
+            calls.append(dogs)
+            return [dog.name for dog in dogs]
+
+        result = walk.apply_async((dogs[0],), countdown=60)
+        ((ack, _),) = receive(memory_app, walk, consumer, 1, mocker)
+        assert calls == []
+        ack.assert_not_called()
+        consumer.qos.increment_eventually.assert_called_once()
+        (eta, add, args), options = consumer.timer.call_at.call_args
+        now = datetime.datetime.now(datetime.timezone.utc)
+        assert 50 < (eta - now).total_seconds() <= 60
+        assert options == {"priority": 6}
+
+        add(*args)
+        consumer.qos.decrement_eventually.assert_called_once()
+        assert calls == [dogs[:1]]
+        assert result.get(timeout=1) == "Bruce"
+        ack.assert_called_once()
+
+    def test_expired(self, memory_app, consumer, mocker):
+        calls = []
+
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_size=1)
+        def walk(dogs: typing.List[Dog]) -> None:
+            calls.append(dogs)
+
+        expires = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            minutes=1
+        )
+        result = walk.apply_async((dogs[0],), expires=expires)
+        ((ack, reject),) = receive(memory_app, walk, consumer, 1, mocker)
+        try:
+            assert calls == []
+            assert result.state == "REVOKED"
+            ack.assert_called_once()
+            reject.assert_not_called()
+        finally:
+            revoked.discard(result.id)
+
+    def test_revoked(self, memory_app, consumer, mocker):
+        calls = []
+
+        @memory_app.task(base=BatchTypedTask, type_hint_batch_size=3)
+        def walk(dogs: typing.List[Dog]) -> None:
+            calls.append(dogs)
+
+        results = [walk.delay(dog) for dog in dogs[:2]]
+        revoked.add(results[0].id)
+        try:
+            settled = receive(memory_app, walk, consumer, 2, mocker)
+            settled[0][0].assert_called_once()
+            settled[1][0].assert_not_called()
+            # revoked while it's buffered
+            revoked.add(results[1].id)
+            (_, flush), _ = consumer.timer.call_repeatedly.call_args
+            flush()
+        finally:
+            for result in results:
+                revoked.discard(result.id)
+
+        assert calls == []
+        assert [result.state for result in results] == ["REVOKED", "REVOKED"]
+        for ack, reject in settled:
+            ack.assert_called_once()
+            reject.assert_not_called()
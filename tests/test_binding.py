@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import datetime
+import typing
+import uuid
+from types import SimpleNamespace
+
+import celery_typed_tasks.core
+from celery_typed_tasks.binding import Binding
+from example import Dog
+
+
+class TestBinding:
+    def test_string_annotations_are_resolved(self, test_app):
+        @test_app.task
+        def future_annotations(dogs: typing.List[Dog], id: uuid.UUID):
+            return dogs, id
+
+        binding = Binding(future_annotations.run)
+        assert binding.parameters == {"dogs": typing.List[Dog], "id": uuid.UUID}
+
+        dogs = [Dog(name="Bruce", dob=datetime.datetime(2020, 1, 1))]
+        id = uuid.uuid4()
+        assert future_annotations.delay(dogs, id=id).get() == (dogs, id)
+
+    def test_var_positional_and_keyword(self, test_app):
+        @test_app.task
+        def var_args(*ids: uuid.UUID, **timestamps: datetime.datetime):
+            return ids, timestamps
+
+        ids = (uuid.uuid4(), uuid.uuid4())
+        now = datetime.datetime.now()
+        assert var_args.delay(*ids, now=now).get() == (ids, {"now": now})
+
+    def test_binding_is_built_once(self, test_app, mocker):
+        init_spy = mocker.spy(Binding, "__init__")
+
+        @test_app.task
+        def add(x: int, y: int):
+            return x + y
+
+        for _ in range(3):
+            assert add.delay(1, y=2).get() == 3
+        assert init_spy.call_count == 1
+
+
+class TestWarm:
+    def test_worker_init_warms_tasks(self, test_app):
+        @test_app.task
+        def alert(timestamp: datetime.datetime):
+            return timestamp
+
+        celery_typed_tasks.core.warm_typed_tasks(sender=SimpleNamespace(app=test_app))
+        assert alert._binding is not None
+        assert datetime.datetime in alert._compiler._codecs
+
+    def test_lazy_binding(self, test_app):
+        test_app.conf.task_type_hint_lazy_binding = True
+
+        @test_app.task
+        def alert(timestamp: datetime.datetime):
+            return timestamp
+
+        celery_typed_tasks.core.warm_typed_tasks(sender=SimpleNamespace(app=test_app))
+        assert alert._binding is None
@@ -0,0 +1,127 @@
+import json
+import typing
+
+import pytest
+
+from celery_typed_tasks import serialization
+from celery_typed_tasks.buffers import OUT_OF_BAND_BYTES
+from celery_typed_tasks.serialization import FRAMED
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("msgpack")
+
+large = b"x" * OUT_OF_BAND_BYTES
+
+
+class TestBuffers:
+    @pytest.mark.parametrize("cls", [bytes, bytearray, memoryview])
+    def test_json(self, test_app, cls):
+        @test_app.task
+        def echo(data: cls) -> cls:
+            assert type(data) is cls
+            return data
+
+        assert echo._dump_obj(cls(b"abc"), cls) == "YWJj"
+        assert bytes(echo.delay(cls(b"abc")).get()) == b"abc"
+
+    @pytest.mark.parametrize("cls", [bytes, bytearray, memoryview])
+    def test_typed_msgpack(self, test_app, cls):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def size(data: cls) -> int:
+            assert type(data) is cls
+            return len(data)
+
+        assert size.delay(cls(b"abc")).get() == 3
+        assert size.delay(cls(large)).get() == len(large)
+
+    def test_memoryview_of_message(self, test_app):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def size(data: memoryview): ...
+
+        body = serialization.dumps([size._dump_native_obj(large, memoryview)])
+        assert body[:1] == FRAMED
+        (view,) = serialization.loads(body)
+        loaded = size._load_obj(view, memoryview)
+        assert loaded == large
+        assert loaded.obj is body
+
+    def test_small_buffers_in_band(self):
+        body = serialization.dumps([b"abc", {"a": 1}])
+        assert body[:1] != FRAMED
+        assert serialization.loads(body) == [b"abc", {"a": 1}]
+
+
+class TestNdarray:
+    def test_json(self, test_app):
+        @test_app.task
+        def double(values: numpy.ndarray) -> numpy.ndarray:
+            return values * 2
+
+        values = numpy.arange(6, dtype="<i4").reshape(2, 3)
+        dumped = double._dump_obj(values, numpy.ndarray)
+        assert dumped[:2] == ["<i4", [2, 3]]
+        json.dumps(dumped)
+        doubled = double.delay(values).get()
+        assert doubled.dtype == values.dtype
+        numpy.testing.assert_array_equal(doubled, values * 2)
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            numpy.arange(10_000, dtype=numpy.float64).reshape(100, 100),
+            numpy.array([1, 2, 3], dtype=numpy.uint8),
+            numpy.array(3.5),
+            numpy.zeros((0, 3)),
+            numpy.array(["2020-01-01"], dtype="datetime64[ns]"),
+            numpy.arange(20).reshape(4, 5)[:, 1],
+        ],
+    )
+    def test_typed_msgpack(self, test_app, values):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def echo(values: numpy.ndarray):
+            return values
+
+        dumped = echo._dump_native_obj(values, numpy.ndarray)
+        loaded = echo._load_obj(
+            serialization.loads(serialization.dumps([dumped]))[0], numpy.ndarray
+        )
+        assert loaded.shape == values.shape
+        assert loaded.dtype == values.dtype
+        numpy.testing.assert_array_equal(loaded, values)
+
+    def test_view_of_message(self, test_app):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def total(values: numpy.ndarray) -> float:
+            assert not values.flags.writeable
+            assert values.ctypes.data % serialization.ALIGNMENT == 0
+            return float(values.sum())
+
+        values = numpy.ones(10_000)
+        body = serialization.dumps([total._dump_native_obj(values, numpy.ndarray)])
+        loaded = total._load_obj(serialization.loads(body)[0], numpy.ndarray)
+        # a view of the message, not a copy
+        assert loaded.base.base.obj is body
+        assert total.delay(values).get() == 10_000
+
+    def test_typing_alias(self, test_app):
+        NDArray = pytest.importorskip("numpy.typing").NDArray
+
+        @test_app.task
+        def total(values: NDArray[numpy.float64]) -> float:
+            return float(values.sum())
+
+        assert total.delay(numpy.ones(4)).get() == 4
+
+    def test_object_arrays(self, test_app):
+        @test_app.task
+        def echo(values: numpy.ndarray): ...
+
+        with pytest.raises(TypeError):
+            echo._dump_obj(numpy.array([{}], dtype=object), numpy.ndarray)
+
+    def test_list_of_arrays(self, test_app):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def total(values: typing.List[numpy.ndarray]) -> float:
+            return float(sum(value.sum() for value in values))
+
+        assert total.delay([numpy.ones(1000), numpy.ones(2000)]).get() == 3000
@@ -0,0 +1,50 @@
+import concurrent.futures
+import datetime
+import typing
+
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+names = ["Bruce", "Gus", "Rex"]
+
+
+class TestApplyAsyncMany:
+    def test_publishes_in_order(self, memory_app, consume, mocker):
+        @memory_app.task
+        def walk(dog: Dog, minutes: int): ...
+
+        acquire_spy = mocker.spy(memory_app.producer_pool, "acquire")
+        results = walk.apply_async_many(
+            ((Dog(name=name, dob=dob),), {"minutes": index})
+            for index, name in enumerate(names)
+        )
+        assert acquire_spy.call_count == 1
+
+        messages = consume(len(names))
+        assert [result.id for result in results] == [
+            message.headers["id"] for message in messages
+        ]
+        args, kwargs, _ = messages[0].decode()
+        assert args == [{"name": "Bruce", "dob": dob.isoformat()}]
+        assert kwargs == {"minutes": 0}
+
+    def test_executor(self, test_app):
+        @test_app.task
+        def adopt(name: str, dob: datetime.datetime) -> Dog:
+            return Dog(name=name, dob=dob)
+
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            results = adopt.apply_async_many(
+                (((name, dob), None) for name in names), executor=executor
+            )
+        assert [result.get() for result in results] == [
+            Dog(name=name, dob=dob) for name in names
+        ]
+
+    def test_type_hint_serialization_disabled(self, test_app):
+        @test_app.task(type_hint_serialization=False)
+        def echo(value: typing.Any):
+            return value
+
+        results = echo.apply_async_many([((1,), None), ((2,), None)])
+        assert [result.get() for result in results] == [1, 2]
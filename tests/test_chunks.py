@@ -0,0 +1,72 @@
+import datetime
+import json
+import typing
+
+import pytest
+
+from celery_typed_tasks.chunks import Chunk
+from celery_typed_tasks.results import ChunkedGroupResult
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+def make_dogs(count):
+    return (Dog(name=f"dog-{index}", dob=dob) for index in range(count))
+
+
+@pytest.fixture
+def walk(test_app):
+    @test_app.task(type_hint_chunk=Chunk("dogs", max_items=4))
+    def walk(leader: Dog, dogs: typing.List[Dog]) -> typing.List[str]:
+        return [f"{leader.name} walks {dog.name}" for dog in dogs]
+
+    return walk
+
+
+class TestChunk:
+    def test_requires_a_limit(self):
+        with pytest.raises(ValueError):
+            Chunk("dogs")
+
+    def test_split_items(self, test_app, walk):
+        codec = walk._compiler.get_codec(typing.List[Dog])
+        chunks = list(Chunk("dogs", max_items=4).split(make_dogs(10), codec, "json"))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert chunks[0][0] == {"name": "dog-0", "dob": dob.isoformat()}
+
+    def test_split_bytes(self, walk):
+        codec = walk._compiler.get_codec(typing.List[Dog])
+        item_size = len(json.dumps(codec.dump([Dog(name="dog-0", dob=dob)])[0])) + 1
+        chunk = Chunk("dogs", max_bytes=item_size * 3)
+        chunks = list(chunk.split(make_dogs(7), codec, "json"))
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+
+    def test_only_lists(self, walk):
+        codec = walk._compiler.get_codec(Dog)
+        with pytest.raises(TypeError):
+            list(Chunk("dogs", max_items=1).split([], codec, "json"))
+
+
+class TestChunkedTask:
+    def test_fan_out(self, walk, mocker):
+        leader = Dog(name="Gus", dob=dob)
+        dump_spy = mocker.spy(walk, "_dump_obj")
+        result = walk.delay(leader, make_dogs(10))
+        assert isinstance(result, ChunkedGroupResult)
+        assert len(result.results) == 3
+        assert len({child.id for child in result.results}) == 3
+        assert result.get() == [f"Gus walks dog-{index}" for index in range(10)]
+        # the leader is dumped once, not once per chunk
+        assert dump_spy.call_count == 2
+
+    def test_keyword(self, walk):
+        leader = Dog(name="Gus", dob=dob)
+        result = walk.apply_async(kwargs={"leader": leader, "dogs": list(make_dogs(5))})
+        assert len(result.results) == 2
+        assert len(result.get()) == 5
+
+    def test_empty(self, walk):
+        result = walk.delay(Dog(name="Gus", dob=dob), [])
+        assert len(result.results) == 1
+        assert result.get() == []
@@ -0,0 +1,144 @@
+import base64
+import datetime
+import json
+import typing
+import uuid
+
+import pytest
+from celery import Celery
+from kombu import serialization
+
+import celery_typed_tasks
+from celery_typed_tasks.cli import CHUNK_ITEMS
+from celery_typed_tasks.cli import main
+from example import Dog
+
+app = Celery("cli", task_cls=celery_typed_tasks.TypedTask)
+
+
+@app.task(shared=False)
+def walk(dogs: typing.List[Dog], at: datetime.datetime) -> int:
+    return len(dogs)
+
+
+@app.task(shared=False)
+def fetch(key: uuid.UUID, tags: typing.List[str]): ...
+
+
+@app.task(shared=False, type_hint_serialization=False)
+def untyped(value): ...
+
+
+APP = "tests.test_cli:app"
+dob = "2020-01-01T00:00:00"
+
+
+def write_lines(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+def kombu_message(task, args, kwargs):
+    """
+    A message as the redis transport stores it.
+    """
+    content_type, encoding, body = serialization.dumps(
+        [args, kwargs, {"callbacks": None}], "json"
+    )
+    return {
+        "body": base64.b64encode(body.encode("utf-8")).decode("ascii"),
+        "content-encoding": encoding,
+        "content-type": content_type,
+        "headers": {"task": task.name, "id": "1"},
+        "properties": {"body_encoding": "base64"},
+    }
+
+
+class TestTasks:
+    def test_text(self, capsys):
+        assert main(["tasks", APP]) == 0
+        out = capsys.readouterr().out
+        assert f"{walk.name} (json)" in out
+        assert (
+            "  dogs: typing.List[example.Dog]\n"
+            "    list[dataclass example.Dog{name: passthrough, dob: datetime}]\n"
+        ) in out
+        assert "  return: int\n" in out
+        assert untyped.name not in out
+        assert "celery." not in out
+
+    def test_json(self, capsys):
+        main(["tasks", APP, "--json"])
+        described = {task["task"]: task for task in json.loads(capsys.readouterr().out)}
+        assert described[fetch.name]["parameters"] == {
+            "key": {"annotation": "uuid.UUID", "codec": "uuid"},
+            "tags": {"annotation": "typing.List[str]", "codec": "list[passthrough]"},
+            "return": {"annotation": "-", "codec": "passthrough"},
+        }
+
+
+class TestProfile:
+    def test_kombu_messages(self, capsys, tmp_path):
+        args = [[{"name": "Fido", "dob": dob}], dob]
+        path = write_lines(
+            tmp_path / "messages.jsonl",
+            [kombu_message(walk, args, {}), kombu_message(walk, args, {})],
+        )
+        main(["profile", APP, path, "--json"])
+        reports = {
+            report["parameter"]: report
+            for report in json.loads(capsys.readouterr().out)
+        }
+        assert set(reports) == {"dogs", "at"}
+        dogs = reports["dogs"]
+        assert dogs["task"] == walk.name
+        assert dogs["calls"] == 2
+        assert dogs["errors"] == 0
+        assert dogs["max_bytes"] == len(json.dumps(args[0]))
+        assert dogs["max_items"] == 1
+        assert dogs["codec"].startswith("list[dataclass example.Dog")
+        assert dogs["hints"] == [
+            "typed-msgpack: datetimes, UUIDs and Decimals travel as strings"
+        ]
+
+    def test_simple_messages(self, capsys, tmp_path):
+        records = [
+            {"task": fetch.name, "args": [str(uuid.uuid4())]},
+            {"task": fetch.name, "args": ["not a uuid"], "kwargs": {"tags": []}},
+            {"task": "unknown", "args": [1]},
+        ]
+        main(["profile", APP, write_lines(tmp_path / "messages.jsonl", records)])
+        out = capsys.readouterr().out
+        assert out.splitlines()[0].split() == [
+            "task",
+            "parameter",
+            "calls",
+            "mean",
+            "size",
+            "max",
+            "size",
+            "mean",
+            "decode",
+        ]
+        assert f"{fetch.name}.key: uuid\n  1 of 2 calls failed to decode" in out
+        assert "unknown" not in out
+
+    def test_size_hints(self, capsys, tmp_path):
+        dogs = [{"name": "Fido", "dob": dob}] * CHUNK_ITEMS
+        records = [{"task": walk.name, "args": [dogs], "kwargs": {"at": dob}}]
+        main(["profile", APP, write_lines(tmp_path / "messages.jsonl", records)])
+        out = capsys.readouterr().out
+        assert f"chunk: up to {CHUNK_ITEMS} items per message" in out
+        assert "columnar: every row repeats the field names" in out
+        assert "offload" not in out
+
+    def test_stdin(self, capsys, monkeypatch):
+        line = json.dumps({"task": fetch.name, "kwargs": {"tags": ["a", "b"]}})
+        monkeypatch.setattr("sys.stdin", [line + "\n"])
+        main(["profile", APP, "-", "--json"])
+        (report,) = json.loads(capsys.readouterr().out)
+        assert (report["parameter"], report["max_items"]) == ("tags", 2)
+
+    def test_unknown_command(self):
+        with pytest.raises(SystemExit):
+            main(["walk", APP])
@@ -0,0 +1,346 @@
+import concurrent.futures
+import datetime
+import decimal
+import enum
+import json
+import sys
+import time
+import typing
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+
+import pytest
+
+import celery_typed_tasks
+from celery_typed_tasks.codecs import Compiler
+from celery_typed_tasks.codecs import FieldTable
+from example import Dog
+
+
+@dataclass
+class Node:
+    name: str
+    children: typing.List["Node"] = field(default_factory=list)
+
+
+@dataclass
+class Point:
+    __slots__ = ("x", "y")
+    x: int
+    y: int
+
+
+@dataclass(frozen=True)
+class Walk:
+    dog: Dog
+    distance: float
+    minutes: int = field(init=False)
+    post_init_calls: typing.ClassVar[int] = 0
+
+    def __post_init__(self):
+        Walk.post_init_calls += 1
+        object.__setattr__(self, "minutes", int(self.distance * 20))
+
+
+class Size(enum.Enum):
+    SMALL = "s"
+    LARGE = "l"
+
+
+class Cat(typing.NamedTuple):
+    name: str
+
+
+try:
+    from typing import TypedDict
+except ImportError:  # pragma: no cover
+    TypedDict = None
+else:
+
+    class Vet(TypedDict):
+        name: str
+        visited: datetime.datetime
+
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+def round_trip(value, annotation):
+    task = celery_typed_tasks.TypedTask()
+    return task._load_obj(
+        json.loads(json.dumps(task._dump_obj(value, annotation))), annotation
+    )
+
+
+class TestCompiler:
+    def test_codec_is_cached_per_annotation(self):
+        compiler = Compiler(celery_typed_tasks.TypedTask())
+        codec = compiler.get_codec(typing.List[Dog])
+        assert compiler.get_codec(typing.List[Dog]) is codec
+        assert codec.kind == "list"
+        assert codec.children[0] is compiler.get_codec(Dog)
+
+    def test_annotation_is_compiled_once(self, mocker):
+        compile_spy = mocker.spy(Compiler, "compile")
+        task = celery_typed_tasks.TypedTask()
+        dogs = [Dog(name="Bruce", dob=datetime.datetime(2020, 1, 1))] * 3
+        for _ in range(3):
+            task._load_obj(task._dump_obj(dogs, typing.List[Dog]), typing.List[Dog])
+        # List[Dog], Dog, str, datetime
+        assert compile_spy.call_count == 4
+
+    def test_custom_hooks_are_the_fallback_leaf(self, mocker):
+        task = celery_typed_tasks.TypedTask()
+        dump_obj = mocker.patch.object(task, "dump_obj", return_value="dumped")
+        load_obj = mocker.patch.object(task, "load_obj", return_value="loaded")
+        task._compiler = Compiler(task)
+        assert task._dump_obj([object()], typing.List[object]) == ["dumped"]
+        assert task._load_obj(["raw"], typing.List[object]) == ["loaded"]
+        dump_obj.assert_called_once()
+        load_obj.assert_called_once_with("raw", object)
+
+    def test_concurrent_compiles(self, mocker):
+        compile = Compiler.compile
+
+        def slow_compile(compiler, annotation):
+            if annotation is Dog:
+                # widen the window where other threads want the same codec
+                time.sleep(0.01)
+            return compile(compiler, annotation)
+
+        mocker.patch.object(Compiler, "compile", slow_compile)
+        task = celery_typed_tasks.TypedTask()
+        dog = Dog(name="Bruce", dob=dob)
+        annotations = [typing.List[Dog], Dog] * 4
+
+        def dump(annotation):
+            value = [dog] if annotation is not Dog else dog
+            return task._dump_obj(value, annotation)
+
+        with concurrent.futures.ThreadPoolExecutor(len(annotations)) as executor:
+            dumped = list(executor.map(dump, annotations))
+        assert dumped[:2] == [
+            [{"name": "Bruce", "dob": dob.isoformat()}],
+            {"name": "Bruce", "dob": dob.isoformat()},
+        ]
+        assert task._compiler.get_codec(Dog).kind == "dataclass"
+
+
+class TestDataclass:
+    def test_recursive_dataclass(self):
+        task = celery_typed_tasks.TypedTask()
+        tree = Node(name="root", children=[Node(name="leaf")])
+        dumped = task._dump_obj(tree, Node)
+        assert dumped == {
+            "name": "root",
+            "children": [{"name": "leaf", "children": []}],
+        }
+        assert task._load_obj(dumped, Node) == tree
+
+    def test_field_table_is_built_once_per_class(self, mocker):
+        get_type_hints_spy = mocker.spy(typing, "get_type_hints")
+        FieldTable._tables.pop(Dog, None)
+        task = celery_typed_tasks.TypedTask()
+        dogs = [Dog(name=str(i), dob=datetime.datetime(2020, 1, 1)) for i in range(10)]
+        assert (
+            task._load_obj(task._dump_obj(dogs, typing.List[Dog]), typing.List[Dog])
+            == dogs
+        )
+        assert get_type_hints_spy.call_count == 1
+
+    def test_slots(self):
+        task = celery_typed_tasks.TypedTask()
+        assert task._dump_obj(Point(1, 2), Point) == {"x": 1, "y": 2}
+        assert task._load_obj({"x": 1, "y": 2}, Point) == Point(1, 2)
+
+    def test_init_false_fields(self):
+        task = celery_typed_tasks.TypedTask()
+        walk = Walk(
+            dog=Dog(name="Gus", dob=datetime.datetime(2020, 1, 1)), distance=1.5
+        )
+        dumped = task._dump_obj(walk, Walk)
+        assert dumped["minutes"] == 30
+        assert task._load_obj(dumped, Walk) == walk
+
+
+class TestSkipInit:
+    @pytest.fixture
+    def task(self):
+        class SkipInitTask(celery_typed_tasks.TypedTask):
+            type_hint_skip_init = True
+
+        return SkipInitTask()
+
+    def test_post_init_is_skipped(self, task):
+        walk = Walk(
+            dog=Dog(name="Gus", dob=datetime.datetime(2020, 1, 1)), distance=1.5
+        )
+        dumped = task._dump_obj(walk, Walk)
+        post_init_calls = Walk.post_init_calls
+        loaded = task._load_obj(dumped, Walk)
+        assert loaded == walk
+        assert isinstance(loaded.dog.dob, datetime.datetime)
+        assert Walk.post_init_calls == post_init_calls
+
+    def test_slots(self, task):
+        assert task._load_obj({"x": 1, "y": 2}, Point) == Point(1, 2)
+
+    def test_missing_fields_take_defaults(self, task):
+        assert task._load_obj({"name": "root"}, Node) == Node(name="root")
+
+    def test_setting(self, test_app_factory):
+        app = test_app_factory()
+        app.conf.task_type_hint_skip_init = True
+
+        @app.task
+        def walk(walk: Walk):
+            return walk
+
+        assert walk.type_hint_skip_init is True
+
+
+class TestBatch:
+    def test_list_of_scalars_converts_in_one_pass(self):
+        compiler = Compiler(celery_typed_tasks.TypedTask())
+        codec = compiler.get_codec(typing.List[datetime.datetime])
+        item = codec.children[0]
+        assert codec.dump is item.dump_many
+        assert codec.load is item.load_many
+
+    @pytest.mark.parametrize(
+        "annotation, values",
+        [
+            (
+                typing.List[datetime.datetime],
+                [datetime.datetime(2022, 1, i) for i in range(1, 10)],
+            ),
+            (
+                typing.List[datetime.date],
+                [datetime.date(2022, 1, i) for i in range(1, 10)],
+            ),
+            (typing.List[datetime.time], [datetime.time(i, 30) for i in range(10)]),
+            (typing.Set[uuid.UUID], {uuid.uuid4() for _ in range(10)}),
+            (typing.List[decimal.Decimal], [decimal.Decimal(i) / 3 for i in range(10)]),
+        ],
+    )
+    def test_round_trip(self, annotation, values):
+        task = celery_typed_tasks.TypedTask()
+        dumped = task._dump_obj(values, annotation)
+        assert all(isinstance(value, str) for value in dumped)
+        assert task._load_obj(dumped, annotation) == values
+
+    def test_mixed_values_fall_back(self):
+        task = celery_typed_tasks.TypedTask()
+        values = [datetime.date(2022, 1, 1), datetime.datetime(2022, 1, 1, 12)]
+        assert task._dump_obj(values, typing.List[datetime.datetime]) == [
+            "2022-01-01",
+            "2022-01-01T12:00:00",
+        ]
+
+    def test_iterator(self):
+        task = celery_typed_tasks.TypedTask()
+        ids = [uuid.uuid4() for _ in range(3)]
+        assert task._dump_obj(iter(ids), typing.List[uuid.UUID]) == [
+            str(id) for id in ids
+        ]
+
+
+class TestTypingConstructs:
+    @pytest.mark.parametrize(
+        "annotation, value",
+        [
+            (typing.Optional[Dog], Dog(name="Gus", dob=dob)),
+            (typing.Optional[Dog], None),
+            (typing.Union[Dog, datetime.date, None], dob.date()),
+            (typing.Union[Dog, datetime.date], Dog(name="Gus", dob=dob)),
+            (typing.Union[typing.List[Dog], Size], [Dog(name="Gus", dob=dob)]),
+            (typing.Dict[str, Dog], {"gus": Dog(name="Gus", dob=dob)}),
+            (typing.Dict[int, datetime.datetime], {1: dob, 2: dob}),
+            (typing.Dict[datetime.date, int], {dob.date(): 1}),
+            (typing.Tuple[Dog, datetime.datetime], (Dog(name="Gus", dob=dob), dob)),
+            (typing.Tuple[datetime.datetime, ...], (dob, dob)),
+            (typing.Tuple[int, str], (1, "one")),
+            (tuple, (1, "one")),
+            (Size, Size.LARGE),
+            (typing.List[Size], [Size.SMALL, Size.LARGE]),
+            (typing.Any, {"any": ["thing"]}),
+        ],
+    )
+    def test_round_trip(self, annotation, value):
+        loaded = round_trip(value, annotation)
+        assert loaded == value
+        assert type(loaded) is type(value)
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="requires X | Y unions")
+    def test_union_operator(self):
+        annotation = eval("Dog | None")
+        assert round_trip(Dog(name="Gus", dob=dob), annotation) == Dog(
+            name="Gus", dob=dob
+        )
+
+    def test_union_tag(self):
+        task = celery_typed_tasks.TypedTask()
+        annotation = typing.Union[Dog, datetime.date]
+        assert task._dump_obj(dob.date(), annotation) == [1, "2020-01-01"]
+        # datetime is a subclass of the date member
+        assert task._dump_obj(dob, annotation) == [1, dob.isoformat()]
+        with pytest.raises(TypeError):
+            task._dump_obj(Cat("Tom"), annotation)
+
+    def test_union_numeric_tower(self):
+        task = celery_typed_tasks.TypedTask()
+        annotation = typing.Union[float, datetime.date]
+        # an int is acceptable where a float is annotated
+        assert task._dump_obj(3, annotation) == [0, 3]
+        assert round_trip(3, annotation) == 3
+        assert task._dump_obj(True, annotation) == [0, True]
+        assert task._dump_obj(2, typing.Union[complex, Dog]) == [0, 2]
+        with pytest.raises(TypeError):
+            task._dump_obj(1.5, typing.Union[int, datetime.date])
+
+    @pytest.mark.skipif(TypedDict is None, reason="requires typing.TypedDict")
+    def test_union_typeddict(self):
+        task = celery_typed_tasks.TypedTask()
+        annotation = typing.Union[Vet, Dog]
+        vet = {"name": "Dr. Pol", "visited": dob}
+        assert task._dump_obj(vet, annotation) == [
+            0,
+            {"name": "Dr. Pol", "visited": dob.isoformat()},
+        ]
+        assert round_trip(vet, annotation) == vet
+        assert round_trip(Dog(name="Gus", dob=dob), annotation) == Dog(
+            name="Gus", dob=dob
+        )
+
+    def test_unions_without_conversion_are_untagged(self):
+        task = celery_typed_tasks.TypedTask()
+        assert task._dump_obj(1, typing.Union[int, str]) == 1
+        assert task._compiler.get_codec(typing.Optional[int]).kind == "passthrough"
+
+    def test_dict_converts_only_what_needs_it(self):
+        compiler = Compiler(celery_typed_tasks.TypedTask())
+        assert compiler.get_codec(typing.Dict[str, int]).kind == "passthrough"
+        assert compiler.get_codec(typing.Dict[str, Dog]).kind == "dict"
+        assert compiler.get_codec(typing.Dict).kind == "passthrough"
+
+    @pytest.mark.skipif(TypedDict is None, reason="requires typing.TypedDict")
+    def test_typeddict(self):
+        vet = {"name": "Dr. Pol", "visited": dob}
+        task = celery_typed_tasks.TypedTask()
+        assert task._dump_obj(vet, Vet) == {
+            "name": "Dr. Pol",
+            "visited": dob.isoformat(),
+        }
+        assert round_trip(vet, Vet) == vet
+
+    def test_task(self, test_app):
+        @test_app.task
+        def adopt(
+            dogs: typing.Dict[str, Dog], size: typing.Optional[Size] = None
+        ) -> typing.Optional[Dog]:
+            return dogs.get(size.value if size else "s")
+
+        gus = Dog(name="Gus", dob=dob)
+        assert adopt.delay({"l": gus}, Size.LARGE).get() == gus
+        assert adopt.delay({"l": gus}).get() is None
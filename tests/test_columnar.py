@@ -0,0 +1,123 @@
+import dataclasses
+import datetime
+import json
+import typing
+
+import pytest
+
+from celery_typed_tasks import Columnar
+from celery_typed_tasks.codecs import COLUMNS
+from celery_typed_tasks.codecs import FieldTable
+from example import Dog
+
+Annotated = getattr(typing, "Annotated", None)
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+@dataclasses.dataclass
+class Kennel:
+    name: str
+    dogs: typing.List[Dog] = dataclasses.field(default_factory=list)
+    capacity: int = dataclasses.field(default=10, init=False)
+
+
+class TestColumnar:
+    def test_dump(self, test_app):
+        @test_app.task(type_hint_columnar=True)
+        def walk(dogs: typing.List[Dog]): ...
+
+        assert walk._dump_obj(dogs, typing.List[Dog]) == {
+            COLUMNS: {
+                "name": ["Bruce", "Gus", "Rex"],
+                "dob": [dob.isoformat()] * 3,
+            }
+        }
+        assert walk._dump_obj([], typing.List[Dog]) == []
+
+    def test_smaller_payload(self, test_app):
+        @test_app.task(type_hint_columnar=True)
+        def walk(dogs: typing.List[Dog]): ...
+
+        many = dogs * 100
+        columnar = json.dumps(walk._dump_obj(many, typing.List[Dog]))
+        rows = json.dumps(
+            walk._compiler.get_codec(typing.List[Dog]).children[0].dump(many)
+        )
+        assert len(columnar) < len(rows) * 0.7
+
+    def test_roundtrip(self, test_app, mocker):
+        init_spy = mocker.spy(FieldTable, "init")
+
+        @test_app.task(type_hint_columnar=True)
+        def walk(dogs: typing.List[Dog]) -> typing.List[Dog]:
+            assert dogs == [Dog(name=dog.name, dob=dob) for dog in dogs]
+            return dogs
+
+        assert walk.delay(dogs).get() == dogs
+        # instances are built positionally, without a dict per row
+        init_spy.assert_not_called()
+
+    def test_loads_rows(self, test_app):
+        @test_app.task(type_hint_columnar=True)
+        def walk(dogs: typing.List[Dog]): ...
+
+        rows = [{"name": dog.name, "dob": dob.isoformat()} for dog in dogs]
+        assert walk._load_obj(rows, typing.List[Dog]) == dogs
+
+    def test_skip_init(self, test_app):
+        @test_app.task(type_hint_columnar=True, type_hint_skip_init=True)
+        def walk(kennels: typing.List[Kennel]) -> typing.List[Kennel]:
+            return kennels
+
+        kennels = [Kennel(name="North", dogs=dogs), Kennel(name="South")]
+        assert walk.delay(kennels).get() == kennels
+
+    def test_init_false_field(self, test_app):
+        @test_app.task(type_hint_columnar=True)
+        def walk(kennels: typing.List[Kennel]) -> typing.List[Kennel]:
+            return kennels
+
+        kennels = [Kennel(name="North", dogs=dogs), Kennel(name="South")]
+        assert walk.delay(kennels).get() == kennels
+
+    def test_disabled(self, test_app):
+        @test_app.task
+        def walk(dogs: typing.List[Dog]): ...
+
+        assert walk._dump_obj(dogs, typing.List[Dog])[0] == {
+            "name": "Bruce",
+            "dob": dob.isoformat(),
+        }
+
+    def test_native(self, test_app):
+        @test_app.task(type_hint_columnar=True, type_hint_serialization="typed-msgpack")
+        def walk(dogs: typing.List[Dog]) -> typing.List[Dog]:
+            return dogs
+
+        dumped = walk._dump_native_obj(dogs, typing.List[Dog])
+        assert dumped[COLUMNS]["dob"] == [dob] * 3
+        assert walk.delay(dogs).get() == dogs
+
+
+@pytest.mark.skipif(Annotated is None, reason="requires typing.Annotated")
+class TestColumnarMarker:
+    def test_marker(self, test_app):
+        @test_app.task
+        def walk(
+            dogs: Annotated[typing.List[Dog], Columnar()], others: typing.List[Dog]
+        ) -> int:
+            return len(dogs) + len(others)
+
+        annotation = Annotated[typing.List[Dog], Columnar()]
+        assert COLUMNS in walk._dump_obj(dogs, annotation)
+        assert isinstance(walk._dump_obj(dogs, typing.List[Dog]), list)
+        assert walk.delay(dogs, dogs).get() == 6
+
+    def test_ignores_other_lists(self, test_app):
+        @test_app.task
+        def total(values: Annotated[typing.List[int], Columnar()]) -> int:
+            return sum(values)
+
+        assert total.delay([1, 2, 3]).get() == 6
@@ -23,7 +23,6 @@ class TestSerde:
     @pytest.mark.parametrize(
         "obj, value",
         dict(
-            none_obj=None,
             uuid_obj=uuid.uuid4(),
             decimal_obj=decimal.Decimal(1),
             datetime_obj=datetime.datetime(year=2022, month=1, day=20),
@@ -46,6 +45,18 @@ class TestSerde:
         assert load_obj_spy.call_count == 1
         assert dump_obj_spy.call_count == 1
 
+    @pytest.mark.parametrize("obj", ["none_obj", "uuid_obj", "dataclass_obj"])
+    def test_none_default(self, mocker, obj):
+        load_obj_spy = mocker.spy(celery_typed_tasks.core.TypedTask, "_load_obj")
+        dump_obj_spy = mocker.spy(celery_typed_tasks.core.TypedTask, "_dump_obj")
+        kwargs = {}
+        kwargs[obj] = None
+        all_objs = all_objs_task.delay(**kwargs).get()
+        assert all_objs[obj] is None
+        # parameters that default to None skip their codec for None
+        assert load_obj_spy.call_count == 0
+        assert dump_obj_spy.call_count == 0
+
     @pytest.mark.parametrize(
         "obj, value",
         dict(
@@ -59,11 +70,10 @@ class TestSerde:
         kwargs[obj] = value
         all_objs = all_objs_task.delay(**kwargs).get()
         assert all_objs[obj] == value
-        # 1 to get the whole payload
-        # 2 for deserializing the 2 fields on the Dog class
-        # 3 total
-        assert load_obj_spy.call_count == 3
-        assert dump_obj_spy.call_count == 3
+        # 1 to get the whole payload, the fields on the Dog class are
+        # handled by the compiled codec
+        assert load_obj_spy.call_count == 1
+        assert dump_obj_spy.call_count == 1
 
     @pytest.mark.parametrize(
         "obj, value",
@@ -78,13 +88,10 @@ class TestSerde:
         kwargs[obj] = value
         all_objs = all_objs_task.delay(**kwargs).get()
         assert all_objs[obj] == value
-        # 1 to get the whole payload
-        # 3 for each dog
-        #   1 for the dog obj
-        #   2 for each field
-        # 7 total
-        assert load_obj_spy.call_count == 7
-        assert dump_obj_spy.call_count == 7
+        # 1 to get the whole payload, each dog and its fields are
+        # handled by the compiled codec
+        assert load_obj_spy.call_count == 1
+        assert dump_obj_spy.call_count == 1
 
     @pytest.mark.parametrize(
         "obj, value",
@@ -115,11 +122,10 @@ class TestSerde:
         kwargs[obj] = value
         all_objs = all_objs_task.delay(**kwargs).get()
         assert all_objs[obj] == value
-        # 1 to get the whole payload
-        # 2 for deserializing each set item in the list and set
-        # 3 total
-        assert load_obj_spy.call_count == 3
-        assert dump_obj_spy.call_count == 3
+        # 1 to get the whole payload, each set item is
+        # handled by the compiled codec
+        assert load_obj_spy.call_count == 1
+        assert dump_obj_spy.call_count == 1
 
 
 class TestAllObjsTypeHintSerializationDisabled:
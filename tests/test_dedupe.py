@@ -0,0 +1,134 @@
+import dataclasses
+import datetime
+import typing
+
+import pytest
+from celery import group
+
+from celery_typed_tasks.dedupe import SHARED
+from celery_typed_tasks.dedupe import GroupEncoder
+from celery_typed_tasks.dedupe import SharedCache
+from celery_typed_tasks.offload import MemoryBlobStore
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+@dataclasses.dataclass
+class Config:
+    started: datetime.datetime
+    leaders: typing.List[Dog]
+
+
+config = Config(started=dob, leaders=[Dog(name="Gus", dob=dob)] * 10)
+
+
+@pytest.fixture
+def store():
+    return MemoryBlobStore()
+
+
+@pytest.fixture
+def memory_app(memory_app, store):
+    memory_app.conf.task_type_hint_blob_store = store
+    return memory_app
+
+
+def decode(messages):
+    return [message.decode() for message in messages]
+
+
+class TestGroupDedupe:
+    def test_shared_argument_is_dumped_once(self, memory_app, consume, store, mocker):
+        @memory_app.task(type_hint_dedupe=True)
+        def walk(config: Config, dog: Dog) -> str:
+            return f"{config.leaders[0].name} walks {dog.name}"
+
+        dump_spy = mocker.spy(walk, "_dump_obj")
+        names = ["Bruce", "Rex", "Spot"]
+        group(walk.s(config, Dog(name=name, dob=dob)) for name in names).apply_async()
+        # config inline, config again when it repeats, and each dog
+        assert dump_spy.call_count == 5
+
+        bodies = decode(consume(len(names)))
+        first, second, third = (args for args, _, _ in bodies)
+        assert first[0]["started"] == dob.isoformat()
+        assert second[0][SHARED] == third[0][SHARED]
+        assert len(store.blobs) == 1
+
+        # the worker loads the shared config once
+        load_spy = mocker.spy(walk, "_load_obj")
+        results = [walk.apply(args=args).get() for args, _, _ in bodies]
+        assert results == [f"Gus walks {name}" for name in names]
+        # config twice, inline and shared, and each dog
+        assert load_spy.call_count == 5
+
+    def test_disabled(self, memory_app, consume, store):
+        @memory_app.task
+        def walk(config: Config, dog: Dog): ...
+
+        group(walk.s(config, Dog(name=name, dob=dob)) for name in "ab").apply_async()
+        bodies = decode(consume(2))
+        assert all(SHARED not in args[0] for args, _, _ in bodies)
+        assert not store.blobs
+
+    def test_without_a_store(self, memory_app, consume, mocker):
+        memory_app.conf.task_type_hint_blob_store = None
+
+        @memory_app.task(type_hint_dedupe=True)
+        def walk(config: Config, dog: Dog): ...
+
+        dump_spy = mocker.spy(walk, "_dump_obj")
+        group(walk.s(config, Dog(name=name, dob=dob)) for name in "ab").apply_async()
+        assert dump_spy.call_count == 4
+        bodies = decode(consume(2))
+        assert bodies[0][0][0] == bodies[1][0][0]
+
+    def test_interleaved_groups(self, memory_app, consume, store):
+        @memory_app.task(type_hint_dedupe=True)
+        def walk(config: Config, dog: Dog): ...
+
+        other = dataclasses.replace(config, started=datetime.datetime(2021, 1, 1))
+        for name in "abc":
+            dog = Dog(name=name, dob=dob)
+            walk.apply_async((config, dog), group_id="first")
+            walk.apply_async((other, dog), group_id="second")
+        consume(6)
+        # each group's config is stored once
+        assert len(store.blobs) == 2
+
+    def test_distinct_arguments_are_not_kept(self, store):
+        dumps = []
+
+        def convert(obj, annotation):
+            dumps.append(obj)
+            return {"name": getattr(obj, "name", None)}
+
+        encoder = GroupEncoder("group", store, "json", None, max_entries=10)
+        dedupe = encoder.wrap(convert)
+        for index in range(100):
+            dedupe(config, Config)
+            assert dedupe(Dog(name=str(index), dob=dob), Dog) == {"name": str(index)}
+        assert len(encoder) == 10
+        # the repeated config stays, the dumped dogs aren't kept
+        assert dumps.count(config) == 2
+        assert len(store.blobs) == 1
+
+
+class TestSharedCache:
+    def test_least_recently_used_is_evicted(self, store):
+        cache = SharedCache(maxsize=1)
+        load = lambda obj, annotation: obj  # noqa: E731
+        store.put("a", b"1")
+        store.put("b", b"2")
+        ref = {
+            "content_type": "application/json",
+            "content_encoding": "utf-8",
+            "compression": None,
+        }
+        assert cache.load(store, {SHARED: "a", **ref}, int, load) == 1
+        store.delete("a")
+        assert cache.load(store, {SHARED: "a", **ref}, int, load) == 1
+        assert cache.load(store, {SHARED: "b", **ref}, int, load) == 2
+        with pytest.raises(KeyError):
+            cache.load(store, {SHARED: "a", **ref}, int, load)
@@ -0,0 +1,136 @@
+import dataclasses
+import datetime
+import typing
+
+import pytest
+
+from example import Dog
+
+try:
+    from typing import TypedDict
+except ImportError:  # pragma: no cover
+    TypedDict = None
+else:
+
+    class Plain(TypedDict):
+        a: int
+        b: str
+
+    class Dated(TypedDict):
+        a: int
+        at: datetime.datetime
+
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+@dataclasses.dataclass
+class Pack:
+    leader: Dog
+    dogs: typing.List[Dog]
+    tags: typing.Dict[str, int] = dataclasses.field(default_factory=dict)
+    rank: typing.Optional[typing.Union[int, str]] = None
+
+
+class TestEagerModes:
+    def test_roundtrip(self, test_app, mocker):
+        @test_app.task
+        def walk(dogs: typing.List[Dog]) -> typing.List[Dog]:
+            return dogs
+
+        dump_spy = mocker.spy(walk, "_dump_obj")
+        assert walk.delay(dogs).get() == dogs
+        dump_spy.assert_called_once()
+
+    def test_passthrough(self, test_app, mocker):
+        @test_app.task(type_hint_eager="passthrough")
+        def walk(dogs: typing.List[Dog]) -> typing.List[Dog]:
+            assert dogs is received
+            return dogs
+
+        received = list(dogs)
+        dump_spy = mocker.spy(walk, "_dump_obj")
+        load_spy = mocker.spy(walk, "_load_obj")
+        assert walk.delay(received).get() is received
+        dump_spy.assert_not_called()
+        load_spy.assert_not_called()
+
+    def test_copy(self, test_app):
+        @test_app.task(type_hint_eager="copy")
+        def walk(pack: Pack) -> Pack:
+            pack.dogs.append(pack.leader)
+            pack.tags["walked"] = 1
+            return pack
+
+        pack = Pack(leader=dogs[0], dogs=list(dogs))
+        walked = walk.delay(pack).get()
+        assert walked.dogs == dogs + [dogs[0]]
+        assert pack.dogs == dogs
+        assert pack.tags == {}
+        assert walked.leader is not pack.leader
+        # immutable values are shared
+        assert walked.leader.dob is pack.leader.dob
+
+    def test_validate(self, test_app):
+        @test_app.task(type_hint_eager="validate")
+        def walk(pack: Pack) -> int:
+            return len(pack.dogs)
+
+        pack = Pack(leader=dogs[0], dogs=list(dogs), tags={"a": 1}, rank="alpha")
+        assert walk.delay(pack).get() == 3
+
+        with pytest.raises(TypeError):
+            walk.delay(Pack(leader=dogs[0], dogs=[dogs[0], "Gus"]))
+        with pytest.raises(TypeError):
+            walk.delay(Pack(leader=dogs[0], dogs=[], tags={"a": "b"}))
+        with pytest.raises(TypeError):
+            walk.delay(Pack(leader=dogs[0], dogs=[], rank=1.5))
+
+    def test_validate_scalars(self, test_app):
+        @test_app.task(type_hint_eager="validate")
+        def alert(
+            timestamp: datetime.datetime, level: float, note: typing.Optional[str]
+        ) -> float:
+            return level
+
+        assert alert.delay(dob, 1, None).get() == 1
+        with pytest.raises(TypeError):
+            alert.delay(dob.isoformat(), 1.0, None)
+
+    @pytest.mark.skipif(TypedDict is None, reason="requires typing.TypedDict")
+    def test_validate_typeddict(self, test_app):
+        @test_app.task(type_hint_eager="validate")
+        def count(plain: Plain, dated: Dated) -> int:
+            return plain["a"] + dated["a"]
+
+        assert count.delay({"a": 1, "b": "x"}, {"a": 2, "at": dob}).get() == 3
+        with pytest.raises(TypeError):
+            count.delay([1, "x"], {"a": 2, "at": dob})
+
+    def test_local_call(self, test_app, mocker):
+        @test_app.task(type_hint_eager="validate")
+        def walk(dogs: typing.List[Dog]) -> int:
+            return len(dogs)
+
+        load_spy = mocker.spy(walk, "_load_obj")
+        assert walk(dogs) == 3
+        load_spy.assert_not_called()
+        with pytest.raises(TypeError):
+            walk([{"name": "Bruce", "dob": dob.isoformat()}])
+
+    def test_headers(self, test_app):
+        @test_app.task(type_hint_eager="passthrough")
+        def walk(dogs: typing.List[Dog]) -> int:
+            return len(dogs)
+
+        assert walk.apply_async((dogs,), headers={"trace": "abc"}).get() == 3
+
+    def test_unknown_mode(self, test_app):
+        with pytest.raises(ValueError):
+
+            # not shared, other apps would finalize it
+            @test_app.task(type_hint_eager="fast", shared=False)
+            def walk(dogs: typing.List[Dog]): ...
+
+            walk.delay(dogs)
@@ -0,0 +1,122 @@
+import dataclasses
+import datetime
+import typing
+
+import celery
+import pytest
+
+from celery_typed_tasks import metrics
+from celery_typed_tasks.fingerprint import FINGERPRINT_HEADER
+from celery_typed_tasks.metrics import HistogramSink
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+@pytest.fixture
+def walk(test_app):
+    @test_app.task(type_hint_fingerprint=True)
+    def walk(dogs: typing.List[Dog], minutes: int) -> int:
+        assert dogs[0].dob == dob
+        return len(dogs)
+
+    return walk
+
+
+@pytest.fixture
+def apply(mocker):
+    # eager apply_async hands its options to apply
+    return mocker.spy(celery.Task, "apply")
+
+
+class TestFingerprint:
+    def test_disabled(self, test_app, apply):
+        @test_app.task
+        def walk(dogs: typing.List[Dog]): ...
+
+        walk.delay(dogs).get()
+        assert apply.call_args.kwargs.get("headers") is None
+
+    def test_header(self, walk, apply):
+        walk.delay(dogs, 30).get()
+        headers = apply.call_args.kwargs["headers"]
+        assert headers == {FINGERPRINT_HEADER: walk._get_fingerprint(False)}
+
+    def test_keeps_headers(self, walk, apply):
+        walk.apply_async((dogs, 30), headers={"trace": "abc"}).get()
+        assert apply.call_args.kwargs["headers"]["trace"] == "abc"
+        assert FINGERPRINT_HEADER in apply.call_args.kwargs["headers"]
+
+    def test_apply_async_many(self, walk, apply):
+        walk.apply_async_many([((dogs, 30), None), ((dogs[:1], 5), None)])
+        assert [call.kwargs["headers"] for call in apply.call_args_list] == [
+            {FINGERPRINT_HEADER: walk._get_fingerprint(False)}
+        ] * 2
+
+    def test_trusted_load(self, walk, mocker):
+        trusted = mocker.spy(walk, "_load_trusted_obj")
+        load = mocker.spy(walk, "_load_obj")
+        walk.delay(dogs, 30).get()
+        assert trusted.call_count == 2
+        load.assert_not_called()
+
+    def test_native(self, test_app, mocker):
+        @test_app.task(
+            type_hint_fingerprint=True, type_hint_serialization="typed-msgpack"
+        )
+        def walk(dogs: typing.List[Dog]) -> int:
+            assert dogs[0].dob == dob
+            return len(dogs)
+
+        assert walk._get_fingerprint(True) != walk._get_fingerprint(False)
+        trusted = mocker.spy(walk, "_load_trusted_native_obj")
+        assert walk.delay(dogs).get() == 3
+        trusted.assert_called_once()
+
+    def test_skew(self, walk, mocker):
+        skews = []
+
+        def receiver(sender, received, expected, **kwargs):
+            skews.append((sender.name, received, expected))
+
+        metrics.type_hint_schema_skew.connect(receiver)
+        load = mocker.spy(walk, "_load_obj")
+        try:
+            args = (walk._dump_obj(dogs, typing.List[Dog]), 30)
+            walk.apply(args, headers={FINGERPRINT_HEADER: "stale"}, throw=True)
+        finally:
+            metrics.type_hint_schema_skew.disconnect(receiver)
+        assert skews == [(walk.name, "stale", walk._get_fingerprint(False))]
+        assert load.call_count == 2
+
+    def test_skew_sink(self, test_app):
+        sink = HistogramSink()
+
+        @test_app.task(type_hint_fingerprint=True, type_hint_metrics=sink)
+        def walk(dogs: typing.List[Dog]): ...
+
+        args = (walk._dump_obj(dogs, typing.List[Dog]),)
+        walk.apply(args, headers={FINGERPRINT_HEADER: "stale"}, throw=True)
+        assert sink.skews[(walk.name, "stale")] == 1
+
+    def test_schema_change(self, test_app):
+        def make_task(name: str, pet: type) -> typing.Any:
+            # the app returns registered tasks by name
+            @test_app.task(name=name, type_hint_fingerprint=True)
+            def walk_pet(pet: pet): ...  # type: ignore[valid-type]
+
+            return walk_pet
+
+        @dataclasses.dataclass
+        class Pet:
+            name: str
+
+        before = make_task("walk_pet", Pet)._get_fingerprint(False)
+        assert make_task("walk_pet_again", Pet)._get_fingerprint(False) == before
+
+        @dataclasses.dataclass  # type: ignore[no-redef]
+        class Pet:
+            nickname: str
+
+        assert make_task("walk_renamed", Pet)._get_fingerprint(False) != before
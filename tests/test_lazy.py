@@ -0,0 +1,101 @@
+import datetime
+import typing
+
+import pytest
+
+import celery_typed_tasks
+from celery_typed_tasks.codecs import FieldTable
+from celery_typed_tasks.lazy import Lazy
+from celery_typed_tasks.lazy import LazyList
+from celery_typed_tasks.lazy import unwrap
+from example import Dog
+
+Annotated = getattr(typing, "Annotated", None)
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+@pytest.fixture
+def init_spy(mocker):
+    return mocker.spy(FieldTable, "init")
+
+
+class TestLazyTask:
+    def test_list_items_decode_on_access(self, test_app, init_spy):
+        @test_app.task(type_hint_lazy=True)
+        def first_dog(dogs: typing.List[Dog]) -> Dog:
+            assert isinstance(dogs, LazyList)
+            assert len(dogs) == 3
+            assert init_spy.call_count == 0
+            assert dogs[0] is dogs[0]
+            return dogs[0]
+
+        assert first_dog.delay(dogs).get() == dogs[0]
+        # once when the task reads it and once when the result is decoded
+        assert init_spy.call_count == 2
+
+    def test_dataclass_fields_decode_on_access(self, test_app, init_spy):
+        @test_app.task(type_hint_lazy=True)
+        def name(dog: Dog) -> str:
+            assert isinstance(dog, Dog)
+            assert dog.name == "Bruce"
+            assert list(dog._values) == ["name"]
+            return dog.name
+
+        assert name.delay(dogs[0]).get() == "Bruce"
+        assert init_spy.call_count == 0
+
+    def test_proxy_materializes(self, test_app):
+        @test_app.task(type_hint_lazy=True)
+        def rename(dog: Dog) -> Dog:
+            dog.name = "Gus"
+            return dog
+
+        assert rename.delay(dogs[0]).get() == Dog(name="Gus", dob=dob)
+
+    def test_lazy_setting(self, test_app_factory):
+        app = test_app_factory()
+        app.conf.task_type_hint_lazy = True
+
+        @app.task
+        def count(dogs: typing.List[Dog]) -> int:
+            return len(dogs)
+
+        assert count.type_hint_lazy
+        assert count.delay(dogs).get() == 3
+
+    def test_scalars_stay_eager(self, test_app):
+        @test_app.task(type_hint_lazy=True)
+        def alert(counts: typing.List[int], timestamps: typing.Set[datetime.datetime]):
+            assert type(counts) is list
+            assert type(timestamps) is set
+            return len(counts) + len(timestamps)
+
+        assert alert.delay([1], {dob}).get() == 2
+
+
+@pytest.mark.skipif(Annotated is None, reason="requires typing.Annotated")
+class TestLazyMarker:
+    def test_per_parameter(self, test_app, init_spy):
+        @test_app.task
+        def walk(dogs: Annotated[typing.List[Dog], Lazy()], leader: Dog) -> str:
+            assert isinstance(dogs, LazyList)
+            assert type(leader) is Dog
+            return leader.name
+
+        assert walk.delay(dogs, dogs[1]).get() == "Gus"
+        # only the eager leader is built
+        assert init_spy.call_count == 1
+
+    def test_unwrap(self, test_app):
+        codec = celery_typed_tasks.TypedTask()._compiler.get_codec(
+            Annotated[typing.List[Dog], Lazy()]
+        )
+        raw = codec.dump(dogs)
+        lazy = codec.load(raw)
+        assert lazy == dogs
+        assert lazy[1:] == dogs[1:]
+        assert unwrap(lazy) == dogs
+        assert type(unwrap(lazy)) is list
+        assert codec.dump(lazy) == raw
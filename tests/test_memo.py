@@ -0,0 +1,219 @@
+import dataclasses
+import datetime
+import decimal
+import typing
+
+import pytest
+
+from celery_typed_tasks.memo import CacheStats
+from celery_typed_tasks.memo import LRUCache
+from celery_typed_tasks.memo import Memo
+
+since = datetime.datetime(2020, 1, 1)
+plus_one = datetime.timezone(datetime.timedelta(hours=1))
+
+
+@dataclasses.dataclass(frozen=True)
+class Flag:
+    name: str
+    since: datetime.datetime
+
+
+@dataclasses.dataclass(frozen=True)
+class Tenant:
+    id: int
+    flags: typing.Tuple[Flag, ...]
+
+
+@dataclasses.dataclass
+class Owner:
+    name: str
+
+
+@pytest.fixture
+def tenant():
+    return Tenant(id=1, flags=tuple(Flag(name=name, since=since) for name in "abc"))
+
+
+class TestLRUCache:
+    def test_evicts_by_size(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 4)
+        assert cache.get("a") == 1
+        cache.put("c", 3, 4)
+        # "b" is the least recently used
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats() == CacheStats(
+            hits=2, misses=1, evictions=1, entries=2, size=8
+        )
+
+    def test_too_large(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", 1, 11)
+        assert cache.get("a") is None
+        assert cache.size == 0
+
+
+class TestMemoize:
+    def test_encode(self, test_app, tenant):
+        memo = Memo()
+
+        @test_app.task(type_hint_memoize=memo)
+        def notify(tenant: Tenant, message: str): ...
+
+        first = notify._dump_obj(tenant, Tenant)
+        assert notify._dump_obj(tenant, Tenant) is first
+        assert first == {
+            "id": 1,
+            "flags": [{"name": name, "since": since.isoformat()} for name in "abc"],
+        }
+        stats = memo.stats()["encode"]
+        # the tenant and its flags, the second dump hits the tenant
+        assert (stats.hits, stats.misses) == (1, 4)
+        assert stats.size > 0
+
+    def test_native_encode(self, test_app, tenant):
+        memo = Memo()
+
+        @test_app.task(type_hint_memoize=memo)
+        def notify(tenant: Tenant): ...
+
+        assert (
+            notify._dump_obj(tenant, Tenant)["flags"][0]["since"] == since.isoformat()
+        )
+        assert notify._dump_native_obj(tenant, Tenant)["flags"][0]["since"] == since
+
+    def test_decode(self, test_app, tenant):
+        @test_app.task(type_hint_memoize=True)
+        def notify(tenant: Tenant) -> Tenant:
+            return tenant
+
+        assert notify.delay(tenant).get() == tenant
+        # equal payloads load as one shared instance
+        first = notify._load_obj(notify._dump_obj(tenant, Tenant), Tenant)
+        copy = dataclasses.replace(tenant)
+        assert notify._load_obj(notify._dump_obj(copy, Tenant), Tenant) is first
+        assert notify._memo.stats()["decode"].hits > 0
+
+    def test_decode_distinct_payloads(self, test_app, tenant):
+        @test_app.task(type_hint_memoize=True)
+        def notify(tenant: Tenant): ...
+
+        other = dataclasses.replace(tenant, id=2)
+        assert notify._load_obj(notify._dump_obj(other, Tenant), Tenant) == other
+        assert notify._load_obj(notify._dump_obj(tenant, Tenant), Tenant) == tenant
+
+    def test_tuples(self, test_app):
+        memo = Memo()
+
+        @test_app.task(type_hint_memoize=memo)
+        def notify(window: typing.Tuple[datetime.datetime, datetime.datetime]): ...
+
+        annotation = typing.Tuple[datetime.datetime, datetime.datetime]
+        first = notify._dump_obj((since, since), annotation)
+        # an equal tuple hits the cache
+        assert notify._dump_obj((since, since), annotation) is first
+
+    @pytest.mark.parametrize(
+        "annotation,first,second",
+        [
+            (
+                typing.Tuple[decimal.Decimal, bool],
+                (decimal.Decimal("1.0"), True),
+                (decimal.Decimal("1.00"), 1),
+            ),
+            (
+                typing.Tuple[datetime.datetime, float],
+                (datetime.datetime(2020, 1, 1, 12, tzinfo=datetime.timezone.utc), 0.0),
+                (datetime.datetime(2020, 1, 1, 13, tzinfo=plus_one), -0.0),
+            ),
+        ],
+    )
+    @pytest.mark.parametrize("native", [False, True])
+    def test_equal_values_that_dump_differently(
+        self, test_app, annotation, first, second, native
+    ):
+        @test_app.task(type_hint_memoize=True)
+        def notify(value: annotation): ...
+
+        @test_app.task
+        def plain(value: annotation): ...
+
+        assert first == second
+        for value in (first, second):
+            if native:
+                dumped = notify._dump_native_obj(value, annotation)
+                expected = plain._dump_native_obj(value, annotation)
+            else:
+                dumped = notify._dump_obj(value, annotation)
+                expected = plain._dump_obj(value, annotation)
+            assert repr(dumped) == repr(expected)
+            # equal native payloads load apart too
+            assert repr(notify._load_obj(dumped, annotation)) == repr(value)
+
+    def test_tuples_of_frozen_dataclasses(self, test_app, tenant):
+        memo = Memo()
+
+        @test_app.task(type_hint_memoize=memo)
+        def notify(pair: typing.Tuple[Tenant, int]): ...
+
+        annotation = typing.Tuple[Tenant, int]
+        first = notify._dump_obj((tenant, 1), annotation)
+        copy = dataclasses.replace(tenant)
+        assert notify._dump_obj((copy, 1), annotation) is first
+
+    def test_tuples_of_mutable_values(self, test_app):
+        @test_app.task(type_hint_memoize=True)
+        def notify(pair: typing.Tuple[typing.List[int], Owner]) -> int:
+            items, owner = pair
+            items.append(1)
+            owner.name += "!"
+            return len(items) + len(owner.name)
+
+        # each call loads its own list and owner
+        calls = [notify.delay(([], Owner(name="Josh"))).get() for _ in range(3)]
+        assert calls == [6, 6, 6]
+
+    def test_tuples_with_references(self, test_app):
+        annotation = typing.Tuple[Flag, Flag]
+
+        @test_app.task(type_hint_memoize=True, type_hint_references=True)
+        def notify(pair: annotation): ...
+
+        flag = Flag(name="a", since=since)
+        for worker in range(2):
+            dumped = notify._dump_obj((flag, flag), annotation)
+
+            # a worker that hasn't loaded the pair before
+            @test_app.task(
+                name=f"worker-{worker}",
+                shared=False,
+                type_hint_memoize=True,
+                type_hint_references=True,
+            )
+            def load(pair: annotation): ...
+
+            first, second = load._load_obj(dumped, annotation)
+            assert first == flag
+            assert first is second
+
+    def test_mutable_dataclasses(self, test_app):
+        memo = Memo()
+
+        @test_app.task(type_hint_memoize=memo)
+        def notify(owner: Owner): ...
+
+        owner = Owner(name="Josh")
+        notify._dump_obj(owner, Owner)
+        owner.name = "Bruce"
+        assert notify._dump_obj(owner, Owner) == {"name": "Bruce"}
+        assert memo.stats()["encode"].entries == 0
+
+    def test_disabled(self, test_app, tenant):
+        @test_app.task
+        def notify(tenant: Tenant): ...
+
+        assert notify._memo is None
+        assert notify._dump_obj(tenant, Tenant) is not notify._dump_obj(tenant, Tenant)
@@ -0,0 +1,104 @@
+import datetime
+import typing
+
+import pytest
+
+from celery_typed_tasks import metrics
+from celery_typed_tasks.metrics import Histogram
+from celery_typed_tasks.metrics import HistogramSink
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=name, dob=dob) for name in ["Bruce", "Gus", "Rex"]]
+
+
+@pytest.fixture
+def sink():
+    return HistogramSink()
+
+
+class TestHistogram:
+    def test_quantile(self):
+        histogram = Histogram([1, 2, 4, 8])
+        for value in [0.5, 1.5, 3, 3, 100]:
+            histogram.observe(value)
+        assert histogram.count == 5
+        assert histogram.quantile(0.5) == 4
+        assert histogram.quantile(1) == float("inf")
+
+
+class TestMetrics:
+    def test_disabled(self, test_app):
+        @test_app.task
+        def walk(dogs: typing.List[Dog]): ...
+
+        assert walk._recorder is None
+
+    def test_sink(self, test_app, sink):
+        @test_app.task(type_hint_metrics=sink, type_hint_metrics_size=True)
+        def walk(dogs: typing.List[Dog], minutes: int): ...
+
+        walk.delay(dogs, 30).get()
+        for direction in [metrics.ENCODE, metrics.DECODE]:
+            key = (walk.name, direction)
+            assert sink.histograms[key + ("seconds",)].count == 1
+            assert sink.histograms[key + ("bytes",)].total > 0
+            assert sink.histograms[key + ("items",)].total == 4
+            assert sink.codec_kinds[key + ("dataclass",)] == 1
+            assert sink.codec_kinds[key + ("datetime",)] == 1
+
+    def test_size_is_opt_in(self, test_app, sink, mocker):
+        @test_app.task(type_hint_metrics=sink)
+        def walk(dogs: typing.List[Dog]): ...
+
+        size_spy = mocker.spy(metrics.Recorder, "_size")
+        walk.delay(dogs).get()
+        # the arguments aren't serialized again to measure them
+        size_spy.assert_not_called()
+        assert (walk.name, metrics.ENCODE, "bytes") not in sink.histograms
+        assert sink.histograms[(walk.name, metrics.ENCODE, "items")].total == 3
+
+    def test_signals(self, test_app):
+        measurements = []
+
+        def receiver(sender, measurement, **kwargs):
+            measurements.append((sender, measurement))
+
+        metrics.type_hint_encoded.connect(receiver)
+        metrics.type_hint_decoded.connect(receiver)
+        try:
+
+            @test_app.task(type_hint_metrics=True)
+            def walk(dogs: typing.List[Dog]): ...
+
+            walk.delay(dogs).get()
+        finally:
+            metrics.type_hint_encoded.disconnect(receiver)
+            metrics.type_hint_decoded.disconnect(receiver)
+
+        assert [measurement.direction for _, measurement in measurements] == [
+            metrics.ENCODE,
+            metrics.DECODE,
+        ]
+        assert measurements[0][0].name == walk.name
+        assert measurements[0][1].task_name == walk.name
+
+    def test_sample_rate(self, test_app, sink, mocker):
+        @test_app.task(type_hint_metrics=sink, type_hint_metrics_sample_rate=0.5)
+        def walk(dogs: typing.List[Dog]): ...
+
+        mocker.patch.object(metrics.random, "random", side_effect=[0.9, 0.9, 0.1, 0.9])
+        walk.delay(dogs).get()
+        walk.delay(dogs).get()
+        assert sink.histograms[(walk.name, metrics.ENCODE, "seconds")].count == 1
+        assert (walk.name, metrics.DECODE, "seconds") not in sink.histograms
+
+    def test_setting(self, test_app_factory, sink):
+        app = test_app_factory()
+        app.conf.task_type_hint_metrics = sink
+
+        @app.task
+        def walk(dogs: typing.List[Dog]): ...
+
+        walk.delay(dogs).get()
+        assert sink.histograms
@@ -0,0 +1,116 @@
+import datetime
+import typing
+
+import pytest
+
+from celery_typed_tasks.offload import BLOB
+from celery_typed_tasks.offload import FileSystemBlobStore
+from celery_typed_tasks.offload import MemoryBlobStore
+from celery_typed_tasks.offload import Offload
+from example import Dog
+
+Annotated = getattr(typing, "Annotated", None)
+pytestmark = pytest.mark.skipif(Annotated is None, reason="requires typing.Annotated")
+
+dob = datetime.datetime(2020, 1, 1)
+dogs = [Dog(name=f"dog-{index}", dob=dob) for index in range(100)]
+
+
+@pytest.fixture(params=["memory", "filesystem"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBlobStore()
+    return FileSystemBlobStore(tmp_path)
+
+
+class TestOffload:
+    @pytest.mark.parametrize("compression", [None, "zlib", "zstd"])
+    def test_round_trip(self, test_app, store, compression):
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+
+        @test_app.task(type_hint_blob_store=store)
+        def count(
+            dogs: Annotated[typing.List[Dog], Offload(compression=compression)],
+        ) -> int:
+            assert dogs[0] == Dog(name="dog-0", dob=dob)
+            return len(dogs)
+
+        raw = count._dump_obj(dogs, count._get_binding().parameters["dogs"])
+        assert raw[BLOB]
+        assert store.exists(raw[BLOB])
+        assert count.delay(dogs).get() == 100
+
+    def test_bytes(self, test_app, store):
+        @test_app.task(type_hint_blob_store=store)
+        def size(data: Annotated[bytes, Offload()]) -> int:
+            assert isinstance(data, bytes)
+            return len(data)
+
+        assert size.delay(b"\x00" * 1000).get() == 1000
+
+    def test_threshold(self, test_app, store):
+        @test_app.task(type_hint_blob_store=store)
+        def count(dogs: Annotated[typing.List[Dog], Offload(threshold=1000)]) -> int:
+            return len(dogs)
+
+        annotation = count._get_binding().parameters["dogs"]
+        assert count._dump_obj(dogs[:1], annotation) == [
+            {"name": "dog-0", "dob": dob.isoformat()}
+        ]
+        assert BLOB in count._dump_obj(dogs, annotation)
+        assert count.delay(dogs[:1]).get() == 1
+
+    def test_content_addressed(self, test_app):
+        store = MemoryBlobStore()
+
+        @test_app.task(type_hint_blob_store=store)
+        def count(dogs: Annotated[typing.List[Dog], Offload()]) -> int:
+            return len(dogs)
+
+        annotation = count._get_binding().parameters["dogs"]
+        assert count._dump_obj(dogs, annotation) == count._dump_obj(
+            list(dogs), annotation
+        )
+        assert len(store.blobs) == 1
+
+    def test_cleanup_after_success(self, test_app):
+        store = MemoryBlobStore()
+
+        @test_app.task(type_hint_blob_store=store, type_hint_blob_cleanup=True)
+        def count(dogs: Annotated[typing.List[Dog], Offload()], fail: bool) -> int:
+            if fail:
+                raise ValueError("walk cancelled")
+            return len(dogs)
+
+        raw = count._dump_obj(dogs, count._get_binding().parameters["dogs"])
+        with pytest.raises(ValueError):
+            count.apply((raw, True), throw=True)
+        (key,) = store.blobs
+        assert count.delay(dogs, False).get() == 100
+        # the blob of the failed call is kept for a retry
+        assert list(store.blobs) == [key]
+
+    def test_cleanup_of_repeated_payloads(self, test_app, store):
+        @test_app.task(type_hint_blob_store=store, type_hint_blob_cleanup=True)
+        def size(data: Annotated[bytes, Offload()]) -> int:
+            return len(data)
+
+        annotation = size._get_binding().parameters["data"]
+        first = size._dump_obj(b"\x00" * 1000, annotation)
+        second = size._dump_obj(b"\x00" * 1000, annotation)
+        # each message has a blob of its own
+        assert first[BLOB] != second[BLOB]
+        assert size.apply((first,)).get() == 1000
+        assert not store.exists(first[BLOB])
+        assert store.exists(second[BLOB])
+        assert size.apply((second,)).get() == 1000
+        assert not store.exists(second[BLOB])
+
+    def test_requires_a_store(self, test_app):
+        @test_app.task
+        def count(dogs: Annotated[typing.List[Dog], Offload()]) -> int:
+            return len(dogs)
+
+        with pytest.raises(ValueError):
+            count.delay(dogs)
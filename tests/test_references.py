@@ -0,0 +1,124 @@
+import dataclasses
+import datetime
+import json
+import typing
+
+import pytest
+
+from celery_typed_tasks.references import REF
+from celery_typed_tasks.references import REFS
+from celery_typed_tasks.references import VALUE
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+@dataclasses.dataclass
+class Owner:
+    name: str
+
+
+@dataclasses.dataclass
+class Pet:
+    name: str
+    dob: datetime.datetime
+    owner: Owner
+
+
+@dataclasses.dataclass
+class Household:
+    owner: Owner
+    pets: typing.List[Pet]
+
+
+@pytest.fixture
+def owner():
+    return Owner(name="Josh")
+
+
+@pytest.fixture
+def pets(owner):
+    return [Pet(name=name, dob=dob, owner=owner) for name in ["Bruce", "Gus", "Rex"]]
+
+
+class TestReferences:
+    def test_dump(self, test_app, pets):
+        @test_app.task(type_hint_references=True)
+        def walk(pets: typing.List[Pet]): ...
+
+        assert walk._dump_obj(pets, typing.List[Pet]) == {
+            REFS: [{"name": "Josh"}],
+            VALUE: [
+                {"name": name, "dob": dob.isoformat(), "owner": {REF: 0}}
+                for name in ["Bruce", "Gus", "Rex"]
+            ],
+        }
+
+    def test_no_repeats(self, test_app):
+        @test_app.task(type_hint_references=True)
+        def walk(pets: typing.List[Pet]): ...
+
+        pets = [Pet(name="Bruce", dob=dob, owner=Owner(name="Josh"))]
+        assert walk._dump_obj(pets, typing.List[Pet]) == [
+            {"name": "Bruce", "dob": dob.isoformat(), "owner": {"name": "Josh"}}
+        ]
+
+    def test_identity(self, test_app, pets):
+        @test_app.task(type_hint_references=True)
+        def walk(pets: typing.List[Pet]) -> typing.List[Pet]:
+            assert len({id(pet.owner) for pet in pets}) == 1
+            return pets
+
+        loaded = walk.delay(pets).get()
+        assert loaded == pets
+        assert loaded[0].owner is loaded[2].owner
+
+    def test_repeated_items(self, test_app, pets):
+        @test_app.task(type_hint_references=True)
+        def walk(pets: typing.List[Pet]) -> int:
+            assert pets[0] is pets[1]
+            return len(pets)
+
+        assert walk.delay([pets[0], pets[0], pets[1]]).get() == 3
+
+    def test_nested(self, test_app, owner, pets):
+        @test_app.task(type_hint_references=True)
+        def visit(households: typing.List[Household]) -> typing.List[Household]:
+            return households
+
+        households = [Household(owner=owner, pets=pets)] * 2
+        dumped = visit._dump_obj(households, typing.List[Household])
+        assert dumped[VALUE] == [{REF: 1}, {REF: 1}]
+        loaded = visit.delay(households).get()
+        assert loaded == households
+        assert loaded[0] is loaded[1]
+        assert loaded[0].owner is loaded[0].pets[0].owner
+
+    def test_smaller_payload(self, test_app):
+        @test_app.task(type_hint_references=True)
+        def walk(pets: typing.List[Pet]): ...
+
+        @test_app.task
+        def copy(pets: typing.List[Pet]): ...
+
+        owner = Owner(name="x" * 100)
+        pets = [Pet(name=str(index), dob=dob, owner=owner) for index in range(100)]
+        shared = json.dumps(walk._dump_obj(pets, typing.List[Pet]))
+        copied = json.dumps(copy._dump_obj(pets, typing.List[Pet]))
+        assert len(shared) < len(copied) / 2
+
+    def test_disabled(self, test_app, pets):
+        @test_app.task
+        def walk(pets: typing.List[Pet]) -> typing.List[Pet]:
+            return pets
+
+        assert isinstance(walk._dump_obj(pets, typing.List[Pet]), list)
+        loaded = walk.delay(pets).get()
+        assert loaded[0].owner is not loaded[1].owner
+
+    def test_lazy(self, test_app, pets):
+        @test_app.task(type_hint_references=True, type_hint_lazy=True)
+        def walk(pets: typing.List[Pet]) -> str:
+            assert pets[0].owner is pets[1].owner
+            return pets[0].owner.name
+
+        assert walk.delay(pets).get() == "Josh"
@@ -0,0 +1,109 @@
+import dataclasses
+import decimal
+import typing
+
+import celery_typed_tasks
+from celery_typed_tasks.registry import CodecRegistry
+
+
+class Money:
+    def __init__(self, amount, currency):
+        self.amount = decimal.Decimal(amount)
+        self.currency = currency
+
+    def __eq__(self, other):
+        return (self.amount, self.currency) == (other.amount, other.currency)
+
+    def __str__(self):
+        return f"{self.amount} {self.currency}"
+
+    @classmethod
+    def parse(cls, value):
+        return cls(*value.split())
+
+
+class Euros(Money):
+    def __init__(self, amount, currency="EUR"):
+        super().__init__(amount, currency)
+
+
+def load_money(value, cls):
+    return cls.parse(value)
+
+
+@dataclasses.dataclass
+class Invoice:
+    total: Money
+    lines: typing.List[Money]
+
+
+class RegistryTask(celery_typed_tasks.TypedTask):
+    pass
+
+
+RegistryTask.register_codec(Money, str, load_money)
+
+
+class TestCodecRegistry:
+    def test_lookup_follows_the_mro(self):
+        registry = CodecRegistry()
+        registry.register(Money, str, load_money)
+        assert registry.lookup(Euros) == (str, load_money)
+        assert registry.lookup(int) is None
+
+    def test_parent(self):
+        parent = CodecRegistry({Money: (str, load_money)})
+        registry = CodecRegistry(parent=parent)
+        assert registry.lookup(Money) == (str, load_money)
+        registry.register(Euros, repr, load_money)
+        assert registry.lookup(Euros) == (repr, load_money)
+        assert parent.lookup(Euros) == (str, load_money)
+
+
+class TestRegisteredCodecs:
+    def test_task_class(self, test_app_factory):
+        app = test_app_factory(task_cls=RegistryTask)
+
+        @app.task
+        def pay(invoice: Invoice, refunds: typing.Set[Money]) -> Money:
+            return invoice.total
+
+        invoice = Invoice(total=Money("10", "USD"), lines=[Money("10", "USD")])
+        assert pay._dump_obj(invoice, Invoice) == {
+            "total": "10 USD",
+            "lines": ["10 USD"],
+        }
+        assert pay.delay(invoice, set()).get() == Money("10", "USD")
+
+    def test_task_class_scope(self, test_app):
+        assert celery_typed_tasks.TypedTask()._get_registered_codec(Money) is None
+
+    def test_app(self, test_app):
+        celery_typed_tasks.register_codec(test_app, Money, str, load_money)
+
+        @test_app.task
+        def pay(total: Money) -> Money:
+            return total
+
+        assert pay._compiler.get_codec(Money).kind == "registered"
+        assert pay.delay(Euros("3")).get() == Money("3", "EUR")
+        assert type(pay._load_obj("3 EUR", Euros)) is Euros
+
+    def test_app_setting(self, test_app):
+        test_app.conf.task_type_hint_codecs = {Money: (str, load_money)}
+
+        @test_app.task
+        def pay(total: Money) -> Money:
+            return total
+
+        assert pay.delay(Money("3", "USD")).get() == Money("3", "USD")
+
+    def test_task_class_takes_precedence(self, test_app_factory):
+        app = test_app_factory(task_cls=RegistryTask)
+        celery_typed_tasks.register_codec(app, Money, repr, load_money)
+
+        @app.task
+        def pay(total: Money) -> Money:
+            return total
+
+        assert pay._dump_obj(Money("3", "USD"), Money) == "3 USD"
@@ -0,0 +1,135 @@
+import datetime
+import inspect
+import typing
+
+import pytest
+from celery import chain
+from celery import group
+from celery.contrib.testing.worker import start_worker
+
+import celery_typed_tasks
+from celery_typed_tasks.results import TypedAsyncResult
+from celery_typed_tasks.results import TypedGroupResult
+from example import Dog
+
+dob = datetime.datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def dog_tasks(test_app):
+    @test_app.task
+    def make_dog(name: str) -> Dog:
+        return Dog(name=name, dob=dob)
+
+    @test_app.task
+    def walk_dog(dog: Dog) -> str:
+        return f"{dog.name} was born in {dog.dob.year}"
+
+    return make_dog, walk_dog
+
+
+class TestReturnSerialization:
+    def test_return_value_is_decoded(self, dog_tasks, mocker):
+        make_dog, _ = dog_tasks
+        load_return_spy = mocker.spy(celery_typed_tasks.TypedTask, "_load_return")
+        result = make_dog.delay("Gus")
+        # the result holds the raw value until it's needed
+        assert result.ready()
+        assert result.result == {"name": "Gus", "dob": dob.isoformat()}
+        assert load_return_spy.call_count == 0
+
+        dog = result.get()
+        assert dog == Dog(name="Gus", dob=dob)
+        assert result.get() is dog
+        assert load_return_spy.call_count == 1
+
+    def test_list_return(self, test_app):
+        @test_app.task
+        def timestamps(count: int) -> typing.List[datetime.datetime]:
+            return [dob + datetime.timedelta(days=day) for day in range(count)]
+
+        assert timestamps.delay(3).get() == timestamps(3)
+
+    @pytest.mark.parametrize("returns", [None, typing.Any, inspect.Parameter.empty])
+    def test_returns_without_codecs(self, test_app, returns):
+        @test_app.task
+        def passthrough(value):
+            return value
+
+        passthrough.run.__annotations__["return"] = returns
+        assert passthrough.delay({"hello": "world"}).get() == {"hello": "world"}
+
+    def test_called_directly(self, dog_tasks):
+        make_dog, _ = dog_tasks
+        assert make_dog("Gus") == Dog(name="Gus", dob=dob)
+
+    def test_chain(self, dog_tasks):
+        make_dog, walk_dog = dog_tasks
+        assert (
+            make_dog.s("Gus") | walk_dog.s()
+        ).delay().get() == "Gus was born in 2020"
+
+    def test_async_result(self, test_app_factory):
+        app = test_app_factory(backend="cache+memory://")
+
+        @app.task
+        def make_dog(name: str) -> Dog:
+            return Dog(name=name, dob=dob)
+
+        app.backend.mark_as_done("task-id", make_dog._dump_return(make_dog("Gus")))
+        result = make_dog.AsyncResult("task-id")
+        assert isinstance(result, TypedAsyncResult)
+        assert result.get() == Dog(name="Gus", dob=dob)
+
+
+class TestWorker:
+    @pytest.fixture
+    def worker_app(self, memory_app):
+        memory_app.conf.result_backend = "cache+memory://"
+        memory_app.conf.broker_transport_options = {"polling_interval": 0.01}
+        return memory_app
+
+    def test_chain(self, worker_app):
+        @worker_app.task
+        def now() -> datetime.datetime:
+            return dob
+
+        @worker_app.task
+        def year(ts: datetime.datetime) -> int:
+            return ts.year
+
+        @worker_app.task
+        def make_dog(name: str) -> Dog:
+            return Dog(name=name, dob=dob)
+
+        @worker_app.task
+        def greet(dog: Dog) -> str:
+            return f"Hello {dog.name}"
+
+        with start_worker(worker_app, pool="solo", perform_ping_check=False):
+            result = chain(now.s(), year.s()).delay()
+            assert result.get(timeout=5, interval=0.01) == 2020
+            result = chain(make_dog.s("Gus"), greet.s()).delay()
+            assert result.get(timeout=5, interval=0.01) == "Hello Gus"
+            # the backend holds the dumped value
+            result = make_dog.delay("Rex")
+            assert result.get(timeout=5, interval=0.01) == Dog(name="Rex", dob=dob)
+            assert result.result == {"name": "Rex", "dob": dob.isoformat()}
+
+
+class TestGroupResult:
+    def test_group_is_decoded_in_one_batch(self, test_app, dog_tasks, mocker):
+        make_dog, _ = dog_tasks
+        test_app.GroupResult = test_app.subclass_with_self(TypedGroupResult)
+        load_return_spy = mocker.spy(celery_typed_tasks.TypedTask, "_load_return")
+        load_returns_spy = mocker.spy(celery_typed_tasks.TypedTask, "_load_returns")
+
+        names = ["Bruce", "Gus", "Rex"]
+        result = group(make_dog.s(name) for name in names).delay()
+        assert isinstance(result, TypedGroupResult)
+        dogs = result.get()
+        assert dogs == [Dog(name=name, dob=dob) for name in names]
+        assert load_returns_spy.call_count == 1
+        assert load_return_spy.call_count == 0
+        # the children share the decoded values
+        assert result.results[0].get() is dogs[0]
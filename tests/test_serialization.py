@@ -0,0 +1,116 @@
+import datetime
+import decimal
+import json
+import typing
+import uuid
+
+import pytest
+from kombu import serialization as kombu_serialization
+
+import celery_typed_tasks
+from celery_typed_tasks import serialization
+from example import Dog
+
+pytest.importorskip("msgpack")
+
+utc = datetime.timezone.utc
+est = datetime.timezone(datetime.timedelta(hours=-5))
+
+
+class TestTypedMsgpack:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            datetime.datetime(2022, 1, 20, 13, 14, 15, 161718),
+            datetime.datetime(2022, 1, 20, 13, 14, 15, tzinfo=utc),
+            datetime.datetime(2022, 1, 20, 13, 14, 15, tzinfo=est),
+            datetime.date(2022, 1, 20),
+            datetime.time(13, 14, 15, 161718),
+            datetime.time(13, 14, 15, tzinfo=est),
+            uuid.uuid4(),
+            decimal.Decimal("3.14159"),
+        ],
+    )
+    def test_round_trip(self, value):
+        loaded = serialization.loads(serialization.dumps([value]))
+        assert loaded == [value]
+        assert type(loaded[0]) is type(value)
+        if isinstance(value, (datetime.datetime, datetime.time)):
+            assert loaded[0].utcoffset() == value.utcoffset()
+
+    def test_sets_are_lists(self):
+        assert serialization.loads(serialization.dumps({1, 2})) == [1, 2]
+
+    def test_unknown_type(self):
+        with pytest.raises(TypeError):
+            serialization.dumps(object())
+
+    def test_registered_with_kombu(self):
+        timestamps = [
+            datetime.datetime(2022, 1, 1) + datetime.timedelta(i) for i in range(100)
+        ]
+        content_type, content_encoding, data = kombu_serialization.dumps(
+            timestamps, "typed-msgpack"
+        )
+        assert content_type == serialization.CONTENT_TYPE
+        assert len(data) < len(json.dumps([ts.isoformat() for ts in timestamps]))
+        assert (
+            kombu_serialization.loads(
+                data, content_type, content_encoding, accept=[content_type]
+            )
+            == timestamps
+        )
+
+
+class TestTypedMsgpackTask:
+    def test_native_types_skip_codecs(self, test_app, mocker):
+        @test_app.task(type_hint_serialization="typed-msgpack")
+        def timestamps(
+            timestamps: typing.List[datetime.datetime],
+            ids: typing.Set[uuid.UUID],
+            dog: Dog,
+        ):
+            return timestamps, ids, dog
+
+        dumps_spy = mocker.spy(serialization, "_default")
+        values = (
+            [datetime.datetime(2022, 1, 1), datetime.datetime(2022, 1, 2)],
+            {uuid.uuid4()},
+            Dog(name="Gus", dob=datetime.datetime(2020, 1, 1)),
+        )
+        assert timestamps.serializer == "typed-msgpack"
+        assert timestamps.delay(*values).get() == values
+        # each datetime and uuid reached the serializer as is
+        assert dumps_spy.call_count == 4
+
+    def test_serializer_setting(self, test_app_factory):
+        app = test_app_factory()
+        app.conf.task_type_hint_serialization = "typed-msgpack"
+
+        @app.task
+        def alert(timestamp: datetime.datetime):
+            return timestamp
+
+        now = datetime.datetime.now()
+        assert alert.serializer == "typed-msgpack"
+        assert alert.delay(now).get() == now
+
+    def test_serializer_per_call(self, test_app):
+        @test_app.task
+        def alert(timestamp: datetime.datetime):
+            return timestamp
+
+        now = datetime.datetime.now()
+        assert alert.apply_async((now,), serializer="typed-msgpack").get() == now
+
+    def test_loads_json_payloads(self):
+        task = celery_typed_tasks.TypedTask()
+        now = datetime.datetime.now()
+        assert task._load_obj(now.isoformat(), datetime.datetime) == now
+        assert task._load_obj(now, datetime.datetime) == now
+        assert task._load_obj(
+            [now.isoformat(), now], typing.List[datetime.datetime]
+        ) == [
+            now,
+            now,
+        ]